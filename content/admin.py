@@ -3,12 +3,24 @@ from django import forms
 from django.contrib import admin, messages
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
-from django.db.models import Q, OneToOneField, ForeignKey, FloatField, CASCADE
+from django.db.models import Q, OneToOneField, ForeignKey, FloatField, CASCADE, Prefetch, Value
 from django.utils.html import format_html
-from django.urls import path
-from django.http import HttpResponseRedirect, HttpResponse
-from django.core.serializers import serialize
-from django.conf import settings
+from django.utils.http import urlencode
+from django.urls import path, reverse, NoReverseMatch
+from django.http import HttpResponseRedirect, HttpResponse, StreamingHttpResponse, JsonResponse, FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.core.exceptions import PermissionDenied
+from .localizations import with_loc_table, build_table_files, build_manifest, write_tables_zip, iter_import_rows, import_localizations, get_owner_model_names, get_owner_relations, owner_case_expression, stream_csv, get_translation_report, supported_loc_tables, table_case_expression, translation_status_filters, NO_TABLE, TRANSLATION_STATUS_LABELS, REPORT_SAMPLE_SIZE
+from .translation_memory import HASH_FIELDS, find_duplicates, suggest_translations
+from .exports import enqueue_export, fail_stale_jobs
+from .diffs import DIFF_PREVIEW_LIMIT, get_source_choices, open_source, iter_diff, stream_diff_jsonl
+from .snapshots import SnapshotError
+from .condition_graph import get_condition_graph
+from .scaffolding import create_npcs, iter_npc_rows
+from .paginators import KeysetChangeList, KeysetPaginator, CountModes
+from . import profiling
+from .export_formats import ExportFormatError, get_export_format
 from .widgets import get_sprite_choices, get_prefab_choices, SpriteGridWidget, PrefabGridWidget
 from .models import (
     Localization,
@@ -48,13 +60,34 @@ from .models import (
     DialogItemsToGive,
     DiaryPage,
     DiaryEntry,
+    ExportJob,
+    ExportJobKinds,
+    ExportJobStatuses,
+    KeyReservation,
     )
 
-from io import StringIO
-import json
+from io import BytesIO, TextIOWrapper
 import os
 from datetime import datetime
 
+def export_response(request, data, filename_base, indent=4, success_message=None):
+    """
+    Descarga de data en el formato de ?format= (json por defecto, ver export_formats.py).
+    """
+    try:
+        export_format = get_export_format(request.GET.get('format'), indent=indent)
+    except ExportFormatError as e:
+        messages.error(request, str(e))
+        return HttpResponseRedirect("/admin/")
+
+    response = HttpResponse(export_format.dumps(data), content_type=export_format.content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename_base}.{export_format.extension}"'
+
+    if success_message:
+        messages.success(request, success_message)
+
+    return response
+
 class CustomAdminSite(admin.AdminSite):
     site_header = "Carpingauchos Content Manager"
     index_title = "App para gestión de contenido"
@@ -68,6 +101,11 @@ class CustomAdminSite(admin.AdminSite):
             app['models'].sort(key=lambda model: int(model['name'].split('.')[0]) if model['name'].split('.')[0].isdigit() else 999)
         return app_list
 
+    def each_context(self, request):
+        context = super().each_context(request)
+        context['profiling_enabled'] = profiling.is_enabled()
+        return context
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
@@ -78,24 +116,26 @@ class CustomAdminSite(admin.AdminSite):
             path("download-dialogues/", self.admin_view(self.download_dialogues), name="download-dialogues"),
             path("download-items/", self.admin_view(self.download_items), name="download-items"),
             path("download-localizations/", self.admin_view(self.download_localizations), name="download-localizations"),
+            path("download-localization-tables/", self.admin_view(self.download_localization_tables), name="download-localization-tables"),
+            path("translation-report/", self.admin_view(self.translation_report), name="translation-report"),
+            path("content-diff/", self.admin_view(self.content_diff), name="content-diff"),
+            path("condition-graph/", self.admin_view(self.condition_graph), name="condition-graph"),
+            path("condition-graph/json/", self.admin_view(self.condition_graph_json), name="condition-graph-json"),
+            path("profiling/", self.admin_view(self.profiling_report), name="profiling-report"),
         ]
         return custom_urls + urls
 
     def export_localization(self, request):
-        # Serializamos Localization
-        data = serialize('json', Localization.objects.all(), indent=4)
-        export_path = os.path.join(settings.BASE_DIR, 'exports', 'localization.json')
-        os.makedirs(os.path.dirname(export_path), exist_ok=True)
+        if not self._registry[ExportJob].has_enqueue_permission(request):
+            raise PermissionDenied
 
-        with open(export_path, 'w', encoding='utf-8') as f:
-            f.write(data)
+        # Se genera en segundo plano, el avance se ve en Export Jobs.
+        job = enqueue_export(ExportJobKinds.LOCALIZATION)
 
-        messages.success(request, "Localization exportado correctamente.")
-        return HttpResponseRedirect("/admin/")
+        messages.success(request, f"Exportación de Localization encolada ({job}).")
+        return HttpResponseRedirect(reverse("admin:content_exportjob_changelist"))
     
     def download_full_json(self, request):
-        buffer = StringIO()
-
         # Serializamos múltiples modelos y los agregamos al buffer como una lista JSON
         data = {
             'Rarity': Rarity.to_dict(),
@@ -128,33 +168,20 @@ class CustomAdminSite(admin.AdminSite):
             'Condition':Condition.to_dict(),
         }
 
-        # Convertimos a JSON final
-        json.dump(data, buffer, indent=4, ensure_ascii=False)
-
         today = datetime.now().strftime("%d-%m-%Y")
-        filename = f"full_export_{today}.json"
-
-        response = HttpResponse(buffer.getvalue(), content_type='application/json')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-        messages.success(request, "Exportación completa generada y descargada.")
-        return response
+        return export_response(
+            request, data, f"full_export_{today}",
+            success_message="Exportación completa generada y descargada.",
+        )
 
     def donwload_template(self, request, model, exported_model_name):
-        buffer = StringIO()
         data =model.to_dict2()
 
-        # Convertimos a JSON final
-        json.dump(data, buffer, indent=4, ensure_ascii=False)
-
         today = datetime.now().strftime("%d-%m-%Y")
-        filename = f"{exported_model_name.lower()}_export_{today}.json"
-
-        response = HttpResponse(buffer.getvalue(), content_type='application/json')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-        messages.success(request, f"JSON de {exported_model_name.replace('_', ' ')}s generado con éxito.")
-        return response
+        return export_response(
+            request, data, f"{exported_model_name.lower()}_export_{today}",
+            success_message=f"JSON de {exported_model_name.replace('_', ' ')}s generado con éxito.",
+        )
 
     def download_quests(self, request):
         return self.donwload_template(request, Quest, "Quest")
@@ -177,6 +204,196 @@ class CustomAdminSite(admin.AdminSite):
 
         return export_all_json(None, request, queryset)
 
+    def download_localization_tables(self, request):
+        """
+        ZIP con un JSON por string table de Unity y un manifest.json
+        con el hash de cada tabla. Con ?dedup=1 los textos repetidos van una sola vez.
+        """
+        try:
+            export_format = get_export_format(request.GET.get('format'), indent=2)
+        except ExportFormatError as e:
+            messages.error(request, str(e))
+            return HttpResponseRedirect("/admin/")
+
+        table_files = build_table_files(Localization.objects.all(), dedup=bool(request.GET.get('dedup')), export_format=export_format)
+        manifest = build_manifest(table_files, export_format.extension)
+
+        buffer = BytesIO()
+        write_tables_zip(buffer, table_files, manifest)
+
+        date_str = datetime.now().strftime("%Y-%m-%d")
+        filename = f"Localization_Tables_{date_str}.zip"
+
+        response = HttpResponse(buffer.getvalue(), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def translation_report(self, request):
+        """
+        Traducciones faltantes, con placeholder o iguales en EN y ES,
+        por tabla de Unity y por modelo dueño.
+        """
+        report = get_translation_report()
+        changelist_url = reverse("admin:content_localization_changelist")
+
+        def filtered_url(status, loc_table=None, owner=None):
+            params = {'translation_status': status}
+            if loc_table is not None:
+                params['loc_table'] = loc_table or NONE_FILTER_VALUE
+            if owner is not None:
+                params['model_name'] = owner or NONE_FILTER_VALUE
+            return f"{changelist_url}?{urlencode(params)}"
+
+        # Cada celda lleva al changelist filtrado por tabla, dueño y estado.
+        groups = [
+            {
+                **group,
+                'cells': [(group[status], filtered_url(status, group['loc_table'], group['owner'])) for status in TRANSLATION_STATUS_LABELS],
+            }
+            for group in report['groups']
+        ]
+        statuses = [
+            {
+                'label': label,
+                'count': report['totals'][status],
+                'url': filtered_url(status),
+                'samples': report['samples'][status],
+            }
+            for status, label in TRANSLATION_STATUS_LABELS.items()
+        ]
+
+        context = {
+            **self.each_context(request),
+            'title': "Reporte de traducciones",
+            'report': report,
+            'groups': groups,
+            'statuses': statuses,
+            'sample_size': REPORT_SAMPLE_SIZE,
+        }
+
+        return TemplateResponse(request, "admin/translation_report.html", context)
+
+    def content_diff(self, request):
+        """
+        Diff entre dos releases, dumps o la base actual. Muestra los primeros
+        registros y con ?download=1 baja el diff completo como JSON lines.
+        """
+        choices = get_source_choices()
+        valid_sources = {value for value, _ in choices}
+
+        source_a = request.GET.get('a')
+        source_b = request.GET.get('b')
+        entries = None
+        counts = None
+        truncated = False
+        status = 200
+
+        if source_a and source_b and (source_a not in valid_sources or source_b not in valid_sources):
+            messages.error(request, "Source inválido: elegí uno de la lista.")
+            source_a = source_b = None
+            status = 400
+
+        if source_a and source_b:
+            if request.GET.get('download'):
+                response = StreamingHttpResponse(stream_diff_jsonl(source_a, source_b), content_type='application/x-ndjson')
+                response['Content-Disposition'] = 'attachment; filename="content_diff.jsonl"'
+                return response
+
+            entries = []
+            counts = {'added': 0, 'removed': 0, 'changed': 0}
+
+            try:
+                with open_source(source_a) as opened_a, open_source(source_b) as opened_b:
+                    for entry in iter_diff(opened_a, opened_b):
+                        counts[entry['status']] += 1
+                        if len(entries) < DIFF_PREVIEW_LIMIT:
+                            entries.append(entry)
+
+            except SnapshotError as e:
+                messages.error(request, str(e))
+
+            truncated = sum(counts.values()) > len(entries)
+
+        context = {
+            **self.each_context(request),
+            'title': "Diff de contenido",
+            'choices': choices,
+            'source_a': source_a,
+            'source_b': source_b,
+            'entries': entries,
+            'counts': counts,
+            'truncated': truncated,
+            'download_query': request.GET.urlencode() + "&download=1",
+        }
+
+        return TemplateResponse(request, "admin/content_diff.html", context, status=status)
+
+    def _get_condition_graph_data(self, key):
+        """
+        Dependencias de la condition key (o None si no se pidió ninguna)
+        y las conditions sueltas del grafo completo.
+        """
+        graph = get_condition_graph()
+        data = {
+            'conditions': len(graph.conditions),
+            'never_triggered': graph.never_triggered(),
+            'never_used': graph.never_used(),
+            'condition': graph.describe(key) if key else None,
+        }
+        return graph, data
+
+    def condition_graph(self, request):
+        """
+        Quién dispara una condition, qué elementos habilita o bloquea y
+        qué conditions se alcanzan transitivamente.
+        """
+        key = request.GET.get('key')
+
+        try:
+            graph, data = self._get_condition_graph_data(key)
+        except Condition.DoesNotExist as e:
+            messages.error(request, str(e))
+            graph, data = self._get_condition_graph_data(None)
+
+        # Links a los change de cada elemento (si el modelo está en el admin).
+        for element in (data['condition'] or {}).get('triggered_by', []) + (data['condition'] or {}).get('unlocks', []):
+            try:
+                element['url'] = reverse(f"admin:content_{element['model']}_change", args=[element['id']])
+            except NoReverseMatch:
+                element['url'] = None
+
+        context = {
+            **self.each_context(request),
+            'title': "Dependencias de Conditions",
+            'condition_keys': sorted(graph.condition_ids),
+            'graph': data,
+        }
+
+        return TemplateResponse(request, "admin/condition_graph.html", context)
+
+    def condition_graph_json(self, request):
+        try:
+            _, data = self._get_condition_graph_data(request.GET.get('key'))
+        except Condition.DoesNotExist as e:
+            return JsonResponse({'error': str(e)}, status=404)
+
+        return JsonResponse(data)
+
+    def profiling_report(self, request):
+        """
+        Reporte en memoria de los últimos requests perfilados.
+        """
+        profiles = list(reversed(profiling.recent_profiles))
+
+        context = {
+            **self.each_context(request),
+            'title': "Profiling de requests",
+            'profiles': profiles,
+            'slowest': sorted(profiles, key=lambda p: p.total_ms, reverse=True)[:10],
+        }
+
+        return TemplateResponse(request, "admin/profiling.html", context)
+
 custom_admin_site = CustomAdminSite(name='custom_admin')
 
 def _add_localization_field_filter(key_prefix, db_field, kwargs):
@@ -188,6 +405,11 @@ def _add_localization_field_filter(key_prefix, db_field, kwargs):
         # Filtramos por key que contenga cierto texto
         kwargs["queryset"] = Localization.objects.filter(Q(key__icontains=key_prefix) & Q(key__icontains=db_field.name)).order_by('key')
 
+def _is_changelist(request):
+    # url_name es None en las vistas sin nombre.
+    url_name = request.resolver_match.url_name if request.resolver_match else None
+    return bool(url_name) and url_name.endswith('_changelist')
+
 class AutoKeyMixin(admin.ModelAdmin):
     class Media:
         js = ('admin/js/auto_key.js',)
@@ -195,6 +417,12 @@ class AutoKeyMixin(admin.ModelAdmin):
 class BaseModelAdmin(admin.ModelAdmin):
     key_prefix = ''
 
+    # Paginación por cursor sobre la key (opt-in para changelists grandes).
+    keyset_pagination = False
+    keyset_field = 'key'
+    keyset_count_mode = CountModes.EXACT
+    keyset_count_limit = 1000
+
     class Media:
         css = {
             'all': (
@@ -204,6 +432,7 @@ class BaseModelAdmin(admin.ModelAdmin):
             )
         }
         js = (
+            'admin/js/key_generator.js',
             'admin/js/get_sanitized_key.js',
             'admin/js/auto_localizations.js',
             'admin/js/file_grid.js'
@@ -214,7 +443,28 @@ class BaseModelAdmin(admin.ModelAdmin):
         _add_localization_field_filter(self.key_prefix, db_field, kwargs)
 
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
-    
+
+    def get_changelist(self, request, **kwargs):
+        if self.keyset_pagination:
+            return KeysetChangeList
+
+        return super().get_changelist(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True, keyset=False):
+        # keyset=True solo lo pide KeysetChangeList cuando pagina por cursor; con
+        # cualquier otro orden la paginación por OFFSET necesita el count exacto.
+        if self.keyset_pagination and keyset:
+            return KeysetPaginator(
+                queryset,
+                per_page,
+                orphans,
+                allow_empty_first_page,
+                count_mode=self.keyset_count_mode,
+                count_limit=self.keyset_count_limit,
+            )
+
+        return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
     def get_form(self, request, obj=None, **kwargs):
         """
         Seteo del prefijo para luego autogenerar los keys.
@@ -408,32 +658,68 @@ class LocalizationForm(BaseModelForm):
         self.fields['identifier'].widget.attrs['readonly'] = readonly
         self.fields['identifier'].widget.attrs['data-key-prefix'] = self.key_prefix
 
+class LocalizationImportForm(forms.Form):
+    file = forms.FileField(label="Archivo", help_text="CSV o JSON exportado desde Localizations.")
+    dry_run = forms.BooleanField(label="Dry run", required=False, initial=True, help_text="Solo muestra el reporte, no guarda cambios.")
+
+class NPCImportForm(forms.Form):
+    file = forms.FileField(label="Archivo", help_text="CSV (identifier, name_en, name_es) o JSON ({\"npcs\": [...]}).")
+    suffix_conflicts = forms.BooleanField(label="Renombrar keys repetidas", required=False, help_text="Si una key ya existe se usa key_2, key_3... en vez de cancelar la importación.")
+
+# Valor de los filtros de Localization para "sin tabla" / "sin dueño".
+NONE_FILTER_VALUE = '_none'
+
 class ModelNameFilter(admin.SimpleListFilter):
+    """
+    Filtra las Localizations por modelo dueño, con un aggregate para las
+    opciones y un filtro sobre la relación inversa (ver localizations.py).
+    """
     title = "Model"
     parameter_name = "model_name"
-    model_admin = None
 
     def lookups(self, request, model_admin):
-        # Obtener valores únicos de model_name dinámicamente
-        self.model_admin = model_admin
-        qs = model_admin.get_queryset(request)
-        values = set()
-        for obj in qs:
-            instance = model_admin.get_related_instance(obj)
-            if instance:
-                values.add(instance._meta.model_name)
-        return [(v, v.capitalize()) for v in sorted(values)]
+        choices = [(v, v.capitalize()) for v in get_owner_model_names(model_admin.get_queryset(request))]
+        return choices + [(NONE_FILTER_VALUE, "(sin dueño)")]
 
     def queryset(self, request, queryset):
-        if self.value():
-            # Filtrar queryset por el model_name elegido
-            ids = []
-            for obj in queryset:
-                instance = self.model_admin.get_related_instance(obj)
-                if instance and instance._meta.model_name == self.value():
-                    ids.append(obj.id)
-            return queryset.filter(id__in=ids)
-        return queryset
+        if not self.value():
+            return queryset
+
+        if self.value() == NONE_FILTER_VALUE:
+            return queryset.filter(**{f"{rel.name}__isnull": True for rel in get_owner_relations()})
+
+        # Un modelo puede tener varios LocalizedFields: alcanza con cualquiera.
+        owner_filter = Q(pk__in=[])
+        for rel in get_owner_relations():
+            if rel.related_model._meta.model_name == self.value():
+                owner_filter |= Q(**{f"{rel.name}__isnull": False})
+
+        return queryset.filter(owner_filter)
+
+class LocTableFilter(admin.SimpleListFilter):
+    title = "Tabla"
+    parameter_name = "loc_table"
+
+    def lookups(self, request, model_admin):
+        return [(table['localization_id'], table['localization_id']) for table in supported_loc_tables] + [(NONE_FILTER_VALUE, "(sin tabla)")]
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+
+        table = NO_TABLE if self.value() == NONE_FILTER_VALUE else self.value()
+        return queryset.alias(filter_loc_table=table_case_expression(default=Value(NO_TABLE))).filter(filter_loc_table=table)
+
+class TranslationStatusFilter(admin.SimpleListFilter):
+    title = "Traducción"
+    parameter_name = "translation_status"
+
+    def lookups(self, request, model_admin):
+        return TRANSLATION_STATUS_LABELS.items()
+
+    def queryset(self, request, queryset):
+        condition = translation_status_filters().get(self.value())
+        return queryset if condition is None else queryset.filter(condition)
 
 def export_csv(modeladmin, request, queryset):
     """
@@ -443,15 +729,7 @@ def export_csv(modeladmin, request, queryset):
     # Esto es por si al filtrar, selecciono modelos de más de un modelo.
     # se va a notar porque el nombre va incluir todos los model_names.
     # Normalmente deberia ser 1 solo.
-    model_names_set = set()
-
-    for obj in queryset:
-        instance = modeladmin.get_related_instance(obj)
-        if instance:
-            model_names_set.add(instance._meta.model_name)
-
-    # Convertimos el set en string con "_"
-    model_names = "_".join(sorted(model_names_set))
+    model_names = "_".join(get_owner_model_names(queryset))
 
     # Obtener lo que se escribió en la barra de búsqueda
     search_text = request.GET.get("q", "").strip()
@@ -464,127 +742,44 @@ def export_csv(modeladmin, request, queryset):
     else:
         filename = f"Localizations_{model_names}s.csv"
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    rows = queryset.values_list('key', 'english', 'spanish').iterator(chunk_size=2000)
 
-    writer = csv.writer(response)
-    # Headers
-    writer.writerow(['Key', 'English(en)', 'Spanish(es)'])
-
-    for  obj in queryset:
-        writer.writerow([obj.key, obj.english, obj.spanish])
+    response = StreamingHttpResponse(stream_csv(['Key', 'English(en)', 'Spanish(es)'], rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
     return response
 
-supported_loc_tables = [
-    {
-        'localization_id': 'Chapters',
-        'models': [
-            'loc_diarypage_',
-            'loc_diaryentry_',
-        ],
-    },
-    {
-        'localization_id': 'Dialogues',
-        'models': [
-            'loc_dialogue_',
-            'loc_dialoguesequenceitem_',
-            'loc_dialoguesingleitem_',
-        ],
-    },
-    {
-        'localization_id': 'Items_Armor',
-        'models': ['loc_item_equipment_'],
-    },
-    {
-        'localization_id': 'Items_Consumables',
-        'models': ['loc_item_consumable_'],
-    },
-    {
-        'localization_id': 'Items_Key',
-        'models': ['loc_item_quest_item_'],
-    },
-    {
-        'localization_id': 'Items_Weapons',
-        'models': ['loc_item_weapon_'],
-    },
-    {
-        'localization_id': 'NPCs',
-        'models': ['loc_npc_'],
-    },
-    {
-        'localization_id': 'Quests',
-        'models': [
-            'loc_quest_',
-            'loc_questobjective_',
-        ],
-    },
-]
-
 def export_all_json(modeladmin, request, queryset):
-    def get_table_from_key(key: str):
-        key_lower = key.lower()
-        for table in supported_loc_tables:
-            for prefix in table['models']:
-                if key_lower.startswith(prefix):
-                    return table['localization_id']
-        return None  # ignorar entradas sin match
-
     # Generar nombre de archivo con fecha
     date_str = datetime.now().strftime("%Y-%m-%d")
-    filename = f"Localizations_All_{date_str}.json"
-
-    data = []
 
-    for obj in queryset:
-        table = get_table_from_key(obj.key)
-        if table is None:
-            continue  # ignorar entradas sin match
+    # La tabla se resuelve en SQL: las entradas sin tabla no se traen.
+    rows = with_loc_table(queryset).values_list('key', 'english', 'spanish', 'loc_table')
 
-        data.append({
-            "Key": obj.key,
-            "English": getattr(obj, 'english', ''),
-            "Spanish": getattr(obj, 'spanish', ''),
+    data = [
+        {
+            "Key": key,
+            "English": english,
+            "Spanish": spanish,
             "Table": table
-        })
+        }
+        for key, english, spanish, table in rows.iterator(chunk_size=2000)
+    ]
 
-    response = HttpResponse(content_type='application/json')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    response.write(json.dumps({"entries": data}, ensure_ascii=False, indent=2))
-    return response
+    return export_response(request, {"entries": data}, f"Localizations_All_{date_str}", indent=2)
 
 def export_all_csv(modeladmin, request, queryset):
-    def get_table_from_key(key: str):
-        key_lower = key.lower()
-        for table in supported_loc_tables:
-            for prefix in table['models']:
-                if key_lower.startswith(prefix):
-                    return table['localization_id']
-        return None  # ignorar entradas sin match
-
     # Generar nombre de archivo con fecha
     date_str = datetime.now().strftime("%Y-%m-%d")
     filename = f"Localizations_All_{date_str}.csv"
 
+    # La tabla se resuelve en SQL: las entradas sin tabla no se traen.
+    rows = with_loc_table(queryset).values_list('key', 'english', 'spanish', 'loc_table').iterator(chunk_size=2000)
+
     # Generar respuesta CSV
-    response = HttpResponse(content_type='text/csv')
+    response = StreamingHttpResponse(stream_csv(['Key', 'English(en)', 'Spanish(es)', 'Table'], rows), content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
-    writer = csv.writer(response)
-    writer.writerow(['Key', 'English(en)', 'Spanish(es)', 'Table'])
-
-    for obj in queryset:
-        table = get_table_from_key(obj.key)
-        if table is None:
-            continue  # ignorar entradas sin match
-
-        writer.writerow([
-            obj.key,
-            getattr(obj, 'english', ''),
-            getattr(obj, 'spanish', ''),
-            table
-        ])
-
     return response
 
 export_csv.short_description = "Exportar selección a CSV"
@@ -595,31 +790,87 @@ class LocalizationAdmin(BaseModelAdmin, AutoKeyMixin):
 
     list_display = ('identifier', 'key', 'model_name', 'english', 'spanish')
     ordering = ('key',)
-    list_filter = (ModelNameFilter,)
+    keyset_pagination = True
+    keyset_count_mode = CountModes.ESTIMATED
+    list_filter = (ModelNameFilter, LocTableFilter, TranslationStatusFilter)
     search_fields = ('identifier', 'english', 'spanish')
     actions = [export_csv, export_all_csv] 
 
     form = LocalizationForm
 
-    def get_related_instance(self, obj):
+    class Media:
+        js = ('admin/js/localization_suggestions.js',)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path("import/", self.admin_site.admin_view(self.import_view), name="content_localization_import"),
+            path("suggest/", self.admin_site.admin_view(self.suggest_view), name="content_localization_suggest"),
+        ]
+        return custom_urls + urls
+
+    def suggest_view(self, request):
         """
-        Devuelve la instancia del modelo que tiene OneToOne con este C
-        (el que exista).
+        Duplicados y traducciones sugeridas para el texto que se está cargando
+        (lo usa localization_suggestions.js en el form).
         """
-        for rel in obj._meta.related_objects:
-            related_name = rel.get_accessor_name()
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+
+        text = request.GET.get('text', '')
+        source = request.GET.get('source', 'english')
+        key = request.GET.get('key') or None
+
+        if source not in HASH_FIELDS:
+            return JsonResponse({'error': f"Idioma desconocido: {source}"}, status=400)
+
+        return JsonResponse({
+            'duplicates': find_duplicates(text, source, exclude_key=key),
+            'suggestions': suggest_translations(text, source, exclude_key=key),
+        })
+
+    def import_view(self, request):
+        """
+        Importación masiva de traducciones desde el CSV/JSON de la exportación.
+        """
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        report = None
+        form = LocalizationImportForm(request.POST or None, request.FILES or None)
+
+        if request.method == 'POST' and form.is_valid():
+            uploaded_file = form.cleaned_data['file']
+            file_format = 'json' if uploaded_file.name.lower().endswith('.json') else 'csv'
+            text_stream = TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+
             try:
-                instance = getattr(obj, related_name)
-                return instance
-            except rel.related_model.DoesNotExist:
-                continue
-        return None
+                report = import_localizations(iter_import_rows(text_stream, file_format), dry_run=form.cleaned_data['dry_run'])
+                messages.success(request, report.summary())
+
+            except (ValueError, KeyError, csv.Error) as e:
+                messages.error(request, f"No se pudo leer el archivo: {e}")
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Importar Localizations",
+            'form': form,
+            'report': report,
+        }
+
+        return TemplateResponse(request, "admin/content/localization/import.html", context)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if _is_changelist(request):
+            # El modelo dueño de cada fila sale en la misma query del listado.
+            queryset = queryset.annotate(owner_model=owner_case_expression())
+
+        return queryset
 
     def model_name(self, obj):
-        instance = self.get_related_instance(obj)
-        if instance:
-            return instance._meta.model_name
-        return None
+        return getattr(obj, 'owner_model', None) or None
 
     model_name.short_description = "Model"
 
@@ -639,6 +890,7 @@ class QuestObjectiveInline(admin.TabularInline):
 
     class Media:
         js = (
+            'admin/js/key_generator.js',
             'admin/js/get_sanitized_key.js',
             'admin/js/auto_key_inline.js',
             'admin/js/tabularinline_questobjectives_index_autoincrement.js',
@@ -653,6 +905,8 @@ class QuestObjectiveInline(admin.TabularInline):
 @admin.register(QuestObjective, site=custom_admin_site)
 class QuestObjectiveAdmin(BaseModelAdmin, AutoKeyMixin):
     list_display = ('identifier', 'key', 'quest_identifier','english_name', 'spanish_name',)
+    # Lo que leen quest_identifier y english_name/spanish_name.
+    list_select_related = ('quest', 'brief')
 
     ordering = ('key',)
 
@@ -685,8 +939,48 @@ class QuestForm(BaseModelForm):
 class NPCAdmin(BaseModelAdmin, AutoKeyMixin):
     key_prefix = NPC.prefix
     list_display = ('identifier', 'key', 'english_name', 'spanish_name',)
+    list_select_related = ('name',)
+    search_fields = ('identifier', 'key')
     ordering = ('key',)
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path("import/", self.admin_site.admin_view(self.import_view), name="content_npc_import"),
+        ]
+        return custom_urls + urls
+
+    def import_view(self, request):
+        """
+        Alta masiva de NPCs con sus first talks.
+        """
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = NPCImportForm(request.POST or None, request.FILES or None)
+
+        if request.method == 'POST' and form.is_valid():
+            uploaded_file = form.cleaned_data['file']
+            file_format = 'json' if uploaded_file.name.lower().endswith('.json') else 'csv'
+            text_stream = TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+
+            try:
+                npcs = create_npcs(iter_npc_rows(text_stream, file_format), suffix_conflicts=form.cleaned_data['suffix_conflicts'])
+                messages.success(request, f"{len(npcs)} NPCs creados.")
+                return HttpResponseRedirect(reverse('admin:content_npc_changelist'))
+
+            except (ValueError, KeyError, csv.Error) as e:
+                messages.error(request, f"No se pudo importar el archivo: {e}")
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Importar NPCs",
+            'form': form,
+        }
+
+        return TemplateResponse(request, "admin/content/npc/import.html", context)
+
     def english_name(self, obj):
         return obj.name.english
     english_name.short_description = "Name (EN)"
@@ -699,12 +993,17 @@ class ItemRewardInline(admin.TabularInline):
     model = ItemReward
     extra = 1
 
+    autocomplete_fields = ('item',)
+
 @admin.register(Quest, site=custom_admin_site)
 class QuestAdmin(BaseModelAdmin, AutoKeyMixin):
     key_prefix = Quest.prefix
 
     inlines = [QuestObjectiveInline, ItemRewardInline]
     list_display = ('identifier', 'key', 'english_name', 'spanish_name',)
+    list_select_related = ('title',)
+    search_fields = ('identifier', 'key')
+    autocomplete_fields = ('npc_giver',)
 
     ordering = ('key',)
 
@@ -832,6 +1131,7 @@ class ItemForm(BaseModelForm):
 class WeaponTypeAdmin(BaseModelAdmin, AutoKeyMixin):
     key_prefix = WeaponType.prefix
     list_display = ('identifier', 'key', 'english_name', 'spanish_name',)
+    list_select_related = ('name',)
     ordering = ('key',)
         
     def english_name(self, obj):
@@ -905,6 +1205,9 @@ class ItemAdmin(BaseModelAdmin, AutoKeyMixin):
                     'buff_magical_damage_percent', 'buff_stamina_regeneration_percent', 
                     'nerf_physical_damage_percent', 'nerf_magical_damage_percent', 
                     'nerf_extra_physical_damage_received_percent', 'nerf_extra_magical_damage_received_percent',)
+    # rarity_name lee la rareza y su nombre; el resto de las columnas, los ItemAttributes.
+    list_select_related = ('name', 'rarity__name', 'itemattributes_item')
+    search_fields = ('identifier', 'key')
     ordering = ('key', 'type')
     list_filter = ("type",) 
     inlines = [
@@ -1363,6 +1666,7 @@ class ConditionAdmin(BaseModelAdmin, AutoKeyMixin):
     list_display = ('identifier', 'key', 'use_identifier')
     search_fields = ('identifier', 'key')
     ordering = ('key',)
+    readonly_fields = ('source_quest', 'source_role', 'source_quest_objective', 'source_dialogue')
 
     form = ConditionForm
 
@@ -1394,6 +1698,8 @@ class QuestPromptDialogueInline(admin.StackedInline):
 
     form = QuestPromptDialogueInlineForm
 
+    autocomplete_fields = ('quest',)
+
 class QuestEndDialogueInlineForm(BaseItemInlineForm):
     class Meta:
         model = QuestEnd
@@ -1408,17 +1714,25 @@ class QuestEndDialogueInline(admin.StackedInline):
 
     form = QuestEndDialogueInlineForm
 
+    autocomplete_fields = ('quest',)
+
 class RequiredItemsDialogueInline(admin.TabularInline):
     model = DialogItemsRequired
     extra = 0
 
+    autocomplete_fields = ('item',)
+
 class RemoveItemsDialogueInline(admin.TabularInline):
     model = DialogItemsToRemove
     extra = 0
 
+    autocomplete_fields = ('item',)
+
 class GiveItemsDialogueInline(admin.TabularInline):
     model = DialogItemsToGive
     extra = 0
+
+    autocomplete_fields = ('item',)
     
 class DialogueForm(BaseModelForm):
     class Meta(BaseModelForm.Meta):
@@ -1433,6 +1747,15 @@ class DialogueAdmin(BaseModelAdmin):
     search_fields = ('identifier', 'key')
     ordering = ('key',)
 
+    # Pickers por AJAX para no embeber todo el catálogo en cada página.
+    autocomplete_fields = (
+        'npc',
+        'appear_conditions',
+        'no_appear_conditions',
+        'trigger_id_conditions',
+        'trigger_diary_conditions',
+    )
+
     inlines = [
         BasicDialogueInline, 
         QuestPromptDialogueInline, 
@@ -1507,6 +1830,7 @@ class DialogueSequenceItemInline(admin.TabularInline):
 
     class Media:
         js = (
+            'admin/js/key_generator.js',
             'admin/js/get_sanitized_key.js', 
             'admin/js/dialogue_item_auto_key_inline.js', 
             'admin/js/tabularinline_items_index_autoincrement.js',
@@ -1549,6 +1873,7 @@ class DialogueSequenceAdmin(BaseModelAdmin, AutoKeyMixin):
 class DialogueSingleItemAdmin(BaseModelAdmin, AutoKeyMixin):
     key_prefix = DialogueSingleItem.prefix
     list_display = ('identifier', 'key', 'speaker', 'single_item_text_en', 'single_item_text_es')
+    list_select_related = ('text',)
     search_fields = ('identifier', 'key')
 
     ordering = ('key',)
@@ -1567,9 +1892,12 @@ class DialogueSingleItemAdmin(BaseModelAdmin, AutoKeyMixin):
 class DialogueSequenceItemAdmin(BaseModelAdmin, AutoKeyMixin):
     key_prefix = DialogueSequenceItem.prefix
     list_display = ('identifier', 'key', 'speaker', 'english_text', 'spanish_text',)
+    list_select_related = ('text',)
     search_fields = ('identifier', 'key')
 
     ordering = ('key',)
+    keyset_pagination = True
+    keyset_count_mode = CountModes.ESTIMATED
 
     form = DialogueSequenceItemForm
 
@@ -1592,6 +1920,7 @@ class DiaryEntryForm(BaseModelForm):
 class DiaryEntryAdmin(BaseModelAdmin, AutoKeyMixin):
     key_prefix = DiaryEntry.prefix
     list_display = ('identifier', 'key','english_title', 'spanish_title', 'english_text', 'spanish_text',)
+    list_select_related = ('title', 'text')
     
     ordering = ('key',)
 
@@ -1625,6 +1954,7 @@ class DiaryEntryInline(admin.TabularInline):
 
     class Media:
         js = (
+            'admin/js/key_generator.js',
             'admin/js/get_sanitized_key.js',
             'admin/js/diary_entry_auto_key_inline.js',
         )
@@ -1640,6 +1970,7 @@ class DiaryEntryInline(admin.TabularInline):
 class DiaryPageAdmin(BaseModelAdmin, AutoKeyMixin):
     key_prefix = DiaryPage.prefix
     list_display = ('identifier', 'key', 'english_name', 'spanish_name',)
+    list_select_related = ('name',)
 
     inlines = [DiaryEntryInline]
 
@@ -1667,6 +1998,7 @@ class WeaponAttackSequenceInline(admin.TabularInline):
 
     class Media:
         js = (
+            'admin/js/key_generator.js',
             'admin/js/get_sanitized_key.js', 
             'admin/js/tabularinline_weapon_attack_sequence_index_autoincrement.js',
         )
@@ -1679,6 +2011,17 @@ class WeaponAdmin(admin.ModelAdmin):
 
     def has_add_permission(self, request):
         return False
+
+    def get_queryset(self, request):
+        """
+        Trae el Item y las attack sequences ordenadas en queries fijas
+        para no consultar por cada fila del listado.
+        """
+        ordered_sequences = WeaponAttackSequence.objects.select_related('attack_sequence').order_by('index')
+
+        return super().get_queryset(request).select_related('item').prefetch_related(
+            Prefetch('weaponattacksequence_set', queryset=ordered_sequences)
+        )
     
     def identifier(self, obj):
         return obj.item.identifier
@@ -1689,11 +2032,109 @@ class WeaponAdmin(admin.ModelAdmin):
     key.short_description = "Key"
 
     def sequence(self, obj):
-        sequences = obj.weaponattacksequence_set.all().order_by("index")
+        # Ya vienen ordenadas por index desde el prefetch del get_queryset.
+        sequences = obj.weaponattacksequence_set.all()
         return " | ".join(
             [f"{seq.attack_sequence.identifier}" for seq in sequences]
         )
 
+@admin.register(ExportJob, site=custom_admin_site)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'status', 'progress_display', 'processed_rows', 'total_rows', 'duration_display', 'created_at', 'download_link')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('kind', 'status', 'total_rows', 'processed_rows', 'file_path', 'error', 'created_at', 'started_at', 'finished_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_enqueue_permission(self, request):
+        # Los jobs no se editan, así que el permiso de change es el de encolar.
+        return super().has_change_permission(request)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path("enqueue/<str:kind>/", self.admin_site.admin_view(self.enqueue_view), name="content_exportjob_enqueue"),
+            path("<int:job_id>/download/", self.admin_site.admin_view(self.download_view), name="content_exportjob_download"),
+        ]
+        return custom_urls + urls
+
+    def changelist_view(self, request, extra_context=None):
+        fail_stale_jobs()
+
+        extra_context = {
+            **(extra_context or {}),
+            'export_kinds': ExportJobKinds.choices if self.has_enqueue_permission(request) else [],
+            'has_active_jobs': ExportJob.objects.filter(status__in=[ExportJobStatuses.PENDING, ExportJobStatuses.RUNNING]).exists(),
+        }
+        return super().changelist_view(request, extra_context)
+
+    def enqueue_view(self, request, kind):
+        if request.method != 'POST' or not self.has_enqueue_permission(request):
+            raise PermissionDenied
+
+        if kind not in ExportJobKinds.values:
+            raise Http404(f"Exportación desconocida: {kind}")
+
+        job = enqueue_export(kind)
+        messages.success(request, f"Exportación encolada ({job}).")
+
+        return HttpResponseRedirect(reverse("admin:content_exportjob_changelist"))
+
+    def download_view(self, request, job_id):
+        """
+        Sirve el archivo desde disco; FileResponse usa el file wrapper del servidor
+        (sendfile) cuando está disponible, sin pasar el contenido por Python.
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        job = get_object_or_404(ExportJob, pk=job_id, status=ExportJobStatuses.DONE)
+        if not os.path.exists(job.file_path):
+            raise Http404("El archivo de la exportación ya no existe.")
+
+        date_str = job.created_at.strftime("%Y-%m-%d")
+        extension = os.path.splitext(job.file_path)[1]
+
+        return FileResponse(open(job.file_path, 'rb'), as_attachment=True, filename=f"{job.kind}_{date_str}{extension}")
+
+    def progress_display(self, obj):
+        return f"{obj.progress}%"
+    progress_display.short_description = "Progreso"
+
+    def duration_display(self, obj):
+        duration = obj.duration
+        if duration is None:
+            return "-"
+
+        return f"{duration.total_seconds():.1f} s"
+    duration_display.short_description = "Duración"
+
+    def download_link(self, obj):
+        if obj.status != ExportJobStatuses.DONE:
+            return obj.error or "-"
+
+        return format_html('<a href="{}">Descargar</a>', reverse("admin:content_exportjob_download", args=[obj.pk]))
+    download_link.short_description = "Archivo"
+
+@admin.register(KeyReservation, site=custom_admin_site)
+class KeyReservationAdmin(admin.ModelAdmin):
+    """
+    Reservas vigentes (ver key_reservations.py); se pueden borrar para liberar una key.
+    """
+    list_display = ('key', 'model', 'owner', 'expires_at')
+    list_filter = ('model',)
+    search_fields = ('key',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 # @admin.register(Consumable, site=custom_admin_site)
 # class ConsumablenAdmin(admin.ModelAdmin):
 #     def has_add_permission(self, request):
@@ -1718,8 +2159,3 @@ class WeaponAdmin(admin.ModelAdmin):
 # class QuestEndAdmin(admin.ModelAdmin):
 #     def has_add_permission(self, request):
 #         return False
-
-#TODO: Arbol de dependencias para las conditions
-# Es decir
-# Listar todas las conditions triggereadas por todos los elementos
-# y para cada condition trigereada quien la escucha
\ No newline at end of file
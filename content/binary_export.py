@@ -0,0 +1,201 @@
+"""
+Formato binario compacto para cargar los exports en runtime desde Unity.
+
+Guarda el mismo árbol que to_dict_item (dicts, listas, strings y números)
+pero sin repetir textos ni nombres de campos:
+
+    header        b"CGB1"
+    strings       count, y por cada string: largo + bytes UTF-8
+    shapes        count, y por cada shape: cantidad de campos + índice del nombre de cada campo
+    root          un valor
+
+Cada valor empieza con un byte de tipo (ver TAG_*). Los números van en registros
+de ancho fijo little-endian (int32, int64 o double), los strings son el índice en
+la tabla y los dicts son el índice de su shape seguido de los valores en ese orden.
+
+Los largos, cantidades e índices son enteros de 7 bits por byte (el mismo formato
+que BinaryReader.Read7BitEncodedInt de .NET), así en C# un string se lee con
+BinaryReader.ReadString().
+"""
+import struct
+
+MAGIC = b"CGB1"
+
+TAG_NULL = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT32 = 3
+TAG_INT64 = 4
+TAG_DOUBLE = 5
+TAG_STRING = 6
+TAG_LIST = 7
+TAG_OBJECT = 8
+
+CONTENT_TYPE = 'application/octet-stream'
+
+_int32 = struct.Struct('<i')
+_int64 = struct.Struct('<q')
+_double = struct.Struct('<d')
+
+class BinaryExportError(ValueError):
+    pass
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+class _Encoder:
+    def __init__(self):
+        self.strings = {}
+        self.shapes = {}
+
+    def string_index(self, text):
+        return self.strings.setdefault(text, len(self.strings))
+
+    def shape_index(self, keys):
+        if keys not in self.shapes:
+            self.shapes[keys] = len(self.shapes)
+            for key in keys:
+                self.string_index(key)
+
+        return self.shapes[keys]
+
+    def write_value(self, out, value):
+        # bool antes que int: True es instancia de int.
+        if value is None:
+            out.append(TAG_NULL)
+
+        elif value is True or value is False:
+            out.append(TAG_TRUE if value else TAG_FALSE)
+
+        elif isinstance(value, int):
+            if -2**31 <= value < 2**31:
+                out.append(TAG_INT32)
+                out += _int32.pack(value)
+            else:
+                out.append(TAG_INT64)
+                out += _int64.pack(value)
+
+        elif isinstance(value, float):
+            out.append(TAG_DOUBLE)
+            out += _double.pack(value)
+
+        elif isinstance(value, str):
+            out.append(TAG_STRING)
+            _write_varint(out, self.string_index(value))
+
+        elif isinstance(value, (list, tuple)):
+            out.append(TAG_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self.write_value(out, item)
+
+        elif isinstance(value, dict):
+            keys = tuple(value)
+            if not all(isinstance(key, str) for key in keys):
+                raise BinaryExportError(f"Solo se soportan dicts con keys string: {keys}")
+
+            out.append(TAG_OBJECT)
+            _write_varint(out, self.shape_index(keys))
+            for item in value.values():
+                self.write_value(out, item)
+
+        else:
+            raise BinaryExportError(f"Tipo no soportado en el export binario: {type(value).__name__}")
+
+def encode(data):
+    """
+    Devuelve los bytes del contenedor para el árbol data.
+    """
+    encoder = _Encoder()
+
+    body = bytearray()
+    encoder.write_value(body, data)
+
+    out = bytearray(MAGIC)
+
+    _write_varint(out, len(encoder.strings))
+    for text in encoder.strings:
+        encoded = text.encode('utf-8')
+        _write_varint(out, len(encoded))
+        out += encoded
+
+    _write_varint(out, len(encoder.shapes))
+    for keys in encoder.shapes:
+        _write_varint(out, len(keys))
+        for key in keys:
+            _write_varint(out, encoder.strings[key])
+
+    return bytes(out + body)
+
+class _Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.position = 0
+
+    def read(self, size):
+        if self.position + size > len(self.data):
+            raise BinaryExportError("El archivo binario está truncado.")
+
+        chunk = self.data[self.position:self.position + size]
+        self.position += size
+        return chunk
+
+    def read_varint(self):
+        result = 0
+        shift = 0
+        while True:
+            byte = self.read(1)[0]
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def read_value(self, strings, shapes):
+        tag = self.read(1)[0]
+
+        if tag == TAG_NULL:
+            return None
+        if tag == TAG_FALSE:
+            return False
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_INT32:
+            return _int32.unpack(self.read(4))[0]
+        if tag == TAG_INT64:
+            return _int64.unpack(self.read(8))[0]
+        if tag == TAG_DOUBLE:
+            return _double.unpack(self.read(8))[0]
+        if tag == TAG_STRING:
+            return strings[self.read_varint()]
+        if tag == TAG_LIST:
+            return [self.read_value(strings, shapes) for _ in range(self.read_varint())]
+        if tag == TAG_OBJECT:
+            keys = shapes[self.read_varint()]
+            return {key: self.read_value(strings, shapes) for key in keys}
+
+        raise BinaryExportError(f"Tipo desconocido en el archivo binario: {tag}")
+
+def decode(data):
+    """
+    Lector de referencia: devuelve el mismo árbol que se pasó a encode.
+    """
+    reader = _Reader(data)
+
+    if bytes(reader.read(len(MAGIC))) != MAGIC:
+        raise BinaryExportError("No es un export binario (magic inválido).")
+
+    strings = [str(reader.read(reader.read_varint()), 'utf-8') for _ in range(reader.read_varint())]
+    shapes = [
+        tuple(strings[reader.read_varint()] for _ in range(reader.read_varint()))
+        for _ in range(reader.read_varint())
+    ]
+
+    value = reader.read_value(strings, shapes)
+
+    if reader.position != len(reader.data):
+        raise BinaryExportError("Sobran bytes al final del archivo binario.")
+
+    return value
@@ -0,0 +1,315 @@
+"""
+Árbol de dependencias de las Conditions.
+
+Un elemento (Dialogue, DiaryPage, DiaryEntry, POI) depende de una condition
+si la tiene en appear_conditions / no_appear_conditions, y la dispara si la
+tiene en trigger_id_conditions / trigger_diary_conditions / trigger_conditions.
+Además el Dialogue de un QuestPrompt dispara al aceptarse la condition de
+inicio de su quest (la que crea signals.crear_quest), y cada QuestObjective
+dispara su condition por gameplay una vez iniciada la quest y completado el
+objetivo anterior (igual que en simulator.py).
+
+El grafo se arma en memoria con una query por relación y queda cacheado por
+proceso. signals.py lo invalida (m2m_changed y altas/bajas) cambiando una
+versión en la cache compartida, así que los demás procesos también lo rearman.
+"""
+from collections import deque
+from uuid import uuid4
+from django.core.cache import cache
+from .models import Condition, ConditionRoles, Dialogue, DiaryPage, DiaryEntry, POI, QuestPrompt, QuestObjective
+
+APPEAR = 'appear'
+NO_APPEAR = 'no_appear'
+
+# (modelo, campo M2M, tipo de dependencia)
+GATE_RELATIONS = [
+    (Dialogue, 'appear_conditions', APPEAR),
+    (Dialogue, 'no_appear_conditions', NO_APPEAR),
+    (DiaryPage, 'appear_conditions', APPEAR),
+    (DiaryEntry, 'appear_conditions', APPEAR),
+]
+
+# (modelo, campo M2M, tipo de trigger)
+TRIGGER_RELATIONS = [
+    (Dialogue, 'trigger_id_conditions', 'trigger_id'),
+    (Dialogue, 'trigger_diary_conditions', 'trigger_diary'),
+    (POI, 'trigger_conditions', 'trigger'),
+]
+
+# Trigger implícito: aceptar un QuestPrompt dispara el inicio de la quest.
+QUEST_ACCEPT = 'quest_accept'
+
+# Trigger implícito: el gameplay completa los objetivos de una quest.
+GAMEPLAY = 'gameplay'
+
+ELEMENT_MODELS = [Dialogue, DiaryPage, DiaryEntry, POI]
+
+def get_quest_condition_ids(role=ConditionRoles.QUEST_STARTED):
+    """
+    {pk de la quest: pk de su condition con ese rol}, por la FK y no por la key.
+    """
+    return dict(
+        Condition.objects.filter(source_role=role, source_quest__isnull=False)
+        .values_list('source_quest_id', 'id')
+    )
+
+def get_through_models():
+    return [
+        model._meta.get_field(field_name).remote_field.through
+        for model, field_name, _ in GATE_RELATIONS + TRIGGER_RELATIONS
+    ]
+
+def _relation_pairs(model, field_name):
+    """
+    (pk del elemento, pk de la condition) de una relación, en una sola query
+    sobre la tabla intermedia.
+    """
+    field = model._meta.get_field(field_name)
+    through = field.remote_field.through
+
+    return through.objects.values_list(f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id")
+
+class ConditionGraph:
+    """
+    Grafo bipartito condition <-> elemento. Los elementos se identifican
+    como (model_name, pk).
+    """
+    def __init__(self):
+        self.conditions = dict(Condition.objects.values_list('id', 'key'))
+        self.condition_ids = {key: pk for pk, key in self.conditions.items()}
+
+        self.elements = {}
+        for model in ELEMENT_MODELS:
+            model_name = model._meta.model_name
+            for pk, key in model.objects.values_list('id', 'key'):
+                self.elements[(model_name, pk)] = key
+
+        self.gates = {}         # condition -> [(elemento, tipo)]
+        self.gated_by = {}      # elemento -> [(condition, tipo)]
+        self.triggered_by = {}  # condition -> [(elemento, tipo)]
+        self.triggers = {}      # elemento -> [(condition, tipo)]
+
+        for model, field_name, kind in GATE_RELATIONS:
+            model_name = model._meta.model_name
+            for element_pk, condition_pk in _relation_pairs(model, field_name):
+                element = (model_name, element_pk)
+                self.gates.setdefault(condition_pk, []).append((element, kind))
+                self.gated_by.setdefault(element, []).append((condition_pk, kind))
+
+        for model, field_name, kind in TRIGGER_RELATIONS:
+            model_name = model._meta.model_name
+            for element_pk, condition_pk in _relation_pairs(model, field_name):
+                element = (model_name, element_pk)
+                self.triggered_by.setdefault(condition_pk, []).append((element, kind))
+                self.triggers.setdefault(element, []).append((condition_pk, kind))
+
+        self.quest_started = get_quest_condition_ids()
+
+        dialogue_model_name = Dialogue._meta.model_name
+        for dialogue_pk, quest_pk in QuestPrompt.objects.values_list('dialogue_id', 'quest_id'):
+            condition_pk = self.quest_started.get(quest_pk)
+            if condition_pk is not None:
+                element = (dialogue_model_name, dialogue_pk)
+                self.triggered_by.setdefault(condition_pk, []).append((element, QUEST_ACCEPT))
+                self.triggers.setdefault(element, []).append((condition_pk, QUEST_ACCEPT))
+
+        self._add_objectives()
+
+        self._possibly_triggered = None
+        self._downstream = {}
+        self._upstream = {}
+
+    def _add_objectives(self):
+        # Cada objetivo es un elemento que depende del inicio de la quest y del
+        # objetivo anterior, y dispara su propia condition.
+        objective_model_name = QuestObjective._meta.model_name
+        conditions = Condition.objects.filter(source_quest_objective__isnull=False).order_by(
+            'source_quest_objective__quest_id', 'source_quest_objective__index'
+        ).values_list('id', 'source_quest_objective_id', 'source_quest_objective__key', 'source_quest_objective__quest_id')
+
+        previous_quest_pk = None
+        previous_condition_pk = None
+        self.objective_conditions = set()
+
+        for condition_pk, objective_pk, objective_key, quest_pk in conditions:
+            element = (objective_model_name, objective_pk)
+            self.elements[element] = objective_key
+
+            gates = [self.quest_started.get(quest_pk)]
+            if quest_pk == previous_quest_pk:
+                gates.append(previous_condition_pk)
+
+            for gate_pk in gates:
+                if gate_pk is not None:
+                    self.gates.setdefault(gate_pk, []).append((element, APPEAR))
+                    self.gated_by.setdefault(element, []).append((gate_pk, APPEAR))
+
+            self.triggered_by.setdefault(condition_pk, []).append((element, GAMEPLAY))
+            self.triggers.setdefault(element, []).append((condition_pk, GAMEPLAY))
+            self.objective_conditions.add(condition_pk)
+
+            previous_quest_pk = quest_pk
+            previous_condition_pk = condition_pk
+
+    def get_condition_id(self, key):
+        try:
+            return self.condition_ids[key]
+        except KeyError:
+            raise Condition.DoesNotExist(f"No existe la condition {key}.")
+
+    def _element_info(self, element, kind):
+        model_name, pk = element
+        return {'model': model_name, 'id': pk, 'key': self.elements.get(element), 'kind': kind}
+
+    def who_triggers(self, key):
+        """
+        Elementos que disparan la condition.
+        """
+        condition_id = self.get_condition_id(key)
+        return [self._element_info(element, kind) for element, kind in self.triggered_by.get(condition_id, [])]
+
+    def unlocks(self, key):
+        """
+        Elementos que dependen de la condition (appear) o que bloquea (no_appear).
+        """
+        condition_id = self.get_condition_id(key)
+        return [self._element_info(element, kind) for element, kind in self.gates.get(condition_id, [])]
+
+    def _walk(self, condition_id, forward):
+        # BFS condition -> elemento -> condition. Hacia adelante: lo que puede
+        # habilitar (appear y después sus triggers); hacia atrás: lo que hace
+        # falta disparar antes (quién la dispara y de qué depende ese elemento).
+        visited = set()
+        queue = deque([condition_id])
+
+        while queue:
+            current = queue.popleft()
+
+            if forward:
+                elements = [element for element, kind in self.gates.get(current, []) if kind == APPEAR]
+                next_conditions = (c for element in elements for c, _ in self.triggers.get(element, []))
+            else:
+                elements = [element for element, _ in self.triggered_by.get(current, [])]
+                next_conditions = (c for element in elements for c, kind in self.gated_by.get(element, []) if kind == APPEAR)
+
+            for next_condition in next_conditions:
+                if next_condition not in visited and next_condition != condition_id:
+                    visited.add(next_condition)
+                    queue.append(next_condition)
+
+        return frozenset(visited)
+
+    def reachable(self, key):
+        """
+        Keys de las conditions que se pueden llegar a disparar (transitivamente)
+        a partir de que se dispare esta.
+        """
+        condition_id = self.get_condition_id(key)
+        if condition_id not in self._downstream:
+            self._downstream[condition_id] = self._walk(condition_id, forward=True)
+
+        return sorted(self.conditions[c] for c in self._downstream[condition_id])
+
+    def required(self, key):
+        """
+        Keys de las conditions de las que depende (transitivamente) que esta se dispare.
+        """
+        condition_id = self.get_condition_id(key)
+        if condition_id not in self._upstream:
+            self._upstream[condition_id] = self._walk(condition_id, forward=False)
+
+        return sorted(self.conditions[c] for c in self._upstream[condition_id])
+
+    def get_appear_conditions(self, element):
+        return {condition for condition, kind in self.gated_by.get(element, []) if kind == APPEAR}
+
+    def get_no_appear_conditions(self, element):
+        return {condition for condition, kind in self.gated_by.get(element, []) if kind == NO_APPEAR}
+
+    def possibly_triggered(self):
+        """
+        Punto fijo desde el estado inicial (ninguna condition disparada): un elemento
+        queda disponible cuando todas sus appear_conditions se pueden disparar, y
+        entonces sus triggers también. Los no_appear no se tienen en cuenta, así que
+        es una cota superior: lo que no está acá no se puede disparar nunca.
+
+        Devuelve (ids de conditions, elementos disponibles).
+        """
+        if self._possibly_triggered is not None:
+            return self._possibly_triggered
+
+        pending = {element: len(self.get_appear_conditions(element)) for element in self.elements}
+        available = {element for element, count in pending.items() if count == 0}
+        triggered = set()
+        queue = deque(available)
+
+        while queue:
+            element = queue.popleft()
+            for condition, _ in self.triggers.get(element, []):
+                if condition in triggered:
+                    continue
+
+                triggered.add(condition)
+                for gated_element, kind in self.gates.get(condition, []):
+                    if kind != APPEAR:
+                        continue
+
+                    pending[gated_element] -= 1
+                    if pending[gated_element] == 0:
+                        available.add(gated_element)
+                        queue.append(gated_element)
+
+        self._possibly_triggered = (frozenset(triggered), frozenset(available))
+        return self._possibly_triggered
+
+    def never_triggered(self):
+        """
+        Conditions de las que depende algún elemento pero que nada dispara.
+        """
+        return sorted(self.conditions[c] for c in self.gates.keys() - self.triggered_by.keys())
+
+    def never_used(self):
+        """
+        Conditions que se disparan pero de las que no depende ningún elemento.
+        """
+        return sorted(self.conditions[c] for c in self.triggered_by.keys() - self.gates.keys())
+
+    def describe(self, key):
+        return {
+            'key': key,
+            'triggered_by': self.who_triggers(key),
+            'unlocks': self.unlocks(key),
+            'reachable': self.reachable(key),
+            'required': self.required(key),
+        }
+
+# Versión del grafo en la cache compartida: cada proceso guarda su copia y la
+# vuelve a armar cuando otro proceso invalidó (cambió la versión).
+GRAPH_VERSION_CACHE_KEY = 'content_condition_graph_version'
+
+_graph = None
+_graph_version = None
+
+def get_graph_version():
+    version = cache.get(GRAPH_VERSION_CACHE_KEY)
+    if version is None:
+        # Primera vez o la entrada se perdió: cualquier copia local queda vieja.
+        cache.add(GRAPH_VERSION_CACHE_KEY, uuid4().hex, timeout=None)
+        version = cache.get(GRAPH_VERSION_CACHE_KEY)
+
+    return version
+
+def get_condition_graph():
+    global _graph, _graph_version
+
+    version = get_graph_version()
+    if _graph is None or _graph_version != version:
+        _graph = ConditionGraph()
+        _graph_version = version
+
+    return _graph
+
+def invalidate_condition_graph():
+    global _graph
+    _graph = None
+    cache.set(GRAPH_VERSION_CACHE_KEY, uuid4().hex, timeout=None)
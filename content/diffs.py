@@ -0,0 +1,172 @@
+"""
+Diff de contenido entre releases (ver snapshots.py).
+
+Cada lado se resuelve a un manifest {colección: {id: hash}}: un release guardado,
+un JSON bajado de los download-*, un dump SQLite o la base actual. La comparación
+es por hash y solo se leen del store los registros que cambiaron, así que la
+memoria depende de la cantidad de ids y no del tamaño de los registros.
+"""
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from django.conf import settings
+from .snapshots import SnapshotStore, SnapshotError, build_export_collections, snapshot_dump, get_record_id
+
+# Source especial: el contenido actual de la base.
+CURRENT_DB = '@db'
+
+SQLITE_EXTENSIONS = ('.sqlite3', '.sqlite', '.db')
+
+# Registros que se muestran en el admin; el resto se baja como JSON lines.
+DIFF_PREVIEW_LIMIT = 500
+
+def get_dumps_dir():
+    return str(getattr(settings, 'CONTENT_DUMPS_DIR', os.path.join(settings.BASE_DIR, 'databasedumps')))
+
+def get_source_choices(store=None):
+    """
+    Sources que se pueden elegir desde el admin: la base actual,
+    los releases guardados y los dumps de databasedumps/.
+    """
+    store = store or SnapshotStore()
+    choices = [(CURRENT_DB, "Base actual")]
+    choices += [(name, f"Release {name}") for name in store.list_releases()]
+
+    dumps_dir = get_dumps_dir()
+    if os.path.isdir(dumps_dir):
+        choices += [
+            (os.path.join(dumps_dir, filename), f"Dump {filename}")
+            for filename in sorted(os.listdir(dumps_dir)) if filename.lower().endswith(SQLITE_EXTENSIONS)
+        ]
+
+    return choices
+
+def _collections_from_json(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    # Los exports son {colección: [registros]}; lo que no es lista se ignora.
+    collections = {name: records for name, records in data.items() if isinstance(records, list)}
+    if not collections:
+        raise SnapshotError(f"{path} no tiene colecciones de registros.")
+
+    return collections
+
+@contextmanager
+def open_source(spec, store=None):
+    """
+    Devuelve (store, manifest) del source: CURRENT_DB, un dump SQLite,
+    un JSON de export o el nombre de un release guardado. Salvo los releases,
+    se snapshotean a un store temporal que se borra al salir.
+    """
+    is_sqlite = spec.lower().endswith(SQLITE_EXTENSIONS)
+    is_json = spec.lower().endswith('.json')
+
+    if spec != CURRENT_DB and not is_sqlite and not is_json:
+        store = store or SnapshotStore()
+        yield store, store.load_manifest(spec)
+        return
+
+    if spec != CURRENT_DB and not os.path.exists(spec):
+        raise SnapshotError(f"No existe el archivo {spec}.")
+
+    tmp_dir = tempfile.mkdtemp(prefix='content-diff-')
+    try:
+        tmp_store = SnapshotStore(tmp_dir)
+
+        if is_json:
+            manifest, _ = tmp_store.save_release('source', _collections_from_json(spec))
+
+        elif is_sqlite:
+            # El dump se lee en otro proceso: acá la base default sigue siendo la real.
+            manifest = snapshot_dump(spec, 'source', tmp_store)
+
+        else:
+            manifest, _ = tmp_store.save_release('source', build_export_collections())
+
+        yield tmp_store, manifest
+
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def _keyed_list(items):
+    """
+    {id: item} si la lista es de registros con id único, None si no.
+    """
+    if not items or not all(isinstance(item, dict) for item in items):
+        return None
+
+    keyed = {get_record_id(item): item for item in items}
+    if None in keyed or len(keyed) != len(items):
+        return None
+
+    return keyed
+
+def diff_values(old, new, path=''):
+    """
+    Cambios campo a campo como tuplas (ruta, anterior, nuevo).
+    Los dicts se comparan por campo y las listas de registros por id.
+    """
+    if old == new:
+        return
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for field_name in {**old, **new}:
+            yield from diff_values(old.get(field_name), new.get(field_name), f"{path}.{field_name}" if path else field_name)
+        return
+
+    if isinstance(old, list) and isinstance(new, list):
+        keyed_old, keyed_new = _keyed_list(old), _keyed_list(new)
+        if keyed_old is not None and keyed_new is not None:
+            for record_id in {**keyed_old, **keyed_new}:
+                yield from diff_values(keyed_old.get(record_id), keyed_new.get(record_id), f"{path}[{record_id}]")
+            return
+
+    yield path, old, new
+
+def iter_diff(source_a, source_b):
+    """
+    Genera un dict por registro agregado, borrado o cambiado entre dos
+    sources abiertos con open_source.
+    """
+    store_a, manifest_a = source_a
+    store_b, manifest_b = source_b
+    collections_a = manifest_a['collections']
+    collections_b = manifest_b['collections']
+
+    for collection in sorted(collections_a.keys() | collections_b.keys()):
+        entries_a = collections_a.get(collection, {})
+        entries_b = collections_b.get(collection, {})
+
+        for record_id in sorted(entries_a.keys() | entries_b.keys()):
+            hash_a = entries_a.get(record_id)
+            hash_b = entries_b.get(record_id)
+
+            if hash_a == hash_b:
+                continue
+
+            if hash_a is None:
+                yield {'collection': collection, 'id': record_id, 'status': 'added', 'record': store_b.get_record(hash_b)}
+
+            elif hash_b is None:
+                yield {'collection': collection, 'id': record_id, 'status': 'removed', 'record': store_a.get_record(hash_a)}
+
+            else:
+                changes = diff_values(store_a.get_record(hash_a), store_b.get_record(hash_b))
+                yield {
+                    'collection': collection,
+                    'id': record_id,
+                    'status': 'changed',
+                    'changes': [{'field': field, 'old': old, 'new': new} for field, old, new in changes],
+                }
+
+def stream_diff_jsonl(spec_a, spec_b):
+    """
+    El diff como JSON lines, abriendo los sources recién cuando se consume
+    (para un StreamingHttpResponse).
+    """
+    with open_source(spec_a) as source_a, open_source(spec_b) as source_b:
+        for entry in iter_diff(source_a, source_b):
+            yield json.dumps(entry, ensure_ascii=False) + "\n"
@@ -0,0 +1,103 @@
+"""
+Formatos de salida de los exports (?format=json|msgpack|cbor|binary).
+
+Todos reciben el mismo árbol de dicts/listas, así que cambiar de formato no
+cambia el contenido. msgpack y cbor2 están en requirements.txt; si faltan, solo
+esos formatos quedan deshabilitados.
+"""
+import json
+from . import binary_export
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+DEFAULT_FORMAT = 'json'
+
+class ExportFormatError(ValueError):
+    pass
+
+class ExportFormat:
+    name = ''
+    extension = ''
+    content_type = 'application/octet-stream'
+    # Paquete a instalar si el formato depende de una librería opcional.
+    requires = None
+
+    def __init__(self, indent=4):
+        # Solo aplica a los formatos de texto.
+        self.indent = indent
+
+    def is_available(self):
+        return True
+
+    def dumps(self, data):
+        """
+        Devuelve los bytes del export.
+        """
+        raise NotImplementedError
+
+class JsonExportFormat(ExportFormat):
+    name = 'json'
+    extension = 'json'
+    content_type = 'application/json'
+
+    def dumps(self, data):
+        return json.dumps(data, ensure_ascii=False, indent=self.indent).encode('utf-8')
+
+class MsgPackExportFormat(ExportFormat):
+    name = 'msgpack'
+    extension = 'msgpack'
+    content_type = 'application/msgpack'
+    requires = 'msgpack'
+
+    def is_available(self):
+        return msgpack is not None
+
+    def dumps(self, data):
+        return msgpack.packb(data, use_bin_type=True)
+
+class CborExportFormat(ExportFormat):
+    name = 'cbor'
+    extension = 'cbor'
+    content_type = 'application/cbor'
+    requires = 'cbor2'
+
+    def is_available(self):
+        return cbor2 is not None
+
+    def dumps(self, data):
+        return cbor2.dumps(data)
+
+class BinaryExportFormat(ExportFormat):
+    name = 'binary'
+    extension = 'bin'
+    content_type = binary_export.CONTENT_TYPE
+
+    def dumps(self, data):
+        return binary_export.encode(data)
+
+EXPORT_FORMATS = {
+    export_format.name: export_format
+    for export_format in (JsonExportFormat, MsgPackExportFormat, CborExportFormat, BinaryExportFormat)
+}
+
+def get_export_format(name=None, indent=4):
+    """
+    Instancia el formato pedido (json si no se pide ninguno).
+    """
+    export_format_class = EXPORT_FORMATS.get(name or DEFAULT_FORMAT)
+    if export_format_class is None:
+        raise ExportFormatError(f"Formato desconocido: {name}. Opciones: {', '.join(EXPORT_FORMATS)}")
+
+    export_format = export_format_class(indent=indent)
+    if not export_format.is_available():
+        raise ExportFormatError(f"El formato {export_format.name} necesita instalar {export_format.requires}.")
+
+    return export_format
@@ -0,0 +1,191 @@
+import csv
+import logging
+import os
+import shutil
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.serializers import serialize
+from django.db import connections, transaction
+from django.utils import timezone
+from .models import Localization, ExportJob, ExportJobKinds, ExportJobStatuses
+from .localizations import with_loc_table, build_table_files, build_manifest, write_tables_zip, supported_loc_tables
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántas filas se guarda el progreso del job.
+PROGRESS_STEP = 500
+
+_executor = None
+
+def get_executor():
+    """
+    Pool local de workers para las exportaciones (sin broker externo).
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'CONTENT_EXPORT_WORKERS', 2),
+            thread_name_prefix='content-export',
+        )
+
+    return _executor
+
+def get_exports_dir():
+    return getattr(settings, 'CONTENT_EXPORTS_DIR', os.path.join(settings.BASE_DIR, 'exports', 'jobs'))
+
+# Ruta fija donde el export viejo dejaba el archivo (la usan otras herramientas).
+LEGACY_EXPORT_FILES = {
+    ExportJobKinds.LOCALIZATION: 'localization.json',
+}
+
+def get_legacy_export_path(kind):
+    return os.path.join(settings.BASE_DIR, 'exports', LEGACY_EXPORT_FILES[kind])
+
+def copy_to_legacy_path(kind, path):
+    """
+    Copia el archivo del job a la ruta fija, también con .tmp y rename.
+    """
+    legacy_path = get_legacy_export_path(kind)
+    os.makedirs(os.path.dirname(legacy_path), exist_ok=True)
+    shutil.copyfile(path, legacy_path + '.tmp')
+    os.replace(legacy_path + '.tmp', legacy_path)
+
+class JobProgress:
+    """
+    Guarda en la base el avance del job cada PROGRESS_STEP filas.
+    """
+    def __init__(self, job):
+        self.job = job
+        self.processed = 0
+
+    def set_total(self, total):
+        self.job.total_rows = total
+        ExportJob.objects.filter(pk=self.job.pk).update(total_rows=total, updated_at=timezone.now())
+
+    def advance(self, rows=1):
+        self.processed += rows
+        if self.processed % PROGRESS_STEP < rows:
+            ExportJob.objects.filter(pk=self.job.pk).update(processed_rows=self.processed, updated_at=timezone.now())
+
+    def track(self, iterable):
+        for item in iterable:
+            yield item
+            self.advance()
+
+def _write_localization(path, progress):
+    queryset = Localization.objects.order_by('pk')
+    progress.set_total(queryset.count())
+
+    # Mismo formato que el export sincrónico (serialize con indent=4), pero en stream al archivo.
+    with open(path, 'w', encoding='utf-8') as f:
+        serialize(
+            'json',
+            progress.track(queryset.iterator(chunk_size=2000)),
+            indent=4,
+            stream=f,
+            fields=('identifier', 'key', 'english', 'spanish'),
+        )
+
+def _write_localization_csv(path, progress):
+    queryset = with_loc_table(Localization.objects.order_by('key'))
+    progress.set_total(queryset.count())
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Key', 'English(en)', 'Spanish(es)', 'Table'])
+        writer.writerows(progress.track(
+            queryset.values_list('key', 'english', 'spanish', 'loc_table').iterator(chunk_size=2000)
+        ))
+
+def _write_localization_tables(path, progress):
+    progress.set_total(len(supported_loc_tables))
+
+    table_files = build_table_files(Localization.objects.all())
+    manifest = build_manifest(table_files)
+    progress.advance(len(table_files))
+
+    with open(path, 'wb') as f:
+        write_tables_zip(f, table_files, manifest)
+
+# kind -> (writer, extensión del archivo)
+EXPORT_WRITERS = {
+    ExportJobKinds.LOCALIZATION: (_write_localization, 'json'),
+    ExportJobKinds.LOCALIZATION_CSV: (_write_localization_csv, 'csv'),
+    ExportJobKinds.LOCALIZATION_TABLES: (_write_localization_tables, 'zip'),
+}
+
+def run_export_job(job_id):
+    """
+    Genera el archivo del job. Se escribe a un .tmp y se renombra al terminar,
+    así nunca se sirve un archivo a medias.
+    """
+    job = ExportJob.objects.get(pk=job_id)
+    writer, extension = EXPORT_WRITERS[job.kind]
+
+    exports_dir = get_exports_dir()
+    os.makedirs(exports_dir, exist_ok=True)
+    path = os.path.join(exports_dir, f"{job.kind}_{job.pk}.{extension}")
+    tmp_path = path + '.tmp'
+
+    job.status = ExportJobStatuses.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=['status', 'started_at'])
+
+    progress = JobProgress(job)
+
+    try:
+        writer(tmp_path, progress)
+        os.replace(tmp_path, path)
+
+        if job.kind in LEGACY_EXPORT_FILES:
+            copy_to_legacy_path(job.kind, path)
+
+        job.status = ExportJobStatuses.DONE
+        job.file_path = path
+
+    except Exception as e:
+        logger.exception("Falló la exportación %s", job_id)
+        job.status = ExportJobStatuses.FAILED
+        job.error = str(e)
+
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    finally:
+        job.processed_rows = progress.processed
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'file_path', 'error', 'processed_rows', 'finished_at', 'updated_at'])
+
+        # El worker abre su propia conexión.
+        connections.close_all()
+
+def fail_stale_jobs():
+    """
+    Marca como fallidos los jobs pendientes o en curso sin avance en
+    CONTENT_EXPORT_STALE_MINUTES: el pool vive en memoria, así que un reinicio
+    los deja colgados para siempre. Devuelve cuántos marcó.
+    """
+    now = timezone.now()
+    stale_after = timedelta(minutes=getattr(settings, 'CONTENT_EXPORT_STALE_MINUTES', 30))
+
+    return ExportJob.objects.filter(
+        status__in=[ExportJobStatuses.PENDING, ExportJobStatuses.RUNNING],
+        updated_at__lt=now - stale_after,
+    ).update(
+        status=ExportJobStatuses.FAILED,
+        error="Se interrumpió (el proceso se reinició o el worker murió).",
+        finished_at=now,
+        updated_at=now,
+    )
+
+def enqueue_export(kind):
+    """
+    Crea el job y lo manda al pool cuando commitea la transacción del request.
+    """
+    fail_stale_jobs()
+    job = ExportJob.objects.create(kind=kind)
+    transaction.on_commit(lambda: get_executor().submit(run_export_job, job.pk))
+
+    return job
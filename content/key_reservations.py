@@ -0,0 +1,146 @@
+"""
+Reserva de keys antes de guardar.
+
+BaseModel.key es única, pero un choque recién aparece como IntegrityError al
+guardar (muchas veces con los inlines ya procesados). Acá las keys candidatas
+se chequean en bulk contra la tabla del modelo y contra las reservas vigentes
+de otros editores, y los choques se resuelven con un sufijo determinístico:
+la primera libre entre key, key_2, key_3...
+
+reserve_keys arranca su transacción con un DELETE (purga de reservas
+vencidas). En SQLite eso toma el lock de escritura, así que el chequeo y la
+reserva de dos editores no se pueden intercalar y no hacen falta reintentos.
+resolve_keys sola no escribe nada: las reservas vencidas se ignoran al leer.
+"""
+from collections import Counter
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.template.defaultfilters import slugify
+from django.utils import timezone
+from .models import KeyReservation
+
+RESERVATION_TTL = timedelta(minutes=30)
+
+# Largo máximo de un sufijo ("_" + número) que se tiene en cuenta al truncar.
+MAX_SUFFIX_LENGTH = 8
+
+# Cantidad de prefijos por query al buscar los sufijos ya usados.
+PREFIX_BATCH_SIZE = 200
+
+class KeyCollisionError(ValueError):
+    def __init__(self, model, keys):
+        self.model = model
+        self.keys = sorted(keys)
+        super().__init__(f"Ya existen o están reservadas ({model._meta.verbose_name}): {', '.join(self.keys)}")
+
+def _max_length(model):
+    return model._meta.get_field('key').max_length
+
+def _with_suffix(key, number, max_length):
+    if number == 1:
+        return key
+
+    suffix = f"_{number}"
+    return f"{key[:max_length - len(suffix)]}{suffix}"
+
+def suffix_collisions(candidates, taken, max_length=150):
+    """
+    Resuelve los choques con lo tomado y entre las mismas candidatas, en orden:
+    la primera que aparece se queda con la key y las demás pasan a key_2, key_3...
+    """
+    taken = set(taken)
+    keys = []
+
+    for candidate in candidates:
+        number = 1
+        key = candidate
+        while key in taken:
+            number += 1
+            key = _with_suffix(candidate, number, max_length)
+
+        taken.add(key)
+        keys.append(key)
+
+    return keys
+
+def _taken_keys(model, keys, owner, now, prefix=False, reserved=True):
+    # Keys de la tabla del modelo más (si reserved) las reservadas vigentes por otros.
+    if prefix:
+        key_filter = Q()
+        for key in keys:
+            key_filter |= Q(key__startswith=key)
+    else:
+        key_filter = Q(key__in=keys)
+
+    taken = set(model.objects.filter(key_filter).values_list('key', flat=True))
+    if not reserved:
+        return taken
+
+    taken.update(
+        KeyReservation.objects
+        .filter(key_filter, model=model._meta.label_lower, expires_at__gt=now)
+        .exclude(owner=owner)
+        .values_list('key', flat=True)
+    )
+
+    return taken
+
+def resolve_keys(model, candidates, owner="", suffix=True, reserved=True):
+    """
+    Keys finales para las candidatas (slugificadas como en BaseModel.save), en el
+    mismo orden. Con suffix=False no se renombra nada y se levanta KeyCollisionError
+    si alguna ya existe, está reservada por otro o está repetida. Con reserved=False
+    las reservas no cuentan (solo se evita chocar con la tabla).
+
+    Hay que llamarla dentro de la transacción que después guarda las filas.
+    """
+    candidates = [slugify(candidate) for candidate in candidates]
+    if not candidates:
+        return []
+
+    now = timezone.now()
+    taken = _taken_keys(model, set(candidates), owner, now, reserved=reserved)
+    repeated = {key for key, count in Counter(candidates).items() if count > 1}
+
+    if not taken and not repeated:
+        return candidates
+
+    if not suffix:
+        raise KeyCollisionError(model, taken | repeated)
+
+    # Solo para las que chocan se traen los sufijos que ya están usados.
+    max_length = _max_length(model)
+    prefixes = sorted({key[:max_length - MAX_SUFFIX_LENGTH] for key in taken | repeated})
+    for start in range(0, len(prefixes), PREFIX_BATCH_SIZE):
+        taken |= _taken_keys(model, prefixes[start:start + PREFIX_BATCH_SIZE], owner, now, prefix=True, reserved=reserved)
+
+    return suffix_collisions(candidates, taken, max_length)
+
+def reserve_keys(model, candidates, owner, suffix=True, ttl=RESERVATION_TTL):
+    """
+    resolve_keys más la reserva de las keys a nombre de owner hasta que venzan,
+    para que ningún otro editor o import las tome mientras tanto.
+    """
+    with transaction.atomic():
+        # El DELETE toma el lock de escritura antes de leer (ver el docstring del módulo).
+        KeyReservation.objects.filter(expires_at__lte=timezone.now()).delete()
+        keys = resolve_keys(model, candidates, owner=owner, suffix=suffix)
+
+        model_label = model._meta.label_lower
+        expires_at = timezone.now() + ttl
+
+        # Las que ya eran de owner solo se renuevan.
+        KeyReservation.objects.filter(model=model_label, owner=owner, key__in=keys).update(expires_at=expires_at)
+        KeyReservation.objects.bulk_create(
+            [KeyReservation(model=model_label, key=key, owner=owner, expires_at=expires_at) for key in dict.fromkeys(keys)],
+            ignore_conflicts=True,
+        )
+
+    return keys
+
+def consume_reservation(model, key):
+    """
+    La fila ya se guardó con esa key: la reserva (de quien sea) sobra.
+    """
+    KeyReservation.objects.filter(model=model._meta.label_lower, key=key).delete()
@@ -0,0 +1,522 @@
+import csv
+import hashlib
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from django.db import connections, transaction
+from django.core.cache import cache
+from django.db.models import Case, When, Value, CharField, Count, F, Q
+from .models import Localization, PLACEHOLDER_PREFIX
+from .translation_memory import update_text_hashes, get_hash_field_names
+from .export_formats import get_export_format
+
+# Tablas de localización de Unity y los prefijos de key que van a cada una.
+supported_loc_tables = [
+    {
+        'localization_id': 'Chapters',
+        'models': [
+            'loc_diarypage_',
+            'loc_diaryentry_',
+        ],
+    },
+    {
+        'localization_id': 'Dialogues',
+        'models': [
+            'loc_dialogue_',
+            'loc_dialoguesequenceitem_',
+            'loc_dialoguesingleitem_',
+        ],
+    },
+    {
+        'localization_id': 'Items_Armor',
+        'models': ['loc_item_equipment_'],
+    },
+    {
+        'localization_id': 'Items_Consumables',
+        'models': ['loc_item_consumable_'],
+    },
+    {
+        'localization_id': 'Items_Key',
+        'models': ['loc_item_quest_item_'],
+    },
+    {
+        'localization_id': 'Items_Weapons',
+        'models': ['loc_item_weapon_'],
+    },
+    {
+        'localization_id': 'NPCs',
+        'models': ['loc_npc_'],
+    },
+    {
+        'localization_id': 'Quests',
+        'models': [
+            'loc_quest_',
+            'loc_questobjective_',
+        ],
+    },
+]
+
+# (prefijo, tabla) en el mismo orden en que se evaluaban los prefijos.
+_prefix_routes = [
+    (prefix, table['localization_id'])
+    for table in supported_loc_tables
+    for prefix in table['models']
+]
+
+def table_case_expression(default=None):
+    """
+    Tabla de Unity de cada Localization como CASE en SQL sobre la key: gana el
+    primer prefijo de _prefix_routes que coincide. Es el único ruteo de keys a tablas.
+    """
+    return Case(
+        *[When(key__istartswith=prefix, then=Value(table)) for prefix, table in _prefix_routes],
+        default=default,
+        output_field=CharField(),
+    )
+
+def with_loc_table(queryset, field_name='loc_table'):
+    """
+    Anota la tabla de cada Localization y descarta en la base las que no tienen.
+    """
+    return queryset.annotate(**{field_name: table_case_expression()}).filter(**{f"{field_name}__isnull": False})
+
+def get_owner_relations():
+    """
+    Relaciones inversas OneToOne de Localization (una por cada LocalizedField).
+    """
+    return [rel for rel in Localization._meta.related_objects if rel.one_to_one]
+
+def get_owner_model_names(queryset):
+    """
+    Nombres de los modelos dueños de las Localizations del queryset,
+    resuelto con un único aggregate en vez de consultar fila por fila.
+    """
+    relations = get_owner_relations()
+    counts = queryset.order_by().aggregate(**{
+        f"owner_{index}": Count(rel.name) for index, rel in enumerate(relations)
+    })
+
+    return sorted({
+        rel.related_model._meta.model_name
+        for index, rel in enumerate(relations) if counts[f"owner_{index}"]
+    })
+
+class _Echo:
+    """
+    Pseudo buffer para csv.writer: devuelve la línea en vez de guardarla.
+    """
+    def write(self, value):
+        return value
+
+def stream_csv(header, rows):
+    """
+    Genera el CSV línea por línea para un StreamingHttpResponse.
+    """
+    writer = csv.writer(_Echo())
+
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+def get_table_entries(queryset, table_id):
+    """
+    Entradas de una sola tabla, ordenadas por key para que el contenido
+    (y su hash) solo cambie si cambian los textos.
+    """
+    rows = (
+        with_loc_table(queryset)
+        .filter(loc_table=table_id)
+        .order_by('key')
+        .values_list('key', 'english', 'spanish')
+    )
+
+    return [
+        {
+            "Key": key,
+            "English": english,
+            "Spanish": spanish,
+            "Table": table_id
+        }
+        for key, english, spanish in rows.iterator(chunk_size=2000)
+    ]
+
+def dedup_entries(entries):
+    """
+    Formato opcional con cada texto una sola vez: "strings" guarda los textos
+    distintos y English/Spanish de cada entrada pasan a ser índices en esa lista.
+    """
+    strings = {}
+
+    def index(text):
+        return strings.setdefault(text, len(strings))
+
+    entries = [
+        {**entry, "English": index(entry["English"]), "Spanish": index(entry["Spanish"])}
+        for entry in entries
+    ]
+
+    return {"strings": list(strings), "entries": entries}
+
+def _build_table_file(queryset, table_id, dedup, export_format):
+    try:
+        entries = get_table_entries(queryset, table_id)
+        data = dedup_entries(entries) if dedup else {"entries": entries}
+        return table_id, export_format.dumps(data), len(entries)
+
+    finally:
+        # Cada thread abre su propia conexión.
+        connections.close_all()
+
+def build_table_files(queryset, max_workers=None, dedup=False, export_format=None):
+    """
+    Genera en paralelo un archivo por tabla de supported_loc_tables, en JSON
+    salvo que se pase otro export_format (con dedup los textos repetidos se
+    guardan una sola vez, ver dedup_entries).
+
+    Devuelve {localization_id: (contenido, cantidad de entradas)}.
+    """
+    table_ids = [table['localization_id'] for table in supported_loc_tables]
+    export_format = export_format or get_export_format(indent=2)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(table_ids)) as executor:
+        results = executor.map(lambda table_id: _build_table_file(queryset, table_id, dedup, export_format), table_ids)
+        return {table_id: (content, count) for table_id, content, count in results}
+
+def get_table_filename(table_id, extension='json'):
+    return f"{table_id}.{extension}"
+
+def build_manifest(table_files, extension='json'):
+    """
+    Manifest con el hash de contenido de cada tabla, para que Unity
+    reimporte solo las string tables que cambiaron.
+    """
+    return {
+        "generated_at": datetime.now().isoformat(timespec='seconds'),
+        "tables": {
+            table_id: {
+                "file": get_table_filename(table_id, extension),
+                "sha256": hashlib.sha256(content).hexdigest(),
+                "entries": count,
+            }
+            for table_id, (content, count) in table_files.items()
+        }
+    }
+
+def write_tables_zip(file_obj, table_files, manifest):
+    """
+    Escribe en file_obj el ZIP con una tabla por archivo y el manifest.json.
+    """
+    with zipfile.ZipFile(file_obj, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for table_id, (content, count) in table_files.items():
+            zip_file.writestr(manifest['tables'][table_id]['file'], content)
+
+        zip_file.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+
+def iter_csv_rows(text_stream):
+    """
+    Lee el CSV de export_csv / export_all_csv (Key, English(en), Spanish(es)[, Table])
+    fila por fila y devuelve tuplas (key, english, spanish).
+    """
+    reader = csv.reader(text_stream)
+
+    for row in reader:
+        if not row or row[0].strip() in ('', 'Key'):
+            continue
+
+        row = row + [''] * (3 - len(row))
+        yield row[0].strip(), row[1], row[2]
+
+# Tamaño de cada lectura del parser incremental de JSON.
+JSON_CHUNK_SIZE = 64 * 1024
+
+class _JSONStream:
+    """
+    Lector incremental sobre un stream de texto: decodifica valores JSON de a
+    uno con raw_decode y solo guarda en memoria el valor que se está leyendo.
+    """
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, text_stream):
+        self.text_stream = text_stream
+        self.chunk_size = JSON_CHUNK_SIZE
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        chunk = self.text_stream.read(self.chunk_size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def peek(self):
+        """
+        Próximo caracter que no es espacio ('' al final del stream).
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+
+            self._read()
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"JSON inválido: se esperaba {' o '.join(chars)} y vino {char or 'el fin del archivo'}.")
+
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+                # Un número cortado por el chunk ("1." de "1.5") también decodifica:
+                # solo vale si después viene un separador o el fin del stream.
+                is_number = self.buffer[self.pos] in '-0123456789'
+                if self.eof or (end < len(self.buffer) and (not is_number or self.buffer[end] in ' \t\r\n,]}')):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+
+            self._read()
+
+    def items(self):
+        """
+        Elementos del array que empieza en la posición actual, de a uno.
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+def iter_json_rows(text_stream):
+    """
+    Lee el JSON de export_all_json ({"entries": [{"Key", "English", "Spanish"}]},
+    o directamente la lista) y devuelve tuplas (key, english, spanish).
+
+    Se parsea en stream: en memoria queda una entrada por vez, no el archivo.
+    Las demás claves del objeto raíz se leen y se descartan.
+    """
+    stream = _JSONStream(text_stream)
+
+    if stream.peek() == '[':
+        entries = stream.items()
+    else:
+        entries = iter(())
+        stream.expect('{')
+        if stream.peek() != '}':
+            while True:
+                key = stream.value()
+                stream.expect(':')
+                if key == 'entries':
+                    entries = stream.items()
+                    break
+
+                stream.value()
+                if stream.expect(',}') == '}':
+                    break
+
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError(f"Cada entrada tiene que ser un objeto, no {type(entry).__name__}.")
+
+        yield entry['Key'].strip(), entry.get('English', ''), entry.get('Spanish', '')
+
+def iter_import_rows(text_stream, file_format):
+    if file_format == 'json':
+        return iter_json_rows(text_stream)
+
+    return iter_csv_rows(text_stream)
+
+class LocalizationImportReport:
+    """
+    Resultado de una importación: keys actualizadas (con los campos que cambian),
+    keys sin cambios, keys que no existen y keys repetidas en el archivo.
+    """
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.updated = []  # (key, {campo: (anterior, nuevo)})
+        self.unchanged = 0
+        self.missing = []
+        self.duplicated = []
+
+    @property
+    def total(self):
+        return len(self.updated) + self.unchanged + len(self.missing)
+
+    def summary(self):
+        prefix = "[DRY RUN] " if self.dry_run else ""
+        return (
+            f"{prefix}{len(self.updated)} actualizadas, {self.unchanged} sin cambios, "
+            f"{len(self.missing)} keys inexistentes, {len(self.duplicated)} keys repetidas."
+        )
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+def import_localizations(rows, dry_run=False, batch_size=1000):
+    """
+    Aplica las traducciones (key, english, spanish) sobre las Localizations existentes.
+
+    Se compara contra la base por lotes de keys y los cambios se guardan con
+    bulk_update en una sola transacción. Las celdas vacías no pisan el texto actual
+    y las keys que no existen no se crean (las crean los modelos dueños).
+    """
+    report = LocalizationImportReport(dry_run)
+    changed = []
+    seen = set()
+
+    for batch in _batched(rows, batch_size):
+        existing = {
+            loc.key: loc
+            for loc in Localization.objects.filter(key__in=[key for key, _, _ in batch]).only('id', 'key', 'english', 'spanish', *get_hash_field_names())
+        }
+
+        for key, english, spanish in batch:
+            if key in seen:
+                report.duplicated.append(key)
+                continue
+            seen.add(key)
+
+            loc = existing.get(key)
+            if loc is None:
+                report.missing.append(key)
+                continue
+
+            changes = {}
+            for field_name, value in (('english', english), ('spanish', spanish)):
+                if value and value != getattr(loc, field_name):
+                    changes[field_name] = (getattr(loc, field_name), value)
+                    setattr(loc, field_name, value)
+
+            if changes:
+                update_text_hashes(loc)
+                report.updated.append((key, changes))
+                changed.append(loc)
+            else:
+                report.unchanged += 1
+
+    if changed and not dry_run:
+        with transaction.atomic():
+            Localization.objects.bulk_update(changed, ['english', 'spanish', *get_hash_field_names()], batch_size=batch_size)
+
+        # bulk_update no dispara post_save.
+        invalidate_translation_report()
+
+    return report
+
+# Sube con cada cambio de formato del reporte, así no se lee uno viejo de la cache.
+TRANSLATION_REPORT_CACHE_KEY = 'content_translation_report:2'
+
+# Keys de ejemplo por estado en el reporte; el resto se ve en el changelist filtrado.
+REPORT_SAMPLE_SIZE = 50
+
+NO_TABLE = ''
+
+def owner_case_expression():
+    """
+    Modelo dueño de cada Localization como CASE sobre sus relaciones inversas.
+    """
+    return Case(
+        *[
+            When(**{f"{rel.name}__isnull": False}, then=Value(rel.related_model._meta.model_name))
+            for rel in get_owner_relations()
+        ],
+        default=Value(''),
+        output_field=CharField(),
+    )
+
+def _is_empty(field_name):
+    return Q(**{f"{field_name}__isnull": True}) | Q(**{field_name: ''})
+
+TRANSLATION_STATUS_LABELS = {
+    'missing': "Faltantes",
+    'placeholder': "Con placeholder",
+    'identical': "EN = ES",
+}
+
+def translation_status_filters():
+    """
+    Condiciones de cada estado de traducción incompleta.
+    """
+    missing = _is_empty('english') | _is_empty('spanish')
+    placeholder = Q(english__startswith=PLACEHOLDER_PREFIX) | Q(spanish__startswith=PLACEHOLDER_PREFIX)
+    identical = Q(english=F('spanish')) & ~missing
+
+    return {
+        'missing': missing,
+        'placeholder': placeholder,
+        'identical': identical,
+    }
+
+def build_translation_report():
+    """
+    Cantidades por tabla de Unity y modelo dueño de las traducciones
+    faltantes, con placeholder o con EN == ES, y las primeras
+    REPORT_SAMPLE_SIZE keys de cada caso. Una query agrupada y una acotada
+    por estado, así el tamaño no depende de cuántas filas haya pendientes.
+    """
+    status_filters = translation_status_filters()
+
+    annotated = Localization.objects.order_by().annotate(
+        loc_table=table_case_expression(default=Value(NO_TABLE)),
+        owner=owner_case_expression(),
+    )
+
+    groups = list(
+        annotated
+        .values('loc_table', 'owner')
+        .annotate(
+            total=Count('id'),
+            **{status: Count('id', filter=condition) for status, condition in status_filters.items()}
+        )
+        .order_by('loc_table', 'owner')
+    )
+
+    samples = {
+        status: list(annotated.filter(condition).order_by('key').values('id', 'key', 'loc_table', 'owner')[:REPORT_SAMPLE_SIZE])
+        for status, condition in status_filters.items()
+    }
+
+    totals = {
+        field_name: sum(group[field_name] for group in groups)
+        for field_name in ('total', *status_filters)
+    }
+
+    return {
+        'groups': groups,
+        'totals': totals,
+        'samples': samples,
+    }
+
+def get_translation_report():
+    """
+    Reporte cacheado en la cache compartida (ver CACHES en settings); se
+    invalida al confirmar cambios en Localization, así que llega a todos los
+    procesos.
+    """
+    return cache.get_or_set(TRANSLATION_REPORT_CACHE_KEY, build_translation_report, timeout=None)
+
+def invalidate_translation_report():
+    cache.delete(TRANSLATION_REPORT_CACHE_KEY)
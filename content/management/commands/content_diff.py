@@ -0,0 +1,48 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from content.diffs import CURRENT_DB, open_source, iter_diff
+from content.snapshots import SnapshotError
+
+class Command(BaseCommand):
+    help = (
+        'Compara el contenido de dos releases guardados, JSONs de export o dumps SQLite '
+        f'({CURRENT_DB} es la base actual) y lista los registros agregados, borrados y cambiados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source_a')
+        parser.add_argument('source_b')
+        parser.add_argument('--collection', action='append', default=[], help='Solo estas colecciones (se puede repetir).')
+        parser.add_argument('--jsonl', action='store_true', help='Un JSON por línea en vez de texto.')
+
+    def handle(self, *args, **options):
+        collections = set(options['collection'])
+        counts = {'added': 0, 'removed': 0, 'changed': 0}
+
+        try:
+            with open_source(options['source_a']) as source_a, open_source(options['source_b']) as source_b:
+                for entry in iter_diff(source_a, source_b):
+                    if collections and entry['collection'] not in collections:
+                        continue
+
+                    counts[entry['status']] += 1
+                    self.write_entry(entry, options['jsonl'])
+
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        if not options['jsonl']:
+            self.stdout.write(self.style.SUCCESS(
+                f"{counts['added']} agregados, {counts['removed']} borrados, {counts['changed']} cambiados."
+            ))
+
+    def write_entry(self, entry, as_jsonl):
+        if as_jsonl:
+            self.stdout.write(json.dumps(entry, ensure_ascii=False))
+            return
+
+        symbol = {'added': '+', 'removed': '-', 'changed': '~'}[entry['status']]
+        self.stdout.write(f"{symbol} {entry['collection']} {entry['id']}")
+
+        for change in entry.get('changes', []):
+            self.stdout.write(f"    {change['field']}: {change['old']!r} -> {change['new']!r}")
@@ -0,0 +1,30 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from content.utils import get_key_spec
+
+def get_key_spec_path():
+    return settings.BASE_DIR / "static" / "admin" / "js" / "key_spec.json"
+
+def dump_key_spec():
+    return json.dumps(get_key_spec(), indent=2) + "\n"
+
+class Command(BaseCommand):
+    help = 'Exporta la spec de los KeyGenerators de content/utils.py a static/admin/js/key_spec.json (la usa key_generator.js).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Solo verifica que el archivo esté actualizado.')
+
+    def handle(self, *args, **options):
+        path = get_key_spec_path()
+        content = dump_key_spec()
+
+        if options['check']:
+            if not path.exists() or path.read_text(encoding='utf-8') != content:
+                raise CommandError(f"{path} está desactualizado: correr export_key_spec.")
+
+            self.stdout.write(self.style.SUCCESS(f"{path} está actualizado."))
+            return
+
+        path.write_text(content, encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f"Spec exportada a {path}."))
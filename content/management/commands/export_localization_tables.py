@@ -0,0 +1,64 @@
+import json
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from content.models import Localization
+from content.localizations import build_table_files, build_manifest
+from content.export_formats import EXPORT_FORMATS, ExportFormatError, get_export_format
+
+class Command(BaseCommand):
+    help = 'Exporta un JSON por string table de Unity y un manifest.json con el hash de cada tabla.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=os.path.join(settings.BASE_DIR, 'exports', 'localization_tables'),
+            help='Carpeta destino de las tablas y el manifest.',
+        )
+        parser.add_argument(
+            '--dedup',
+            action='store_true',
+            help='Guarda cada texto repetido una sola vez ("strings" + índices en cada entrada).',
+        )
+        parser.add_argument(
+            '--format',
+            choices=list(EXPORT_FORMATS),
+            default='json',
+            help='Formato de cada tabla (el manifest siempre es JSON).',
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        os.makedirs(output, exist_ok=True)
+
+        manifest_path = os.path.join(output, 'manifest.json')
+        previous_tables = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                previous_tables = json.load(f).get('tables', {})
+
+        try:
+            export_format = get_export_format(options['format'], indent=2)
+        except ExportFormatError as e:
+            raise CommandError(str(e))
+
+        table_files = build_table_files(Localization.objects.all(), dedup=options['dedup'], export_format=export_format)
+        manifest = build_manifest(table_files, export_format.extension)
+
+        for table_id, (content, count) in table_files.items():
+            table_hash = manifest['tables'][table_id]['sha256']
+
+            # Solo se reescriben las tablas que cambiaron.
+            if previous_tables.get(table_id, {}).get('sha256') == table_hash:
+                self.stdout.write(f"{table_id}: sin cambios ({count} entradas)")
+                continue
+
+            with open(os.path.join(output, manifest['tables'][table_id]['file']), 'wb') as f:
+                f.write(content)
+
+            self.stdout.write(f"{table_id}: actualizada ({count} entradas)")
+
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(f'Tablas exportadas en {output}'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from content.localizations import iter_import_rows, import_localizations
+
+class Command(BaseCommand):
+    help = 'Importa traducciones desde el CSV/JSON exportado de Localizations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='CSV (Key, English(en), Spanish(es)) o JSON ({"entries": [...]}).')
+        parser.add_argument('--dry-run', action='store_true', help='Solo muestra el reporte, no guarda cambios.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['file']
+        file_format = 'json' if path.lower().endswith('.json') else 'csv'
+
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                report = import_localizations(
+                    iter_import_rows(f, file_format),
+                    dry_run=options['dry_run'],
+                    batch_size=options['batch_size'],
+                )
+
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"No se pudo importar {path}: {e}")
+
+        for key, changes in report.updated:
+            for field_name, (old_value, new_value) in changes.items():
+                self.stdout.write(f"{key} [{field_name}]: {old_value!r} -> {new_value!r}")
+
+        for key in report.missing:
+            self.stdout.write(self.style.WARNING(f"Key inexistente: {key}"))
+
+        for key in report.duplicated:
+            self.stdout.write(self.style.WARNING(f"Key repetida: {key}"))
+
+        self.stdout.write(self.style.SUCCESS(report.summary()))
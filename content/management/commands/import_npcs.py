@@ -0,0 +1,24 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from content.scaffolding import create_npcs, iter_npc_rows
+
+class Command(BaseCommand):
+    help = 'Crea NPCs en bloque con sus first talks desde un CSV (identifier, name_en, name_es) o JSON ({"npcs": [...]}).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--suffix-conflicts', action='store_true', help='Renombra las keys que ya existen a key_2, key_3... en vez de fallar.')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        file_format = 'json' if path.lower().endswith('.json') else 'csv'
+
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                npcs = create_npcs(iter_npc_rows(f, file_format), batch_size=options['batch_size'], suffix_conflicts=options['suffix_conflicts'])
+
+        except (OSError, ValueError, KeyError, csv.Error) as e:
+            raise CommandError(f"No se pudo importar {path}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(npcs)} NPCs creados."))
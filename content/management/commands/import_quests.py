@@ -0,0 +1,36 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from content.models import NPC
+from content.scaffolding import create_quests
+
+class Command(BaseCommand):
+    help = 'Crea quests en bloque desde un CSV (identifier, npc, title_en, title_es, brief_en, brief_es[, money_reward, ability_points_reward]).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--suffix-conflicts', action='store_true', help='Renombra las keys que ya existen a key_2, key_3... en vez de fallar.')
+
+    def handle(self, *args, **options):
+        path = options['file']
+
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                rows = [
+                    {
+                        'identifier': row['identifier'],
+                        'npc': row['npc'],
+                        'title': {'english': row['title_en'], 'spanish': row['title_es']},
+                        'brief': {'english': row['brief_en'], 'spanish': row['brief_es']},
+                        'money_reward': int(row.get('money_reward') or 0),
+                        'ability_points_reward': int(row.get('ability_points_reward') or 0),
+                    }
+                    for row in csv.DictReader(f)
+                ]
+
+            quests = create_quests(rows, batch_size=options['batch_size'], suffix_conflicts=options['suffix_conflicts'])
+
+        except (OSError, ValueError, KeyError, NPC.DoesNotExist) as e:
+            raise CommandError(f"No se pudo importar {path}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(quests)} quests creadas."))
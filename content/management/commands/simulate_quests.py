@@ -0,0 +1,48 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from content.simulator import DEFAULT_MAX_STATES, simulate
+
+class Command(BaseCommand):
+    help = 'Explora los estados alcanzables del juego y reporta quests inalcanzables y soft-locks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-states', type=int, default=DEFAULT_MAX_STATES, help='Tope de estados a explorar.')
+        parser.add_argument('--strict', action='store_true', help='Falla si hay quests que no se pueden terminar o soft-locks.')
+        parser.add_argument('--json', action='store_true', help='Salida en JSON.')
+
+    def handle(self, *args, **options):
+        result = simulate(max_states=options['max_states'])
+        report = result.quest_report()
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'states': len(result.states),
+                'truncated': result.truncated,
+                'quests': report,
+            }, ensure_ascii=False, indent=2))
+
+        else:
+            for entry in report:
+                if entry['draft']:
+                    self.stdout.write(self.style.WARNING(f"{entry['quest']}: borrador, no tiene QuestPrompt ni QuestEnd."))
+                elif not entry['startable']:
+                    self.stdout.write(self.style.ERROR(f"{entry['quest']}: no se puede iniciar."))
+                elif not entry['completable']:
+                    self.stdout.write(self.style.ERROR(f"{entry['quest']}: no se puede terminar."))
+                elif entry['soft_locks']:
+                    example = entry['soft_lock_example']
+                    self.stdout.write(self.style.WARNING(
+                        f"{entry['quest']}: {entry['soft_locks']} estados sin salida. Ejemplo: {' -> '.join(example['path'])}"
+                    ))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"{entry['quest']}: OK"))
+
+        summary = f"{len(result.states)} estados en {result.elapsed:.2f}s ({result.states_per_second:.0f}/s)."
+        if result.truncated:
+            summary += f" Se cortó en {options['max_states']} estados: los soft-locks no se calcularon."
+
+        failed = [entry for entry in report if not entry['draft'] and (not entry['completable'] or entry['soft_locks'])]
+        if options['strict'] and failed:
+            raise CommandError(f"{len(failed)} quests con problemas. {summary}")
+
+        self.stderr.write(summary)
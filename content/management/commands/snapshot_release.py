@@ -0,0 +1,52 @@
+from contextlib import nullcontext
+from django.core.management.base import BaseCommand, CommandError
+from content.snapshots import SnapshotStore, SnapshotError, snapshot_release, use_sqlite_dump, compare_manifests
+
+class Command(BaseCommand):
+    help = 'Guarda un snapshot de los exports del release (cada registro una sola vez, por hash).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help='Nombre del release, p. ej. closed_beta_01_10_25.')
+        parser.add_argument(
+            '--from-dump',
+            help='Dump SQLite del que sacar el contenido en vez de la base actual (p. ej. databasedumps/...).',
+        )
+        parser.add_argument('--store', help='Directorio del store (por defecto CONTENT_SNAPSHOTS_DIR).')
+        parser.add_argument('--list', action='store_true', help='Lista los releases guardados.')
+        parser.add_argument(
+            '--compare',
+            metavar='RELEASE',
+            help='Después del snapshot muestra los ids agregados, borrados y cambiados respecto de RELEASE.',
+        )
+
+    def handle(self, *args, **options):
+        store = SnapshotStore(options['store'])
+
+        if options['list']:
+            for name in store.list_releases():
+                self.stdout.write(name)
+            return
+
+        name = options['name']
+        if not name:
+            raise CommandError("Falta el nombre del release.")
+
+        try:
+            source = use_sqlite_dump(options['from_dump']) if options['from_dump'] else nullcontext()
+            with source:
+                manifest, written = snapshot_release(name, store)
+
+            records = sum(len(entries) for entries in manifest['collections'].values())
+            self.stdout.write(self.style.SUCCESS(
+                f"Release {name}: {records} registros, {written} nuevos en {store.root}"
+            ))
+
+            if options['compare']:
+                changes = compare_manifests(store.load_manifest(options['compare']), manifest)
+                for collection, result in changes.items():
+                    self.stdout.write(
+                        f"{collection}: +{len(result['added'])} -{len(result['removed'])} ~{len(result['changed'])}"
+                    )
+
+        except SnapshotError as e:
+            raise CommandError(str(e))
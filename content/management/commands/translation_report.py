@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from content.localizations import get_translation_report
+
+class Command(BaseCommand):
+    help = 'Muestra las traducciones faltantes, con placeholder o iguales en EN y ES por tabla y modelo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--list',
+            choices=['missing', 'placeholder', 'identical'],
+            action='append',
+            default=[],
+            help='Lista las keys del estado indicado (se puede repetir).',
+        )
+
+    def handle(self, *args, **options):
+        report = get_translation_report()
+
+        self.stdout.write(f"{'Tabla':<20}{'Modelo':<25}{'Total':>8}{'Faltan':>8}{'Placeh.':>8}{'EN=ES':>8}")
+        for group in report['groups']:
+            self.stdout.write(
+                f"{group['loc_table'] or '(sin tabla)':<20}{group['owner'] or '(sin dueño)':<25}"
+                f"{group['total']:>8}{group['missing']:>8}{group['placeholder']:>8}{group['identical']:>8}"
+            )
+
+        totals = report['totals']
+        self.stdout.write(
+            f"{'Total':<45}{totals['total']:>8}{totals['missing']:>8}{totals['placeholder']:>8}{totals['identical']:>8}"
+        )
+
+        for status in options['list']:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{status}:"))
+            for row in report['keys'][status]:
+                self.stdout.write(row['key'])
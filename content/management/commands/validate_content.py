@@ -0,0 +1,32 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from content.validation import ERROR, validate_fresh
+
+class Command(BaseCommand):
+    help = 'Valida el flujo de quests y conditions (conditions inalcanzables, contradictorias o sin uso).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strict', action='store_true', help='Falla también con warnings.')
+        parser.add_argument('--json', action='store_true', help='Salida en JSON.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        issues = validate_fresh()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if options['json']:
+            self.stdout.write(json.dumps([issue.to_dict() for issue in issues], ensure_ascii=False, indent=2))
+        else:
+            for issue in issues:
+                style = self.style.ERROR if issue.severity == ERROR else self.style.WARNING
+                self.stdout.write(style(str(issue)))
+
+        errors = sum(issue.severity == ERROR for issue in issues)
+        warnings = len(issues) - errors
+        summary = f"{errors} errores, {warnings} warnings ({elapsed_ms:.0f} ms)."
+
+        if errors or (options['strict'] and warnings):
+            raise CommandError(summary)
+
+        self.stderr.write(summary)
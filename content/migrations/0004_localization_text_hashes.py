@@ -0,0 +1,81 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:21
+
+import hashlib
+import re
+import unicodedata
+from django.db import migrations, models
+
+# Copia de la normalización de content/translation_memory.py al momento de esta
+# migración: no se importa el módulo porque usa los modelos actuales.
+HASH_FIELDS = {
+    'english': ('english_hash', 'english_loose_hash'),
+    'spanish': ('spanish_hash', 'spanish_loose_hash'),
+}
+
+_whitespace = re.compile(r"\s+")
+_punctuation = re.compile(r"[^\w\s]")
+
+
+def normalize_text(text):
+    text = unicodedata.normalize('NFKC', text or '')
+    return _whitespace.sub(' ', text.casefold()).strip()
+
+
+def loose_normalize_text(text):
+    text = unicodedata.normalize('NFKD', normalize_text(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _whitespace.sub(' ', _punctuation.sub(' ', text)).strip()
+
+
+def text_hash(normalized):
+    if not normalized:
+        return ''
+
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def populate_text_hashes(apps, schema_editor):
+    Localization = apps.get_model('content', 'Localization')
+
+    changed = []
+    for localization in Localization.objects.iterator(chunk_size=2000):
+        for field_name, (hash_field, loose_hash_field) in HASH_FIELDS.items():
+            text = getattr(localization, field_name)
+            setattr(localization, hash_field, text_hash(normalize_text(text)))
+            setattr(localization, loose_hash_field, text_hash(loose_normalize_text(text)))
+
+        changed.append(localization)
+
+    hash_field_names = [name for fields in HASH_FIELDS.values() for name in fields]
+    Localization.objects.bulk_update(changed, hash_field_names, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0003_dialogue_owner_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='localization',
+            name='english_hash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='localization',
+            name='english_loose_hash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='localization',
+            name='spanish_hash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='localization',
+            name='spanish_loose_hash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=40),
+        ),
+        migrations.RunPython(populate_text_hashes, migrations.RunPython.noop),
+    ]
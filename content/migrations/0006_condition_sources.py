@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_condition_sources(apps, schema_editor):
+    """
+    Vincula las conditions ya creadas por signals.py a su origen,
+    usando las mismas keys con las que se generaron.
+    """
+    Condition = apps.get_model('content', 'Condition')
+    Quest = apps.get_model('content', 'Quest')
+    QuestObjective = apps.get_model('content', 'QuestObjective')
+    Dialogue = apps.get_model('content', 'Dialogue')
+
+    quests = dict(Quest.objects.values_list('key', 'id'))
+    objectives = dict(QuestObjective.objects.values_list('key', 'id'))
+    first_talks = {f"{key}_ok": pk for key, pk in Dialogue.objects.filter(basic_dialogue__is_first_talk=True).values_list('key', 'id')}
+
+    changed = []
+    for condition in Condition.objects.all():
+        identifier = condition.identifier
+
+        if identifier in objectives:
+            condition.source_quest_objective_id = objectives[identifier]
+        elif identifier in first_talks:
+            condition.source_dialogue_id = first_talks[identifier]
+        elif identifier in quests:
+            condition.source_quest_id = quests[identifier]
+        elif identifier.endswith('_finished') and identifier[:-len('_finished')] in quests:
+            condition.source_quest_id = quests[identifier[:-len('_finished')]]
+        else:
+            continue
+
+        changed.append(condition)
+
+    Condition.objects.bulk_update(changed, ['source_quest', 'source_quest_objective', 'source_dialogue'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0005_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='condition',
+            name='source_dialogue',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='generated_conditions', to='content.dialogue'),
+        ),
+        migrations.AddField(
+            model_name='condition',
+            name='source_quest',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='generated_conditions', to='content.quest'),
+        ),
+        migrations.AddField(
+            model_name='condition',
+            name='source_quest_objective',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='generated_conditions', to='content.questobjective'),
+        ),
+        migrations.RunPython(populate_condition_sources, migrations.RunPython.noop),
+    ]
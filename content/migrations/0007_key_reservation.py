@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_condition_sources'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeyReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='Label del modelo, p. ej. content.dialogue.', max_length=100)),
+                ('key', models.SlugField(max_length=150)),
+                ('owner', models.CharField(blank=True, default='', help_text='Sesión o import que reservó la key.', max_length=100)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('model', 'key'), name='unique_key_reservation')],
+            },
+        ),
+    ]
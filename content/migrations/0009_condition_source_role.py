@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:00
+
+from django.db import migrations, models
+
+
+def populate_source_roles(apps, schema_editor):
+    """
+    Marca las dos conditions que signals.py crea por quest (ya vinculadas por
+    la 0006) según el identifier con el que se generaron.
+    """
+    Condition = apps.get_model('content', 'Condition')
+
+    changed = []
+    seen = set()
+    for condition in Condition.objects.filter(source_quest__isnull=False).select_related('source_quest').order_by('id'):
+        quest_key = condition.source_quest.key
+
+        if condition.identifier == quest_key:
+            role = 'quest_started'
+        elif condition.identifier == f"{quest_key}_finished":
+            role = 'quest_finished'
+        else:
+            continue
+
+        if (condition.source_quest_id, role) in seen:
+            continue
+
+        seen.add((condition.source_quest_id, role))
+        condition.source_role = role
+        changed.append(condition)
+
+    Condition.objects.bulk_update(changed, ['source_role'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0008_cache_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='condition',
+            name='source_role',
+            field=models.CharField(blank=True, choices=[('quest_started', 'Inicio de quest'), ('quest_finished', 'Quest terminada')], default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(populate_source_roles, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='condition',
+            constraint=models.UniqueConstraint(condition=models.Q(('source_role', ''), _negated=True), fields=('source_quest', 'source_role'), name='unique_condition_source_role'),
+        ),
+    ]
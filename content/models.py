@@ -3,6 +3,7 @@ from django.db.models import OneToOneField
 from django.forms.models import model_to_dict
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.template.defaultfilters import slugify
+from django.utils import timezone
 
 class LocalizedField(models.OneToOneField):
     """
@@ -145,6 +146,9 @@ class BaseModel(models.Model):
         return _get_related_objects(self, related_name, *select_related_fields, sort_lambda_key=sort_lambda_key, reversed=reversed)
         
     
+# Texto con el que se crean las localizations automáticas (ver signals.py).
+PLACEHOLDER_PREFIX = "COMPLETAR"
+
 class Localization(BaseModel):
     prefix = 'loc_'
 
@@ -155,6 +159,12 @@ class Localization(BaseModel):
     english = models.TextField(null=True, blank=True, default="")
     spanish = models.TextField(null=True, blank=True, default="")
 
+    # Índice de memoria de traducción (ver translation_memory.py), se mantiene en pre_save.
+    english_hash = models.CharField(max_length=40, blank=True, default="", editable=False, db_index=True)
+    english_loose_hash = models.CharField(max_length=40, blank=True, default="", editable=False, db_index=True)
+    spanish_hash = models.CharField(max_length=40, blank=True, default="", editable=False, db_index=True)
+    spanish_loose_hash = models.CharField(max_length=40, blank=True, default="", editable=False, db_index=True)
+
 class NPC(BaseModel):
     prefix = 'npc_'
     name = LocalizedField(related_name='npc_name', on_delete=models.CASCADE)
@@ -823,10 +833,26 @@ class Ability(BaseModel):
     def to_dict(cls):
         return super().to_dict(None, [Ability.name, Ability.description], cls.extra_process)
  
+class ConditionRoles(models.TextChoices):
+    QUEST_STARTED = 'quest_started', 'Inicio de quest'
+    QUEST_FINISHED = 'quest_finished', 'Quest terminada'
+
 class Condition(BaseModel):
     prefix = 'condition_'
     use_identifier =  models.BooleanField(default=False, help_text="si es True, se usa la Key Al exportar a JSON. Caso contrario se usa identifier.")
 
+    # Origen de las conditions que se crean automáticamente (ver signals.py).
+    source_quest = models.ForeignKey(Quest, related_name='generated_conditions', null=True, blank=True, editable=False, on_delete=models.SET_NULL)
+    source_quest_objective = models.ForeignKey(QuestObjective, related_name='generated_conditions', null=True, blank=True, editable=False, on_delete=models.SET_NULL)
+    source_dialogue = models.ForeignKey('Dialogue', related_name='generated_conditions', null=True, blank=True, editable=False, on_delete=models.SET_NULL)
+    # Qué condition de source_quest es: las dos comparten la FK y la key no es confiable.
+    source_role = models.CharField(max_length=20, choices=ConditionRoles.choices, blank=True, default='', editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source_quest', 'source_role'], condition=~models.Q(source_role=''), name='unique_condition_source_role'),
+        ]
+
     def to_dict_item(self):
         return self.identifier if self.use_identifier else self.key
 
@@ -1166,6 +1192,70 @@ class DiaryEntry(BaseModel):
         }
 
 # Set Plural names
+class ExportJobKinds(models.TextChoices):
+    LOCALIZATION = 'localization', 'Localization (JSON)'
+    LOCALIZATION_CSV = 'localization_csv', 'Localization (CSV)'
+    LOCALIZATION_TABLES = 'localization_tables', 'Tablas de Localizations (ZIP)'
+
+class ExportJobStatuses(models.TextChoices):
+    PENDING = 'pending', 'Pendiente'
+    RUNNING = 'running', 'En curso'
+    DONE = 'done', 'Terminado'
+    FAILED = 'failed', 'Falló'
+
+class ExportJob(models.Model):
+    """
+    Exportación que se genera en segundo plano (ver exports.py) y queda en disco.
+    """
+    kind = models.CharField(max_length=30, choices=ExportJobKinds.choices)
+    status = models.CharField(max_length=20, choices=ExportJobStatuses.choices, default=ExportJobStatuses.PENDING)
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    file_path = models.CharField(max_length=500, blank=True, default="")
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Último signo de vida del worker; si se corta (reinicio) el job queda viejo.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('-created_at',)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk}"
+
+    @property
+    def progress(self):
+        if not self.total_rows:
+            return 100 if self.status == ExportJobStatuses.DONE else 0
+
+        return min(100, round(self.processed_rows * 100 / self.total_rows))
+
+    @property
+    def duration(self):
+        if not self.started_at:
+            return None
+
+        return (self.finished_at or timezone.now()) - self.started_at
+
+class KeyReservation(models.Model):
+    """
+    Key tomada por un editor o un import que todavía no se guardó (ver key_reservations.py).
+    """
+    model = models.CharField(max_length=100, help_text="Label del modelo, p. ej. content.dialogue.")
+    key = models.SlugField(max_length=150)
+    owner = models.CharField(max_length=100, blank=True, default="", help_text="Sesión o import que reservó la key.")
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'key'], name='unique_key_reservation'),
+        ]
+
+    def __str__(self):
+        return f"{self.model}: {self.key}"
+
 models_list = [
     (Item, 'Items'),
     (Weapon, 'Weapons'),
@@ -1193,6 +1283,8 @@ models_list = [
     (EquipmentType, 'Equipment Types'),
     (Localization, 'Localizations'),
     (Rarity, 'Rarities'), 
+    (ExportJob, 'Export Jobs'),
+    (KeyReservation, 'Key Reservations'),
     # (Consumable, 'Consumables'),
     # (Equipment, 'Equipment'), 
     # (QuestItem, 'Quest Items'), 
@@ -1205,4 +1297,4 @@ models_list = [
 ]
 
 for i, model in enumerate(models_list, start=1):
-    model[0]._meta.verbose_name_plural = f"{i}. {model[1]}"
\ No newline at end of file
+    model[0]._meta.verbose_name_plural = f"{i}. {model[1]}"
@@ -0,0 +1,173 @@
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+
+# Parametros del querystring para paginar por cursor.
+AFTER_VAR = 'after'
+BEFORE_VAR = 'before'
+
+class CountModes:
+    EXACT = 'exact'
+    ESTIMATED = 'estimated'
+
+def estimate_count(queryset, limit):
+    """
+    Cuenta sin recorrer toda la tabla. Solo para la paginación por cursor, que
+    no necesita saber cuántas páginas hay.
+
+    - Hasta limit filas: COUNT exacto, acotado a limit + 1 filas.
+    - Más de limit sin filtros ni búsqueda: rango de pks corregido por la
+      densidad de pks de las primeras limit + 1 filas (aproximado).
+    - Más de limit con filtros: limit, marcado como tope.
+
+    Devuelve (count, is_estimated, is_capped).
+    """
+    queryset = queryset.order_by()
+
+    count = queryset[:limit + 1].count()
+    if count <= limit:
+        return count, False, False
+
+    if queryset.query.where:
+        return limit, False, True
+
+    bounds = queryset.aggregate(min_pk=Min('pk'), max_pk=Max('pk'))
+    # pk de la fila limit + 1: cuántos pks "ocupa" esa cantidad de filas.
+    limit_pk = queryset.order_by('pk').values_list('pk', flat=True)[limit]
+    density = (limit + 1) / (limit_pk - bounds['min_pk'] + 1)
+
+    return max(round((bounds['max_pk'] - bounds['min_pk'] + 1) * density), count), True, False
+
+class KeysetPaginator(Paginator):
+    """
+    Paginador por cursor sobre un campo único e indexado (key).
+    No usa OFFSET y el count puede ser exacto o estimado.
+    """
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True,
+                 count_mode=CountModes.EXACT, count_limit=1000):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.count_mode = count_mode
+        self.count_limit = count_limit
+        self.count_is_estimated = False
+        self.count_is_capped = False
+
+    @cached_property
+    def count(self):
+        if self.count_mode != CountModes.ESTIMATED:
+            return super().count
+
+        count, self.count_is_estimated, self.count_is_capped = estimate_count(self.object_list, self.count_limit)
+
+        return count
+
+    def get_elided_page_range(self, number=1, *, on_each_side=3, on_ends=2):
+        # Con cursores no hay números de página.
+        return []
+
+    def keyset_page(self, field_name, descending=False, after=None, before=None):
+        """
+        Devuelve (object_list, has_previous, has_next) para la página
+        que sigue a after o precede a before.
+        """
+        forward_lookup = 'lt' if descending else 'gt'
+        backward_lookup = 'gt' if descending else 'lt'
+
+        queryset = self.object_list
+
+        if before is not None:
+            queryset = queryset.filter(**{f"{field_name}__{backward_lookup}": before}).reverse()
+            results = list(queryset[:self.per_page + 1])
+            has_previous = len(results) > self.per_page
+            results = results[:self.per_page]
+            results.reverse()
+            return results, has_previous, True
+
+        if after is not None:
+            queryset = queryset.filter(**{f"{field_name}__{forward_lookup}": after})
+
+        results = list(queryset[:self.per_page + 1])
+        has_next = len(results) > self.per_page
+
+        return results[:self.per_page], after is not None, has_next
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList que pagina por cursor cuando el listado está ordenado
+    por el campo keyset del admin. Con cualquier otro orden usa la
+    paginación normal de Django.
+    """
+    is_keyset = False
+
+    def __init__(self, request, *args, **kwargs):
+        self.keyset_after = request.GET.get(AFTER_VAR) or None
+        self.keyset_before = request.GET.get(BEFORE_VAR) or None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+
+        # Los cursores no son filtros del queryset.
+        lookup_params.pop(AFTER_VAR, None)
+        lookup_params.pop(BEFORE_VAR, None)
+
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Cualquier link (orden, filtros, búsqueda) vuelve a la primera página
+        # salvo que pida un cursor explícitamente.
+        new_params = {AFTER_VAR: None, BEFORE_VAR: None} | (new_params or {})
+        return super().get_query_string(new_params, remove)
+
+    def get_keyset_ordering(self, request):
+        """
+        Devuelve True/False (descendente) si el orden es por el campo keyset,
+        o None si se ordena por otra columna.
+        """
+        field_name = self.model_admin.keyset_field
+        # get_ordering puede repetir el orden que ya trae el queryset.
+        ordering = list(dict.fromkeys(
+            o for o in self.get_ordering(request, self.queryset)
+            if isinstance(o, str) and o.lstrip('-') != 'pk'
+        ))
+
+        if ordering == [field_name]:
+            return False
+
+        if ordering == [f"-{field_name}"]:
+            return True
+
+        return None
+
+    def get_results(self, request):
+        descending = self.get_keyset_ordering(request)
+
+        if descending is None:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page, keyset=True)
+
+        result_list, has_previous, has_next = paginator.keyset_page(
+            self.model_admin.keyset_field,
+            descending,
+            after=self.keyset_after,
+            before=self.keyset_before,
+        )
+
+        field_attname = self.model._meta.get_field(self.model_admin.keyset_field).attname
+
+        self.is_keyset = True
+        self.keyset_first_url = self.get_query_string() if has_previous else None
+        self.keyset_previous_url = self.get_query_string({BEFORE_VAR: getattr(result_list[0], field_attname)}) if has_previous and result_list else None
+        self.keyset_next_url = self.get_query_string({AFTER_VAR: getattr(result_list[-1], field_attname)}) if has_next and result_list else None
+
+        self.result_count = paginator.count
+        self.result_count_is_estimated = paginator.count_is_estimated
+        self.result_count_is_capped = paginator.count_is_capped
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = bool(result_list) or has_previous
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = has_previous or has_next
+        self.paginator = paginator
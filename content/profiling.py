@@ -0,0 +1,156 @@
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Perfil del request en curso (None si el profiling está apagado).
+_current_profile = ContextVar('content_request_profile', default=None)
+
+# Últimos requests perfilados, para la página de reporte del admin.
+recent_profiles = deque(maxlen=getattr(settings, 'CONTENT_PROFILING_HISTORY', 200))
+
+def is_enabled():
+    return bool(getattr(settings, 'CONTENT_PROFILING', False))
+
+class RequestProfile:
+    """
+    Métricas de un request: queries, tiempo de SQL, grupos de queries
+    duplicadas (N+1), render de templates y escaneo de archivos.
+    """
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.status = None
+        self.streaming = False
+        self.started_at = time.time()
+        self.total_ms = 0.0
+        self.query_count = 0
+        self.sql_ms = 0.0
+        self.queries = {}  # sql -> [count, ms]
+        self.timings = {}  # nombre -> ms
+
+    def add_query(self, sql, elapsed_ms):
+        self.query_count += 1
+        self.sql_ms += elapsed_ms
+
+        entry = self.queries.setdefault(sql, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed_ms
+
+    def add_timing(self, name, elapsed_ms):
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed_ms
+
+    @property
+    def duplicate_queries(self):
+        """
+        Queries ejecutadas más de una vez con el mismo SQL (parámetros aparte),
+        ordenadas por cantidad de repeticiones.
+        """
+        duplicates = [
+            {'sql': sql, 'count': count, 'ms': ms}
+            for sql, (count, ms) in self.queries.items() if count > 1
+        ]
+        duplicates.sort(key=lambda d: d['count'], reverse=True)
+        return duplicates
+
+    @property
+    def template_ms(self):
+        return self.timings.get('template', 0.0)
+
+    @property
+    def filesystem_ms(self):
+        return self.timings.get('filesystem', 0.0)
+
+    def server_timing(self):
+        """
+        Valor del header Server-Timing.
+        """
+        metrics = [
+            f'sql;dur={self.sql_ms:.1f};desc="{self.query_count} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'fs;dur={self.filesystem_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ]
+        return ", ".join(metrics)
+
+@contextmanager
+def timed(name):
+    """
+    Suma al request actual el tiempo del bloque bajo el nombre dado.
+    Sin profiling activo no hace nada.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_timing(name, (time.perf_counter() - start) * 1000)
+
+def _query_recorder(profile):
+    def record(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            profile.add_query(sql, (time.perf_counter() - start) * 1000)
+
+    return record
+
+class ProfilingMiddleware:
+    """
+    Registra por request las métricas de RequestProfile, las expone en el
+    header Server-Timing y las guarda en recent_profiles.
+    Se habilita con settings.CONTENT_PROFILING.
+
+    Se miden las queries de todas las conexiones de settings.DATABASES, hasta
+    que la vista devuelve la respuesta. El cuerpo de una respuesta en stream
+    (StreamingHttpResponse, FileResponse) se genera después, así que ni su
+    tiempo ni sus queries entran: esos requests quedan marcados como stream.
+    """
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = RequestProfile(request.method, request.get_full_path())
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_query_recorder(profile)))
+
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+
+        profile.total_ms = (time.perf_counter() - start) * 1000
+        profile.status = response.status_code
+        profile.streaming = response.streaming
+
+        response['Server-Timing'] = profile.server_timing()
+        recent_profiles.append(profile)
+
+        return response
+
+    def process_template_response(self, request, response):
+        # El render ocurre después de este hook; se mide con un post render callback.
+        profile = _current_profile.get()
+        if profile is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda r: profile.add_timing('template', (time.perf_counter() - start) * 1000)
+            )
+
+        return response
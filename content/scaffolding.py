@@ -0,0 +1,428 @@
+"""
+Scaffolding de las filas que acompañan a una Quest o un NPC nuevo: conditions,
+dialogues (QuestPrompt y QuestEnd de la quest, first talk del NPC) con sus
+textos, secuencias y localizations placeholder.
+
+Las filas de todas las quests se arman primero en memoria (ScaffoldPlan) y se
+escriben con un bulk_create por modelo, tablas intermedias incluidas, así
+crear 200 quests cuesta lo mismo en queries que crear una. Como bulk_create no
+manda señales, acá se hace lo que harían los pre_save/post_save (slug de la
+key, hashes de las localizations, invalidar caches). Las keys se chequean en
+bulk antes de escribir (ver key_reservations.py).
+"""
+import csv
+import json
+from django.db import transaction
+from django.template.defaultfilters import slugify
+from .utils import DialogueKeyGenerator as dKeyGenerator
+from .utils import DialogueSequenceKeyGenerator as dSequenceKeyGenerator
+from .utils import DialogueSingleItemKeyGenerator as dSingleItemKeyGenerator
+from .utils import DialogueSequenceItemKeyGenerator as dSequenceItemKeyGenerator
+from .utils import auto_key
+from .key_reservations import resolve_keys
+from .translation_memory import update_text_hashes
+from .localizations import invalidate_translation_report
+from .condition_graph import invalidate_condition_graph
+from .models import (
+    Localization,
+    NPC,
+    Quest,
+    Condition,
+    ConditionRoles,
+    Dialogue,
+    DialogueTypes,
+    DialogueSequence,
+    DialogueSingleItem,
+    DialogueSequenceItem,
+    Basic,
+    QuestPrompt,
+    QuestEnd,
+)
+
+class ScaffoldPlan:
+    """
+    Filas pendientes de escribir, por modelo, en orden de dependencias.
+    """
+    # Los subtypes (Basic, QuestPrompt, QuestEnd) se escriben al final porque apuntan a todo lo demás.
+    models = [Localization, NPC, Quest, Dialogue, Condition, DialogueSingleItem, DialogueSequence, DialogueSequenceItem]
+
+    def __init__(self):
+        self.rows = {model: [] for model in self.models}
+        self.subtypes = {}
+        # (campo M2M de Dialogue, dialogue, condition)
+        self.dialogue_conditions = []
+
+    def add(self, instance):
+        model = type(instance)
+        if model in self.rows:
+            # Lo mismo que hace BaseModel.save.
+            instance.key = slugify(instance.key)
+            self.rows[model].append(instance)
+        else:
+            self.subtypes.setdefault(model, []).append(instance)
+
+        return instance
+
+    def localization(self, key, english, spanish):
+        localization = Localization(identifier=key, key=f"loc_{key}", english=english, spanish=spanish)
+        update_text_hashes(localization)
+
+        return self.add(localization)
+
+    def link(self, dialogue, field_name, condition):
+        self.dialogue_conditions.append((field_name, dialogue, condition))
+
+    def write(self, batch_size=500):
+        with transaction.atomic():
+            # Un choque de keys corta antes de escribir nada, en vez de un IntegrityError a mitad de camino.
+            # Las reservas de los editores no frenan el scaffolding: si otro guarda esa key después,
+            # le salta la validación de unique del form.
+            for model in self.models:
+                if self.rows[model]:
+                    resolve_keys(model, [instance.key for instance in self.rows[model]], suffix=False, reserved=False)
+
+            # bulk_create toma el pk de los objetos relacionados ya creados.
+            for model in self.models:
+                model.objects.bulk_create(self.rows[model], batch_size=batch_size)
+
+            for model, instances in self.subtypes.items():
+                model.objects.bulk_create(instances, batch_size=batch_size)
+
+            through_rows = {}
+            for field_name, dialogue, condition in self.dialogue_conditions:
+                through = Dialogue._meta.get_field(field_name).remote_field.through
+                through_rows.setdefault(through, []).append(through(dialogue_id=dialogue.pk, condition_id=condition.pk))
+
+            for through, rows in through_rows.items():
+                through.objects.bulk_create(rows, batch_size=batch_size)
+
+        transaction.on_commit(invalidate_condition_graph)
+        transaction.on_commit(invalidate_translation_report)
+
+def plan_quest(plan, quest):
+    """
+    Agrega al plan las filas de una quest ya guardada (ver signals.crear_quest).
+    """
+    # Cuando inicia una quest se triggerea su ID
+    quest_key = quest.key
+    quest_stared_condition = plan.add(Condition(
+        identifier= f"{quest_key}",
+        key= f"condition_{quest_key}",
+        use_identifier=True,
+        source_quest=quest,
+        source_role=ConditionRoles.QUEST_STARTED,
+    ))
+
+    # Condicion de Quest Finalizada
+    quest_ended_condition = plan.add(Condition(
+        identifier= f"{quest_key}_finished",
+        key= f"condition_{quest_key}_finished",
+        use_identifier=True,
+        source_quest=quest,
+        source_role=ConditionRoles.QUEST_FINISHED,
+    ))
+
+    # Dialogue Prompt
+    dialogue_prompt_key = dKeyGenerator.generate_key(
+        prefix=Dialogue.prefix,
+        type=DialogueTypes.QUEST_PROMPT,
+        npc=quest.npc_giver.key,
+        slug=quest_key
+    )
+
+    dialogue = plan.add(Dialogue(
+        identifier = quest_key,
+        key= dialogue_prompt_key,
+        npc = quest.npc_giver,
+        type = DialogueTypes.QUEST_PROMPT,
+        button_text = plan.localization(
+            f"{dialogue_prompt_key}_button_text",
+            "COMPLETAR button Text de " + dialogue_prompt_key,
+            "COMPLETAR button Text de" + dialogue_prompt_key,
+        ),
+    ))
+
+    plan.link(dialogue, 'no_appear_conditions', quest_stared_condition)
+
+    # Quest Prompt dialogue subtype: text, deny text y accept text.
+    single_items = {}
+    for suffix, speaker, label in (
+        ('single_item', False, 'dialogue single item text'),
+        ('deny_single_item', True, 'dialogue deny single item text'),
+        ('accept_single_item', True, 'dialogue accept single item text'),
+    ):
+        singleitem_key = dSingleItemKeyGenerator.generate_key(
+            prefix = DialogueSingleItem.prefix,
+            slug = dialogue_prompt_key,
+            suffix = suffix
+        )
+
+        single_items[suffix] = plan.add(DialogueSingleItem(
+            identifier = f"{dialogue_prompt_key}_{suffix}",
+            key= singleitem_key,
+            text = plan.localization(
+                f"{singleitem_key}_text",
+                f"COMPLETAR {label} de " + singleitem_key,
+                f"COMPLETAR {label} de " + singleitem_key,
+            ),
+            speaker = speaker,
+        ))
+
+    plan.add(QuestPrompt(
+        dialogue = dialogue,
+        text = single_items['single_item'],
+        deny_text = single_items['deny_single_item'],
+        acccept_text = single_items['accept_single_item'],
+        quest = quest
+    ))
+
+    # Quest End
+    dialogue_end_key = dKeyGenerator.generate_key(
+        prefix=Dialogue.prefix,
+        type=DialogueTypes.QUEST_END,
+        npc=quest.npc_giver.key,
+        slug=quest_key
+    )
+
+    dialogue_end = plan.add(Dialogue(
+        identifier = quest_key,
+        key= dialogue_end_key,
+        npc = quest.npc_giver,
+        type = DialogueTypes.QUEST_END,
+        button_text = plan.localization(
+            f"{dialogue_end_key}_button_text",
+            "COMPLETAR button Text de " + dialogue_end_key,
+            "COMPLETAR button Text de" + dialogue_end_key,
+        ),
+    ))
+
+    # Dialogue end Conditions
+    plan.link(dialogue_end, 'appear_conditions', quest_stared_condition)
+    plan.link(dialogue_end, 'no_appear_conditions', quest_ended_condition)
+    plan.link(dialogue_end, 'trigger_id_conditions', quest_ended_condition)
+
+    dialogue_sequence_end = plan_sequence(plan, dialogue_end_key, dSequenceKeyGenerator.generate_key(slug=dialogue_end_key))
+
+    plan.add(QuestEnd(
+        dialogue = dialogue_end,
+        sequence = dialogue_sequence_end,
+        quest = quest
+    ))
+
+def plan_sequence(plan, identifier, sequence_key, dialogue_key=None):
+    """
+    Secuencia con un único item "A" y su localization placeholder.
+    """
+    dialogue_sequence = plan.add(DialogueSequence(
+        identifier = identifier,
+        key = sequence_key,
+    ))
+
+    sequence_item_key = dSequenceItemKeyGenerator.generate_key(
+        prefix=DialogueSequenceItem.prefix,
+        dialogue_key=dialogue_key or sequence_key,
+        slug="A",
+        dialogue_item_index="1",
+    )
+
+    plan.add(DialogueSequenceItem(
+        identifier = "A",
+        key=sequence_item_key,
+        text = plan.localization(
+            f"{sequence_item_key}_text",
+            "COMPLETAR sequence item text de " + sequence_item_key,
+            "COMPLETAR sequence item text de" + sequence_item_key,
+        ),
+        speaker = False,
+        index = 1,
+        sequence = dialogue_sequence
+    ))
+
+    return dialogue_sequence
+
+def link_quest_end_conditions(quests):
+    """
+    Agrega a los appear_conditions del QuestEnd de cada quest la condition de
+    su anteúltimo QuestObjective (si tiene más de uno). Una query para todas.
+    """
+    quest_ids = [quest.pk for quest in quests]
+
+    objective_conditions = {}
+    conditions = Condition.objects.filter(source_quest_objective__quest__in=quest_ids).order_by(
+        'source_quest_objective__quest_id', 'source_quest_objective__index'
+    ).values_list('source_quest_objective__quest_id', 'id')
+
+    for quest_id, condition_id in conditions:
+        objective_conditions.setdefault(quest_id, []).append(condition_id)
+
+    through = Dialogue.appear_conditions.through
+    rows = [
+        through(dialogue_id=dialogue_id, condition_id=objective_conditions[quest_id][-2])
+        for quest_id, dialogue_id in QuestEnd.objects.filter(quest__in=quest_ids).values_list('quest_id', 'dialogue_id')
+        if len(objective_conditions.get(quest_id, [])) > 1
+    ]
+
+    through.objects.bulk_create(rows, ignore_conflicts=True)
+    transaction.on_commit(invalidate_condition_graph)
+
+def scaffold_quests(quests, batch_size=500):
+    """
+    Crea todo lo que acompaña a cada quest (ya guardadas). Los objetivos se
+    suelen cargar después que la quest, por eso el QuestEnd se vincula al
+    anteúltimo recién después del commit.
+    """
+    quests = list(quests)
+    plan = ScaffoldPlan()
+    for quest in quests:
+        plan_quest(plan, quest)
+
+    plan.write(batch_size=batch_size)
+    transaction.on_commit(lambda: link_quest_end_conditions(quests))
+
+    return plan
+
+def create_quests(rows, batch_size=500, suffix_conflicts=False):
+    """
+    Alta masiva de quests (p. ej. desde una planilla). Cada row es un dict con
+    identifier, npc (key), title y brief (dicts english/spanish) y opcionalmente
+    money_reward y ability_points_reward.
+
+    Si una key ya existe (o está reservada) se levanta KeyCollisionError, salvo
+    con suffix_conflicts, que la renombra a key_2, key_3...
+    """
+    rows = list(rows)
+    npcs = NPC.objects.in_bulk({row['npc'] for row in rows}, field_name='key')
+
+    missing_npcs = {row['npc'] for row in rows} - npcs.keys()
+    if missing_npcs:
+        raise NPC.DoesNotExist(f"No existen los NPCs: {', '.join(sorted(missing_npcs))}")
+
+    plan = ScaffoldPlan()
+    quests = []
+
+    with transaction.atomic():
+        quest_keys = resolve_keys(Quest, [auto_key(Quest.prefix, row['identifier']) for row in rows], suffix=suffix_conflicts)
+
+        for row, quest_key in zip(rows, quest_keys):
+            quest = plan.add(Quest(
+                identifier=row['identifier'],
+                key=quest_key,
+                title=plan.localization(f"{quest_key}_title", row['title']['english'], row['title']['spanish']),
+                brief=plan.localization(f"{quest_key}_brief", row['brief']['english'], row['brief']['spanish']),
+                npc_giver=npcs[row['npc']],
+                money_reward=row.get('money_reward', 0),
+                ability_points_reward=row.get('ability_points_reward', 0),
+            ))
+            plan_quest(plan, quest)
+            quests.append(quest)
+
+        plan.write(batch_size=batch_size)
+
+    transaction.on_commit(lambda: link_quest_end_conditions(quests))
+
+    return quests
+
+def plan_first_talk(plan, npc):
+    """
+    Agrega al plan el dialogue de first talk del NPC (ver signals.crear_first_talk).
+    """
+    npc_key = npc.key
+
+    # Dialogue Basic key
+    dialogue_basic_key = dKeyGenerator.generate_key(
+        prefix=Dialogue.prefix,
+        type=DialogueTypes.BASIC,
+        npc=npc_key,
+        slug='first_talk'
+    )
+
+    dialogue = plan.add(Dialogue(
+        identifier = 'First Talk',
+        key= dialogue_basic_key,
+        npc = npc,
+        type = DialogueTypes.BASIC,
+        button_text = plan.localization(
+            f"{dialogue_basic_key}_button_text",
+            "COMPLETAR button Text de " + dialogue_basic_key,
+            "COMPLETAR button Text de" + dialogue_basic_key,
+        ),
+    ))
+
+    # first talk Condition
+    first_talk_ok_condition = plan.add(Condition(
+        identifier= f"{dialogue_basic_key}_ok",
+        key= f"condition_{dialogue_basic_key}_ok",
+        use_identifier=True,
+        source_dialogue=dialogue,
+    ))
+
+    dialogue_sequence = plan_sequence(
+        plan,
+        dialogue_basic_key,
+        dSequenceKeyGenerator.generate_key(slug=dialogue_basic_key),
+        dialogue_key=dialogue_basic_key,
+    )
+
+    plan.add(Basic(
+        dialogue = dialogue,
+        is_first_talk = True,
+        is_one_shot = False,
+        sequence = dialogue_sequence
+    ))
+
+    plan.link(dialogue, 'no_appear_conditions', first_talk_ok_condition)
+    plan.link(dialogue, 'trigger_id_conditions', first_talk_ok_condition)
+
+def scaffold_first_talks(npcs, batch_size=500):
+    """
+    Crea el first talk de cada NPC (ya guardados).
+    """
+    plan = ScaffoldPlan()
+    for npc in npcs:
+        plan_first_talk(plan, npc)
+
+    plan.write(batch_size=batch_size)
+
+    return plan
+
+def create_npcs(rows, batch_size=500, suffix_conflicts=False):
+    """
+    Alta masiva de NPCs con sus first talks, en una transacción y sin señales.
+    Cada row es un dict con identifier y name (dict english/spanish). Los choques
+    de keys se manejan como en create_quests.
+    """
+    rows = list(rows)
+    plan = ScaffoldPlan()
+    npcs = []
+
+    with transaction.atomic():
+        npc_keys = resolve_keys(NPC, [auto_key(NPC.prefix, row['identifier']) for row in rows], suffix=suffix_conflicts)
+
+        for row, npc_key in zip(rows, npc_keys):
+            npc = plan.add(NPC(
+                identifier=row['identifier'],
+                key=npc_key,
+                name=plan.localization(f"{npc_key}_name", row['name']['english'], row['name']['spanish']),
+            ))
+            plan_first_talk(plan, npc)
+            npcs.append(npc)
+
+        plan.write(batch_size=batch_size)
+
+    return npcs
+
+def iter_npc_rows(text_stream, file_format):
+    """
+    Rows para create_npcs desde un CSV (identifier, name_en, name_es) o un
+    JSON ({"npcs": [{"identifier", "name_en", "name_es"}]}).
+    """
+    if file_format == 'json':
+        records = json.load(text_stream)['npcs']
+    else:
+        records = csv.DictReader(text_stream)
+
+    for record in records:
+        yield {
+            'identifier': record['identifier'],
+            'name': {'english': record['name_en'], 'spanish': record['name_es']},
+        }
@@ -1,26 +1,20 @@
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_save, pre_save, m2m_changed
 from django.dispatch import receiver
 from django.db import transaction
-from django.db.models import Q
 from django.apps import apps
-from .utils import DialogueKeyGenerator as dKeyGenerator
-from .utils import DialogueSequenceKeyGenerator as dSequenceKeyGenerator
-from .utils import DialogueSingleItemKeyGenerator as dSingleItemKeyGenerator
-from .utils import DialogueSequenceItemKeyGenerator as dSequenceItemKeyGenerator
+from .localizations import invalidate_translation_report
+from .translation_memory import update_text_hashes
+from .condition_graph import ELEMENT_MODELS, get_through_models, invalidate_condition_graph
+from .scaffolding import scaffold_quests, scaffold_first_talks
+from .key_reservations import consume_reservation
+from .utils import KEY_GENERATORS
 from .models import (
     Localization,
     NPC,
     Quest,
     QuestObjective,
     Condition,
-    Dialogue,
-    DialogueTypes,
-    DialogueSequence,
-    DialogueSingleItem,
-    DialogueSequenceItem,
-    Basic,
     QuestPrompt,
-    QuestEnd,
 )
 
 APP_NAME = 'content'
@@ -38,6 +32,34 @@ def auto_register_post_deletes():
                 weak=False
             )
 
+@receiver(pre_save, sender=Localization)
+def actualizar_indice_traducciones(sender, instance, **kwargs):
+    update_text_hashes(instance)
+
+@receiver(post_save, sender=Localization)
+@receiver(post_delete, sender=Localization)
+def invalidar_reporte_traducciones(sender, instance, **kwargs):
+    # Después del commit, para que otro proceso no vuelva a cachear el reporte viejo.
+    transaction.on_commit(invalidate_translation_report)
+
+def invalidar_grafo_conditions(sender, **kwargs):
+    transaction.on_commit(invalidate_condition_graph)
+
+for through_model in get_through_models():
+    m2m_changed.connect(invalidar_grafo_conditions, sender=through_model, dispatch_uid=f"condition_graph_{through_model._meta.label}")
+
+for graph_model in [Condition, QuestPrompt, *ELEMENT_MODELS]:
+    post_save.connect(invalidar_grafo_conditions, sender=graph_model, dispatch_uid=f"condition_graph_save_{graph_model._meta.label}")
+    post_delete.connect(invalidar_grafo_conditions, sender=graph_model, dispatch_uid=f"condition_graph_delete_{graph_model._meta.label}")
+
+def consumir_reserva_key(sender, instance, **kwargs):
+    consume_reservation(sender, instance.key)
+
+# Las keys que se reservan desde el admin son las de los modelos con KeyGenerator.
+for model_name in KEY_GENERATORS:
+    reservable_model = apps.get_model(APP_NAME, model_name)
+    post_save.connect(consumir_reserva_key, sender=reservable_model, dispatch_uid=f"key_reservation_{reservable_model._meta.label}")
+
 @receiver(post_save, sender=Quest)
 def crear_quest(sender, instance, created, **kwargs):
     """
@@ -47,199 +69,8 @@ def crear_quest(sender, instance, created, **kwargs):
     - created: True si es una nueva instancia, False si es una actualización.
     """
     if created:  # Solo la primera vez que se guarda
-        # Cuando inicia una quest se triggerea su ID
-        quest_key = instance.key
-        quest_stared_condition = Condition.objects.create(
-            identifier= f"{quest_key}",
-            key= f"condition_{quest_key}",
-            use_identifier=True,
-        )
-
-        # Condicion de Quest Finalizada
-        quest_ended_condition = Condition.objects.create(
-            identifier= f"{quest_key}_finished",
-            key= f"condition_{quest_key}_finished",
-            use_identifier=True,
-        )
-
-        # Dialogue Prompt
-        dialogue_prompt_key = dKeyGenerator.generate_key(
-            prefix=Dialogue.prefix,
-            type=DialogueTypes.QUEST_PROMPT,
-            npc=instance.npc_giver.key,
-            slug=quest_key
-        )
-
-        button_text_loc = Localization.objects.create(
-            identifier = f"{dialogue_prompt_key}_button_text",
-            key= f"loc_{dialogue_prompt_key}_button_text",
-            english="COMPLETAR button Text de " + dialogue_prompt_key,
-            spanish="COMPLETAR button Text de" + dialogue_prompt_key,
-        )
-
-        dialogue = Dialogue.objects.create(
-            identifier = quest_key,
-            key= dialogue_prompt_key,
-            npc = instance.npc_giver,
-            type = DialogueTypes.QUEST_PROMPT,
-            button_text = button_text_loc
-        )
-
-        dialogue.no_appear_conditions.add(quest_stared_condition)
-
-        # Quest Prompt dialogue subtype
-        # Text
-        singleitem_text_key = dSingleItemKeyGenerator.generate_key(
-            prefix = DialogueSingleItem.prefix,
-            slug = dialogue_prompt_key,
-            suffix = 'single_item'
-        )
-
-        singleitem_text_loc = Localization.objects.create(
-            identifier = f"{singleitem_text_key}_text",
-            key= f"loc_{singleitem_text_key}_text",
-            english="COMPLETAR dialogue single item text de " + singleitem_text_key,
-            spanish="COMPLETAR dialogue single item text de " + singleitem_text_key,
-        )
-
-        singleitem_text = DialogueSingleItem.objects.create(
-            identifier = f"{dialogue_prompt_key}_single_item",
-            key= singleitem_text_key,
-            text = singleitem_text_loc,
-            speaker = False,
-        )
-
-        # Deny Text
-        singleitem_deny_text_key = dSingleItemKeyGenerator.generate_key(
-            prefix = DialogueSingleItem.prefix,
-            slug = dialogue_prompt_key,
-            suffix = 'deny_single_item'
-        )
-
-        singleitem_deny_text_loc = Localization.objects.create(
-            identifier = f"{singleitem_deny_text_key}_text",
-            key= f"loc_{singleitem_deny_text_key}_text",
-            english="COMPLETAR dialogue deny single item text de " + singleitem_deny_text_key,
-            spanish="COMPLETAR dialogue deny single item text de " + singleitem_deny_text_key,
-        )
-
-        singleitem_deny_text = DialogueSingleItem.objects.create(
-            identifier = f"{dialogue_prompt_key}_deny_single_item",
-            key= singleitem_deny_text_key,
-            text = singleitem_deny_text_loc,
-            speaker = True,
-        )
-
-        # Accept Text
-        singleitem_accept_text_key = dSingleItemKeyGenerator.generate_key(
-            prefix = DialogueSingleItem.prefix,
-            slug = dialogue_prompt_key,
-            suffix = 'accept_single_item'
-        )
-
-        singleitem_accept_text_loc = Localization.objects.create(
-            identifier = f"{singleitem_accept_text_key}_text",
-            key= f"loc_{singleitem_accept_text_key}_text",
-            english="COMPLETAR dialogue accept single item text de " + singleitem_accept_text_key,
-            spanish="COMPLETAR dialogue accept single item text de " + singleitem_accept_text_key,
-        )
-
-        singleitem_accept_text = DialogueSingleItem.objects.create(
-            identifier = f"{dialogue_prompt_key}_accept_single_item",
-            key= singleitem_accept_text_key,
-            text = singleitem_accept_text_loc,
-            speaker = True,
-        )
-
-        QuestPrompt.objects.create(
-            dialogue = dialogue,
-            text = singleitem_text,
-            deny_text = singleitem_deny_text,
-            acccept_text = singleitem_accept_text,
-            quest = instance
-        )
-
-        # Quest End
-        dialogue_end_key = dKeyGenerator.generate_key(
-            prefix=Dialogue.prefix,
-            type=DialogueTypes.QUEST_END,
-            npc=instance.npc_giver.key,
-            slug=quest_key
-        )
-        end_button_text_loc = Localization.objects.create(
-            identifier = f"{dialogue_end_key}_button_text",
-            key= f"loc_{dialogue_end_key}_button_text",
-            english="COMPLETAR button Text de " + dialogue_end_key,
-            spanish="COMPLETAR button Text de" + dialogue_end_key,
-        )
-
-        dialogue_end = Dialogue.objects.create(
-            identifier = quest_key,
-            key= dialogue_end_key,
-            npc = instance.npc_giver,
-            type = DialogueTypes.QUEST_END,
-            button_text = end_button_text_loc
-        )
-
-        # Dialogue end Conditions
-        dialogue_end.appear_conditions.add(quest_stared_condition)
-        dialogue_end.no_appear_conditions.add(quest_ended_condition)
-        dialogue_end.trigger_id_conditions.add(quest_ended_condition)
-
-        dialogue_sequence_end_key = dSequenceKeyGenerator.generate_key(
-            slug=dialogue_end_key
-        )
-
-        # Dialogue Sequence
-        dialogue_sequence_end = DialogueSequence.objects.create(
-            identifier = dialogue_end_key,
-            key = dialogue_sequence_end_key,
-        )
-
-        # Dialogue Sequence Item
-        # Dialogue Sequence Item Key
-        sequence_item_key = dSequenceItemKeyGenerator.generate_key(
-            prefix=DialogueSequenceItem.prefix,
-            dialogue_key=dialogue_sequence_end_key,
-            slug="A",
-            dialogue_item_index="1",
-        )
-
-        # Dialogue Sequence Item Text
-        dialogue_seq_item_loc = Localization.objects.create(
-            identifier = f"{sequence_item_key}_text",
-            key= f"loc_{sequence_item_key}_text",
-            english="COMPLETAR sequence item text de " + sequence_item_key,
-            spanish="COMPLETAR sequence item text de" + sequence_item_key,
-        )    
-
-        DialogueSequenceItem.objects.create(
-            identifier = "A",
-            key=sequence_item_key,
-            text = dialogue_seq_item_loc,
-            speaker = False,
-            index = 1,
-            sequence = dialogue_sequence_end
-        )
-
-        # Dialogue Quest End
-        QuestEnd.objects.create(
-            dialogue = dialogue_end,
-            sequence = dialogue_sequence_end,
-            quest = instance
-        )
-
-        # Asocio la condición del anteultimo questobjective al appear conditions del quest end
-        # Definimos una acción diferida para después del commit
-        def link_conditions_after_commit():
-            all_conditions = Condition.objects.filter(
-                Q(identifier__contains=quest_key) & Q(identifier__contains='questobjective')
-            ).order_by('identifier')
-
-            # Si hay mas de 1 quest objective agrego el anteultimo, sino no agrego nada.
-            dialogue_end.appear_conditions.add(all_conditions[len(all_conditions) -2] if len(all_conditions) > 1 else None)
-
-        transaction.on_commit(link_conditions_after_commit)
+        # Conditions, dialogues de prompt/end y textos (ver scaffolding.py).
+        scaffold_quests([instance])
     
 @receiver(post_save, sender=QuestObjective)
 def crear_quest_objectives(sender, instance, created, **kwargs):
@@ -251,93 +82,14 @@ def crear_quest_objectives(sender, instance, created, **kwargs):
             identifier= f"{key}",
             key= f"condition_{key}",
             use_identifier=True,
+            source_quest_objective=instance,
         )  
 
 @receiver(post_save, sender=NPC)
 def crear_first_talk(sender, instance, created, **kwargs):
     if created:
-        npc_key = instance.key
-
-        # Dialogue Basic key
-        dialogue_basic_key = dKeyGenerator.generate_key(
-            prefix=Dialogue.prefix,
-            type=DialogueTypes.BASIC,
-            npc=npc_key,
-            slug='first_talk'
-        )
-
-        # first talk Condition
-        first_talk_ok_condition = Condition.objects.create(
-            identifier= f"{dialogue_basic_key}_ok",
-            key= f"condition_{dialogue_basic_key}_ok",
-            use_identifier=True,
-        )
-     
-        # Dialogue button text
-        button_text_loc = Localization.objects.create(
-            identifier = f"{dialogue_basic_key}_button_text",
-            key= f"loc_{dialogue_basic_key}_button_text",
-            english="COMPLETAR button Text de " + dialogue_basic_key,
-            spanish="COMPLETAR button Text de" + dialogue_basic_key,
-        )
-
-        dialogue = Dialogue.objects.create(
-            identifier = 'First Talk',
-            key= dialogue_basic_key,
-            npc = instance,
-            type = DialogueTypes.BASIC,
-            button_text = button_text_loc
-        )
-        
-        # Dialogue Sequence Key
-        dialogue_sequence_basic_key = dSequenceKeyGenerator.generate_key(
-            slug=dialogue_basic_key
-        )
-
-        # Dialogue Sequence
-        dialogue_sequence = DialogueSequence.objects.create(
-            identifier = dialogue_basic_key,
-            key = dialogue_sequence_basic_key,
-        )
-
-        # Dialogue Sequence Item
-        # Dialogue Sequence Item Key
-        sequence_item_key = dSequenceItemKeyGenerator.generate_key(
-            prefix=DialogueSequenceItem.prefix,
-            dialogue_key=dialogue_basic_key,
-            slug="A",
-            dialogue_item_index="1",
-        )
-
-        # Dialogue Sequence Item Text
-        dialogue_seq_item_loc = Localization.objects.create(
-            identifier = f"{sequence_item_key}_text",
-            key= f"loc_{sequence_item_key}_text",
-            english="COMPLETAR sequence item text de " + sequence_item_key,
-            spanish="COMPLETAR sequence item text de" + sequence_item_key,
-        )    
-
-        DialogueSequenceItem.objects.create(
-            identifier = "A",
-            key=sequence_item_key,
-            text = dialogue_seq_item_loc,
-            speaker = False,
-            index = 1,
-            sequence = dialogue_sequence
-        )
-
-        Basic.objects.create(
-            dialogue = dialogue,
-            is_first_talk = True,
-            is_one_shot = False,
-            sequence = dialogue_sequence
-        )
-
-        dialogue.no_appear_conditions.add(first_talk_ok_condition)
-        dialogue.trigger_id_conditions.add(first_talk_ok_condition)
-
-
-
+        # Dialogue de first talk con su condition, secuencia y textos (ver scaffolding.py).
+        scaffold_first_talks([instance])
 
 # Se ejecuta cuando Django carga las apps
 auto_register_post_deletes()
\ No newline at end of file
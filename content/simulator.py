@@ -0,0 +1,347 @@
+"""
+Simulador headless de la progresión de quests.
+
+Arranca sin ninguna condition disparada y con el inventario vacío y aplica
+todo lo que el jugador podría hacer:
+
+- Dialogues: si cumplen appear/no_appear y required_items disparan sus
+  triggers, sacan remove_items y dan give_items. Aceptar un QuestPrompt
+  dispara el inicio de la quest y el QuestEnd da las recompensas.
+- POIs: siempre se pueden visitar y disparan sus trigger_conditions.
+- Items de gameplay: los que se piden pero ningún dialogue ni recompensa da
+  (drops, recolección) se pueden conseguir en cualquier momento.
+- QuestObjectives: los completa el gameplay, así que se pueden disparar
+  una vez iniciada la quest y completado el objetivo anterior. El último es
+  volver con el NPC (por eso el QuestEnd depende del anteúltimo, ver
+  signals.crear_quest) y lo completa el QuestEnd.
+
+Un estado es (bitset de conditions, inventario). Las conditions se codifican
+como bits de un int y el inventario como tupla de cantidades topeadas a lo
+máximo que algo pide, así los estados se hashean rápido y el espacio es finito.
+"""
+import time
+from collections import deque
+from .condition_graph import get_quest_condition_ids
+from .models import (
+    Condition,
+    Dialogue,
+    DialogItemsRequired,
+    DialogItemsToRemove,
+    DialogItemsToGive,
+    ItemReward,
+    POI,
+    Quest,
+    QuestPrompt,
+    QuestEnd,
+)
+
+DEFAULT_MAX_STATES = 200000
+
+class Action:
+    __slots__ = ('kind', 'key', 'appear', 'no_appear', 'trigger', 'required', 'remove', 'give')
+
+    def __init__(self, kind, key):
+        self.kind = kind
+        self.key = key
+        self.appear = 0
+        self.no_appear = 0
+        self.trigger = 0
+        # (índice del item, cantidad)
+        self.required = []
+        self.remove = []
+        self.give = []
+
+class QuestSimulator:
+    def __init__(self):
+        condition_ids = list(Condition.objects.order_by('id').values_list('id', 'key'))
+        self.condition_keys = [key for _, key in condition_ids]
+        self.condition_bits = {pk: 1 << index for index, (pk, _) in enumerate(condition_ids)}
+
+        # Cada quest tiene además un bit propio "terminada" a continuación de las conditions.
+        quests = list(Quest.objects.order_by('id').values_list('id', 'key'))
+        self.quest_keys = [key for _, key in quests]
+        self.quest_done_bits = {key: 1 << (len(condition_ids) + index) for index, key in enumerate(self.quest_keys)}
+
+        started = get_quest_condition_ids()
+        self.quest_started_bits = {key: self.condition_bits.get(started.get(pk), 0) for pk, key in quests}
+
+        self.item_keys = []
+        self.item_indexes = {}
+        self.actions = []
+
+        self._load_dialogues()
+        self._load_pois()
+        self._load_objectives()
+
+        # Más de lo máximo que se pide o se saca de un item no cambia nada.
+        caps = [0] * len(self.item_keys)
+        for action in self.actions:
+            for index, amount in action.required + action.remove:
+                caps[index] = max(caps[index], amount)
+        self.item_caps = tuple(caps)
+
+        self._load_gameplay_items()
+
+        self._gate_cache = {}
+
+    def _item_index(self, item_key):
+        if item_key not in self.item_indexes:
+            self.item_indexes[item_key] = len(self.item_keys)
+            self.item_keys.append(item_key)
+
+        return self.item_indexes[item_key]
+
+    def _load_dialogues(self):
+        dialogues = {}
+        for pk, key in Dialogue.objects.values_list('id', 'key'):
+            dialogues[pk] = Action('dialogue', key)
+
+        for field_name, attr in (
+            ('appear_conditions', 'appear'),
+            ('no_appear_conditions', 'no_appear'),
+            ('trigger_id_conditions', 'trigger'),
+            ('trigger_diary_conditions', 'trigger'),
+        ):
+            field = Dialogue._meta.get_field(field_name)
+            through = field.remote_field.through
+            pairs = through.objects.values_list(f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id")
+
+            for dialogue_pk, condition_pk in pairs:
+                action = dialogues[dialogue_pk]
+                setattr(action, attr, getattr(action, attr) | self.condition_bits[condition_pk])
+
+        for through, attr in ((DialogItemsRequired, 'required'), (DialogItemsToRemove, 'remove'), (DialogItemsToGive, 'give')):
+            for dialogue_pk, item_key, amount in through.objects.values_list('dialogue_id', 'item__key', 'amount'):
+                getattr(dialogues[dialogue_pk], attr).append((self._item_index(item_key), amount))
+
+        self.prompted_quests = set()
+        for dialogue_pk, quest_key in QuestPrompt.objects.values_list('dialogue_id', 'quest__key'):
+            dialogues[dialogue_pk].trigger |= self.quest_started_bits[quest_key]
+            self.prompted_quests.add(quest_key)
+
+        rewards = {}
+        for quest_key, item_key, amount in ItemReward.objects.values_list('quest__key', 'item__key', 'amount'):
+            rewards.setdefault(quest_key, []).append((self._item_index(item_key), amount))
+
+        self.quest_end_actions = {}
+        for dialogue_pk, quest_key in QuestEnd.objects.values_list('dialogue_id', 'quest__key'):
+            action = self.quest_end_actions[quest_key] = dialogues[dialogue_pk]
+            action.trigger |= self.quest_done_bits[quest_key]
+            action.give = action.give + rewards.get(quest_key, [])
+
+        self.actions.extend(dialogues.values())
+
+    def _load_pois(self):
+        pois = {pk: Action('poi', key) for pk, key in POI.objects.values_list('id', 'key')}
+
+        for poi_pk, condition_pk in POI.trigger_conditions.through.objects.values_list('poi_id', 'condition_id'):
+            pois[poi_pk].trigger |= self.condition_bits[condition_pk]
+
+        self.actions.extend(action for action in pois.values() if action.trigger)
+
+    def _load_objectives(self):
+        objectives = {}
+        conditions = Condition.objects.filter(source_quest_objective__isnull=False).order_by(
+            'source_quest_objective__quest_id', 'source_quest_objective__index'
+        ).values_list('id', 'source_quest_objective__key', 'source_quest_objective__quest__key')
+
+        for condition_pk, objective_key, quest_key in conditions:
+            objectives.setdefault(quest_key, []).append((objective_key, self.condition_bits[condition_pk]))
+
+        for quest_key, quest_objectives in objectives.items():
+            started = self.quest_started_bits[quest_key]
+            if not started:
+                continue
+
+            quest_end = self.quest_end_actions.get(quest_key)
+            if quest_end is not None:
+                _, last_bit = quest_objectives.pop()
+                quest_end.trigger |= last_bit
+
+            previous = 0
+            for objective_key, bit in quest_objectives:
+                action = Action('objective', objective_key)
+                action.appear = started | previous
+                action.no_appear = bit
+                action.trigger = bit
+                self.actions.append(action)
+
+                previous = bit
+
+    def _load_gameplay_items(self):
+        # Lo que se pide pero ningún dialogue ni recompensa da sale del gameplay
+        # (drops, cofres, recolección): se puede conseguir en cualquier momento.
+        given = {index for action in self.actions for index, _ in action.give}
+
+        for index, item_key in enumerate(self.item_keys):
+            if index not in given and self.item_caps[index]:
+                action = Action('gameplay', item_key)
+                action.give = [(index, self.item_caps[index])]
+                self.actions.append(action)
+
+    def _gated_actions(self, mask):
+        # Las acciones habilitadas por conditions solo dependen del bitset,
+        # así que se calculan una vez por máscara y se reusan para cada inventario.
+        actions = self._gate_cache.get(mask)
+        if actions is None:
+            actions = self._gate_cache[mask] = [
+                action for action in self.actions
+                if action.appear & mask == action.appear and not action.no_appear & mask
+            ]
+
+        return actions
+
+    def successors(self, state):
+        """
+        (acción, estado siguiente) por cada acción disponible que cambia el estado.
+        """
+        mask, inventory = state
+
+        for action in self._gated_actions(mask):
+            if any(inventory[index] < amount for index, amount in action.required):
+                continue
+
+            next_inventory = inventory
+            if action.remove or action.give:
+                counts = list(inventory)
+                for index, amount in action.remove:
+                    counts[index] = max(counts[index] - amount, 0)
+                for index, amount in action.give:
+                    counts[index] = min(counts[index] + amount, self.item_caps[index])
+                next_inventory = tuple(counts)
+
+            next_state = (mask | action.trigger, next_inventory)
+            if next_state != state:
+                yield action, next_state
+
+    def initial_state(self):
+        return (0, (0,) * len(self.item_keys))
+
+    def explore(self, max_states=DEFAULT_MAX_STATES):
+        """
+        BFS sobre los estados alcanzables. Devuelve un SimulationResult.
+        """
+        start = time.perf_counter()
+        initial = self.initial_state()
+
+        # Cada estado se hashea una sola vez: después se lo referencia por su índice.
+        state_ids = {initial: 0}
+        states = [initial]
+        parents = [None]
+        edges = []
+        queue = deque([0])
+        truncated = False
+
+        while queue:
+            state_id = queue.popleft()
+            next_ids = []
+
+            for action, next_state in self.successors(states[state_id]):
+                next_id = state_ids.get(next_state)
+                if next_id is None:
+                    if len(states) >= max_states:
+                        truncated = True
+                        continue
+
+                    next_id = state_ids[next_state] = len(states)
+                    states.append(next_state)
+                    parents.append((state_id, action.key))
+                    queue.append(next_id)
+
+                next_ids.append(next_id)
+
+            edges.append(next_ids)
+
+        # Los estados que quedaron sin expandir por el límite no tienen aristas.
+        edges.extend([] for _ in range(len(states) - len(edges)))
+
+        return SimulationResult(self, states, parents, edges, truncated, time.perf_counter() - start)
+
+    def describe_mask(self, mask):
+        return [key for index, key in enumerate(self.condition_keys) if mask >> index & 1]
+
+class SimulationResult:
+    def __init__(self, simulator, states, parents, edges, truncated, elapsed):
+        self.simulator = simulator
+        self.states = states
+        self.parents = parents
+        self.edges = edges
+        self.truncated = truncated
+        self.elapsed = elapsed
+
+    @property
+    def states_per_second(self):
+        return len(self.states) / self.elapsed if self.elapsed else 0
+
+    def path_to(self, state_id):
+        """
+        Acciones desde el estado inicial (camino más corto, por ser BFS).
+        """
+        path = []
+        while self.parents[state_id] is not None:
+            state_id, action_key = self.parents[state_id]
+            path.append(action_key)
+
+        return path[::-1]
+
+    def _can_reach(self, bit):
+        # Estados desde los que todavía se puede llegar a uno con el bit prendido.
+        reverse = [[] for _ in self.states]
+        for state_id, next_ids in enumerate(self.edges):
+            for next_id in next_ids:
+                reverse[next_id].append(state_id)
+
+        reached = {state_id for state_id, (mask, _) in enumerate(self.states) if mask & bit}
+        queue = deque(reached)
+        while queue:
+            for previous_id in reverse[queue.popleft()]:
+                if previous_id not in reached:
+                    reached.add(previous_id)
+                    queue.append(previous_id)
+
+        return reached
+
+    def quest_report(self):
+        """
+        Por quest: si se puede iniciar, si se puede terminar y los soft-locks
+        (estados con la quest iniciada desde los que ya no se puede terminar).
+        """
+        simulator = self.simulator
+        union = 0
+        for mask, _ in self.states:
+            union |= mask
+
+        report = []
+        for quest_key in simulator.quest_keys:
+            started_bit = simulator.quest_started_bits[quest_key]
+            done_bit = simulator.quest_done_bits[quest_key]
+            entry = {
+                'quest': quest_key,
+                'startable': bool(started_bit and union & started_bit),
+                'completable': bool(union & done_bit),
+                'soft_locks': 0,
+                'soft_lock_example': None,
+                # Sin QuestPrompt ni QuestEnd es un borrador (igual que en validation.py).
+                'draft': quest_key not in simulator.prompted_quests and quest_key not in simulator.quest_end_actions,
+            }
+
+            if entry['startable'] and not self.truncated:
+                can_complete = self._can_reach(done_bit)
+                soft_locks = [
+                    state_id for state_id, (mask, _) in enumerate(self.states)
+                    if mask & started_bit and state_id not in can_complete
+                ]
+                entry['soft_locks'] = len(soft_locks)
+                if soft_locks:
+                    mask, _ = self.states[soft_locks[0]]
+                    entry['soft_lock_example'] = {
+                        'path': self.path_to(soft_locks[0]),
+                        'conditions': simulator.describe_mask(mask),
+                    }
+
+            report.append(entry)
+
+        return report
+
+def simulate(max_states=DEFAULT_MAX_STATES):
+    return QuestSimulator().explore(max_states=max_states)
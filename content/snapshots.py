@@ -0,0 +1,234 @@
+"""
+Snapshots de exports por release, direccionados por contenido.
+
+Cada registro de los exports (el dict de to_dict_item) se guarda una sola vez
+en objects/ con su sha256 como nombre. Un release es solo un manifest con
+{colección: {id del registro: hash}}, así que sacar un snapshot de un release
+casi igual al anterior no escribe casi nada y comparar dos releases es comparar
+hashes.
+
+    <CONTENT_SNAPSHOTS_DIR>/
+        objects/ab/cdef....json
+        releases/<release>.json
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections
+from .models import Localization, Quest, Item, Dialogue, DiaryPage
+
+# Campos que identifican a un registro dentro de su colección, en orden de prioridad.
+RECORD_ID_FIELDS = ('ID', 'DialogueID', 'PageID', 'EntryID', 'Key')
+
+_release_name = re.compile(r"^[\w.-]+$")
+
+class SnapshotError(ValueError):
+    pass
+
+def build_export_collections():
+    """
+    Las mismas colecciones que bajan los download-* del admin.
+    """
+    collections = {}
+    for model in (Quest, Item, Dialogue, DiaryPage):
+        collections.update(model.to_dict2())
+
+    collections['Localizations'] = [
+        {"Key": key, "English": english, "Spanish": spanish}
+        for key, english, spanish in Localization.objects.order_by('key').values_list('key', 'english', 'spanish').iterator(chunk_size=2000)
+    ]
+
+    return collections
+
+def get_record_id(record):
+    if 'ItemData' in record:
+        return record['ItemData']['ID']
+
+    for field_name in RECORD_ID_FIELDS:
+        if field_name in record:
+            return record[field_name]
+
+    return None
+
+def canonical_bytes(record):
+    # Orden de keys fijo para que el mismo contenido dé siempre el mismo hash.
+    return json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+class SnapshotStore:
+    def __init__(self, root=None):
+        self.root = str(root or getattr(settings, 'CONTENT_SNAPSHOTS_DIR', os.path.join(settings.BASE_DIR, 'snapshots')))
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.releases_dir = os.path.join(self.root, 'releases')
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest[2:]}.json")
+
+    def _release_path(self, name):
+        if not _release_name.match(name):
+            raise SnapshotError(f"Nombre de release inválido: {name}")
+
+        return os.path.join(self.releases_dir, f"{name}.json")
+
+    def put_record(self, record):
+        """
+        Guarda el registro si no existía. Devuelve (hash, si se escribió).
+        """
+        content = canonical_bytes(record)
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+
+        if os.path.exists(path):
+            return digest, False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        return digest, True
+
+    def get_record(self, digest):
+        with open(self._object_path(digest), encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_release(self, name, collections):
+        """
+        Guarda los registros nuevos y el manifest del release.
+        Devuelve (manifest, cantidad de registros escritos).
+        """
+        written = 0
+        manifest_collections = {}
+
+        for collection, records in collections.items():
+            entries = manifest_collections[collection] = {}
+            for index, record in enumerate(records):
+                digest, is_new = self.put_record(record)
+                written += is_new
+
+                record_id = get_record_id(record)
+                if record_id is None or record_id in entries:
+                    # Sin id propio (o repetido) se identifica por su posición.
+                    record_id = f"#{index}"
+                entries[record_id] = digest
+
+        manifest = {
+            "name": name,
+            "created_at": datetime.now().isoformat(timespec='seconds'),
+            "collections": manifest_collections,
+        }
+
+        os.makedirs(self.releases_dir, exist_ok=True)
+        with open(self._release_path(name), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        return manifest, written
+
+    def load_manifest(self, name):
+        path = self._release_path(name)
+        if not os.path.exists(path):
+            raise SnapshotError(f"No existe el release {name}.")
+
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def list_releases(self):
+        if not os.path.isdir(self.releases_dir):
+            return []
+
+        return sorted(
+            os.path.splitext(filename)[0]
+            for filename in os.listdir(self.releases_dir) if filename.endswith('.json')
+        )
+
+def snapshot_release(name, store=None):
+    """
+    Saca el snapshot del contenido actual de la base como release name.
+    """
+    store = store or SnapshotStore()
+    return store.save_release(name, build_export_collections())
+
+@contextmanager
+def use_sqlite_dump(path):
+    """
+    Apunta la base default a una copia del dump SQLite (p. ej. los de databasedumps/)
+    migrada al esquema actual, para poder exportar su contenido. Solo para comandos:
+    todo lo que corra en el proceso mientras tanto lee del dump, así que desde la
+    web hay que usar snapshot_dump.
+    """
+    connection = connections['default']
+    if connection.vendor != 'sqlite':
+        raise SnapshotError("Leer dumps SQLite requiere que la base default sea SQLite.")
+
+    if not os.path.exists(path):
+        raise SnapshotError(f"No existe el dump {path}.")
+
+    tmp_dir = tempfile.mkdtemp(prefix='content-dump-')
+    original_name = connection.settings_dict['NAME']
+
+    try:
+        dump_copy = os.path.join(tmp_dir, os.path.basename(path))
+        shutil.copyfile(path, dump_copy)
+
+        connection.close()
+        connection.settings_dict['NAME'] = dump_copy
+        call_command('migrate', verbosity=0, interactive=False)
+
+        yield dump_copy
+
+    finally:
+        connection.close()
+        connection.settings_dict['NAME'] = original_name
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def snapshot_dump(path, name, store):
+    """
+    Snapshot de un dump SQLite en store, sacado en un proceso aparte con
+    snapshot_release --from-dump para no tocar la conexión de este proceso.
+    """
+    if not os.path.exists(path):
+        raise SnapshotError(f"No existe el dump {path}.")
+
+    result = subprocess.run(
+        [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'snapshot_release', name,
+            '--from-dump', path, '--store', store.root,
+        ],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SnapshotError(f"No se pudo leer el dump {path}: {result.stderr.strip()}")
+
+    return store.load_manifest(name)
+
+def compare_manifests(manifest_a, manifest_b):
+    """
+    Ids agregados, borrados y cambiados por colección, comparando solo hashes.
+    """
+    result = {}
+    collections_a = manifest_a['collections']
+    collections_b = manifest_b['collections']
+
+    for collection in sorted(collections_a.keys() | collections_b.keys()):
+        entries_a = collections_a.get(collection, {})
+        entries_b = collections_b.get(collection, {})
+
+        result[collection] = {
+            'added': sorted(entries_b.keys() - entries_a.keys()),
+            'removed': sorted(entries_a.keys() - entries_b.keys()),
+            'changed': sorted(
+                record_id for record_id in entries_a.keys() & entries_b.keys()
+                if entries_a[record_id] != entries_b[record_id]
+            ),
+        }
+
+    return result
@@ -1,3 +1,1155 @@
-from django.test import TestCase
+import csv
+import json
+import random
+from datetime import timedelta
+import os
+import shutil
+import subprocess
+import tempfile
+from io import StringIO
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
 
-# Create your tests here.
+from .binary_export import encode, decode, BinaryExportError
+from .utils import KEY_GENERATORS
+from .management.commands.export_key_spec import get_key_spec_path, dump_key_spec
+from .models import Localization, NPC, Quest, QuestObjective, Condition, ConditionRoles, Dialogue, Basic, QuestPrompt, QuestEnd, KeyReservation, ExportJob, ExportJobKinds, ExportJobStatuses, Item, ItemAttributes, ItemTypes, Rarity, WeaponType, DiaryPage, DiaryEntry, DialogueSingleItem, DialogueSequenceItem, Weapon, WeaponAttackSequence, AttackSequence, DamageType, DialogItemsRequired, DialogItemsToRemove, DialogItemsToGive
+from .key_reservations import KeyCollisionError, suffix_collisions, resolve_keys, reserve_keys
+from .scaffolding import create_npcs, create_quests, iter_npc_rows
+from .validation import ERROR, validate_fresh
+from .simulator import simulate
+from .paginators import KeysetPaginator, estimate_count
+from .localizations import iter_json_rows
+from .translation_memory import normalize_text, loose_normalize_text, text_hash, find_duplicates, suggest_translations
+from .admin import LocalizationAdmin
+from .localizations import get_translation_report
+from .condition_graph import GRAPH_VERSION_CACHE_KEY, get_condition_graph
+from .exports import copy_to_legacy_path, fail_stale_jobs
+from . import export_formats, profiling
+from .diffs import CURRENT_DB, diff_values, iter_diff, open_source
+from .snapshots import SnapshotStore, SnapshotError, build_export_collections, canonical_bytes, compare_manifests, snapshot_release
+from .export_formats import ExportFormatError, get_export_format
+
+class BinaryExportTests(SimpleTestCase):
+    def test_round_trip(self):
+        data = {
+            "Quests": [
+                {
+                    "ID": "quest_prove_yourself",
+                    "TitleKey": "loc_quest_prove_yourself_title",
+                    "Objectives": [{"index": 1, "ID": "questobjective_1", "IsAddedToCompletitions": True}],
+                    "RewardMoney": 150,
+                    "RewardsItems": [],
+                },
+                {
+                    "ID": "quest_the_vigil",
+                    "TitleKey": "loc_quest_the_vigil_title",
+                    "Objectives": [],
+                    "RewardMoney": 2**40,
+                    "RewardsItems": [{"ID": "item_amulet", "Quantity": 1}],
+                },
+            ],
+            "Attributes": {"Cooldown": {"AttType": 1, "Value": 0.25}, "Armor": -3, "Prefab": None, "Text": "Canción"},
+        }
+
+        self.assertEqual(decode(encode(data)), data)
+
+    def test_repeated_strings_are_stored_once(self):
+        data = [{"ID": "loc_dialogue_shop_thanks"} for _ in range(100)]
+        encoded = encode(data)
+
+        self.assertEqual(encoded.count(b"loc_dialogue_shop_thanks"), 1)
+        self.assertEqual(decode(encoded), data)
+
+    def test_invalid_magic(self):
+        with self.assertRaises(BinaryExportError):
+            decode(b"JSON" + encode([])[4:])
+
+
+class ExportFormatTests(SimpleTestCase):
+    data = {
+        "Items": [{"ID": "item_amulet", "NameKey": "loc_item_amulet_name", "Price": 2**40, "Weight": 0.25, "Prefab": None}],
+        "Text": "Canción",
+    }
+
+    def test_json(self):
+        self.assertEqual(json.loads(get_export_format('json').dumps(self.data)), self.data)
+
+    @skipUnless(export_formats.msgpack, "msgpack no está instalado")
+    def test_msgpack_round_trip(self):
+        encoded = get_export_format('msgpack').dumps(self.data)
+
+        self.assertEqual(export_formats.msgpack.unpackb(encoded, raw=False), self.data)
+
+    @skipUnless(export_formats.cbor2, "cbor2 no está instalado")
+    def test_cbor_round_trip(self):
+        encoded = get_export_format('cbor').dumps(self.data)
+
+        self.assertEqual(export_formats.cbor2.loads(encoded), self.data)
+
+    def test_missing_library(self):
+        with mock.patch.object(export_formats, 'msgpack', None):
+            with self.assertRaisesMessage(ExportFormatError, "necesita instalar msgpack"):
+                get_export_format('msgpack')
+
+    def test_unknown_format(self):
+        with self.assertRaises(ExportFormatError):
+            get_export_format('xml')
+
+# Letras con acentos, espacios raros, compatibilidad (ﬁ, ①, Ⅻ) y pedazos de keys reales.
+KEY_CORPUS_ALPHABET = (
+    list("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-.,'!?/() ")
+    + list("áéíóúñüÁÉÍÓÚÑçÇàèÀ")
+    + list("\t\n\xa0\u2003\u3000\x1f\ufeff")
+    + list("ﬁ①Ⅻ²ßİΣ")
+    + ["npc_", "dialogue_", "_", "  "]
+)
+
+def random_key_value(rng):
+    return "".join(rng.choice(KEY_CORPUS_ALPHABET) for _ in range(rng.randint(0, 12)))
+
+class JSONImportRowsTests(SimpleTestCase):
+    def rows(self, data, chunk_size):
+        with mock.patch('content.localizations.JSON_CHUNK_SIZE', chunk_size):
+            return list(iter_json_rows(StringIO(json.dumps(data, indent=2, ensure_ascii=False))))
+
+    def test_streamed_across_chunk_boundaries(self):
+        entries = [{"Key": f" loc_npc_{index} ", "English": "\"Hola\" ñ" * index, "Spanish": ""} for index in range(50)]
+        expected = [(f"loc_npc_{index}", "\"Hola\" ñ" * index, "") for index in range(50)]
+
+        for chunk_size in (1, 3, 7, 4096):
+            # Otras claves antes y después de entries se ignoran, con números cortados por el chunk.
+            self.assertEqual(self.rows({"version": 1.5e10, "tables": [{"id": "]"}], "entries": entries, "total": 50}, chunk_size), expected)
+            self.assertEqual(self.rows(entries, chunk_size), expected)
+            self.assertEqual(self.rows({"entries": []}, chunk_size), [])
+
+    def test_reads_only_what_it_needs(self):
+        text = json.dumps({"entries": [{"Key": f"loc_{index}", "English": "x" * 100} for index in range(1000)]})
+        stream = StringIO(text)
+
+        with mock.patch('content.localizations.JSON_CHUNK_SIZE', 1024):
+            rows = iter_json_rows(stream)
+            self.assertEqual(next(rows)[0], 'loc_0')
+            self.assertLess(stream.tell(), 4096)
+
+    def test_invalid_json(self):
+        for text in ('{"entries": [{"Key": "a"} {"Key": "b"}]}', '{"entries": [1]}', '{"entries": [{"Key": "a"}', ''):
+            with self.assertRaises(ValueError):
+                list(iter_json_rows(StringIO(text)))
+
+class KeySpecParityTests(SimpleTestCase):
+    def test_spec_file_is_up_to_date(self):
+        self.assertEqual(get_key_spec_path().read_text(encoding="utf-8"), dump_key_spec())
+
+    @skipUnless(shutil.which("node"), "Hace falta node para correr key_generator.js.")
+    def test_js_matches_python(self):
+        rng = random.Random(2024)
+        cases = [
+            {"model": model, "params": {field: random_key_value(rng) for field in keygen.fields}}
+            for model, keygen in KEY_GENERATORS.items()
+            for _ in range(3000)
+        ]
+
+        script = f"""
+            const {{ generateKeyFromSpec }} = require({json.dumps(str(settings.BASE_DIR / "static" / "admin" / "js" / "key_generator.js"))});
+            const input = JSON.parse(require("fs").readFileSync(0, "utf-8"));
+            const keys = input.cases.map(c => generateKeyFromSpec(input.spec, c.model, c.params));
+            process.stdout.write(JSON.stringify(keys));
+        """
+        result = subprocess.run(
+            ["node", "-e", script],
+            input=json.dumps({"spec": json.loads(dump_key_spec()), "cases": cases}),
+            capture_output=True, text=True, encoding="utf-8", check=True,
+        )
+
+        js_keys = json.loads(result.stdout)
+        for case, js_key in zip(cases, js_keys):
+            python_key = KEY_GENERATORS[case["model"]].generate_key(**case["params"])
+            self.assertEqual(js_key, python_key, case)
+
+        self.assertEqual(len(js_keys), len(cases))
+
+class KeyGeneratorTests(SimpleTestCase):
+    def test_sanitize(self):
+        cases = {
+            "  Canción del Élder ": "cancion_del_elder",
+            "Ñandú\t": "nandu",
+            # Compatibilidad (NFKD): ligaduras, círculos y números romanos pasan a ASCII.
+            "ﬁn ① Ⅻ": "fin_1_xii",
+            "a-b.c/d (e)!": "abcd_e",
+            "\u3000quest_meet\u2003": "quest_meet",
+            "日本": "",
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(KEY_GENERATORS["DialogueSequence"].sanitize(value), expected)
+
+    def test_values_are_not_searched_in_the_template(self):
+        # Un NPC que contiene el nombre de otro campo ("slug") no rompe la key.
+        keygen = KEY_GENERATORS["Dialogue"]
+        self.assertEqual(keygen.generate_key(prefix="dialogue_", type="basic", npc="npc_slugger", slug="Hola Mundo"), "dialogue_basic_slugger_hola_mundo")
+        self.assertEqual(keygen.generate_key(prefix="dialogue_", type="basic", npc=None, slug="hi"), "dialogue_basic__hi")
+
+        keygen = KEY_GENERATORS["DialogueSequenceItem"]
+        self.assertEqual(
+            keygen.generate_key(prefix="dialogue_sequence_item_", dialogue_key="dialogue_basic_elder_hi", slug="Línea", dialogue_item_index=2),
+            "dialogue_sequence_item_basic_elder_hi_linea_2",
+        )
+
+class KeyEndpointTests(TestCase):
+    def post(self, model, body):
+        return self.client.post(f'/content/generate_keys/{model}/', body, content_type='application/json')
+
+    def test_generate_keys(self):
+        rows = [
+            {"prefix": "questobjective_", "quest_key": "quest_meet", "slug": f"Paso {index}", "quest_objective_index": index}
+            for index in range(1, 4)
+        ]
+        body = json.dumps({"rows": rows})
+        self.assertEqual(self.post('QuestObjective', body).status_code, 302)
+
+        self.client.force_login(get_user_model().objects.create_user('editor', is_staff=True))
+        response = self.post('QuestObjective', body)
+        self.assertEqual(response.json(), {"keys": [f"questobjective_quest_meet_paso_{index}_{index}" for index in range(1, 4)]})
+
+        # Igual que pedirlas de a una.
+        single = [self.client.get('/content/generate_key/QuestObjective/', row).json()["key"] for row in rows]
+        self.assertEqual(response.json()["keys"], single)
+
+    def test_generate_keys_errors(self):
+        self.client.force_login(get_user_model().objects.create_user('editor', is_staff=True))
+
+        self.assertEqual(self.post('Weapon', json.dumps({"rows": []})).status_code, 400)
+        for body in ('', '[]', '{"rows": "x"}', '{"rows": [1]}', '{"keys": []}'):
+            with self.subTest(body=body):
+                self.assertEqual(self.post('DiaryEntry', body).status_code, 400)
+
+        self.assertEqual(self.client.get('/content/generate_keys/DiaryEntry/').status_code, 405)
+
+class ContentTestMixin:
+    """
+    Altas como las haría el admin (con señales y on_commit).
+    """
+    def localization(self, key):
+        return Localization.objects.create(identifier=key, key=f"loc_{key}", english=key, spanish=key)
+
+    def create_npc(self, identifier):
+        with self.captureOnCommitCallbacks(execute=True):
+            return NPC.objects.create(identifier=identifier, key=f"npc_{identifier}", name=self.localization(f"npc_{identifier}_name"))
+
+    def create_quest(self, identifier, npc, objectives=0):
+        quest_key = f"quest_{identifier}"
+        with self.captureOnCommitCallbacks(execute=True):
+            quest = Quest.objects.create(
+                identifier=identifier,
+                key=quest_key,
+                title=self.localization(f"{quest_key}_title"),
+                brief=self.localization(f"{quest_key}_brief"),
+                npc_giver=npc,
+            )
+
+            for index in range(1, objectives + 1):
+                QuestObjective.objects.create(
+                    identifier=f"step{index}",
+                    key=f"questobjective_step{index}_{quest_key}_{index}",
+                    index=index,
+                    brief=self.localization(f"{quest_key}_step{index}"),
+                    quest=quest,
+                )
+
+        return quest
+
+    def quest_scaffold(self, quest):
+        """
+        Lo que crea el scaffolding de una quest, por key.
+        """
+        prompt = QuestPrompt.objects.get(quest=quest)
+        end = QuestEnd.objects.get(quest=quest)
+        rows = {'conditions': sorted(Condition.objects.filter(source_quest=quest).values_list('key', flat=True))}
+
+        for name, subtype in (('prompt', prompt), ('end', end)):
+            dialogue = subtype.dialogue
+            rows[name] = {
+                'dialogue': dialogue.key,
+                'button_text': dialogue.button_text.key,
+                **{
+                    field_name: sorted(getattr(dialogue, field_name).values_list('key', flat=True))
+                    for field_name in ('appear_conditions', 'no_appear_conditions', 'trigger_id_conditions')
+                },
+            }
+
+        rows['prompt']['texts'] = [(item.key, item.text.key) for item in (prompt.text, prompt.deny_text, prompt.acccept_text)]
+        rows['end']['sequence'] = [(item.key, item.text.key) for item in end.sequence.items.all()]
+
+        return rows
+
+class ValidationTests(ContentTestMixin, TestCase):
+    def test_quest_with_objectives_is_valid(self):
+        npc = self.create_npc('elder')
+        self.create_quest('meet', npc, objectives=3)
+
+        errors = [issue for issue in validate_fresh() if issue.severity == ERROR]
+        self.assertEqual(errors, [], [str(issue) for issue in errors])
+
+        # El simulador tiene que estar de acuerdo.
+        report = {entry['quest']: entry for entry in simulate().quest_report()}
+        self.assertTrue(report['quest_meet']['completable'])
+
+    def test_quest_conditions_found_by_role(self):
+        npc = self.create_npc('elder')
+        quest = self.create_quest('meet', npc, objectives=2)
+
+        self.assertEqual(
+            dict(Condition.objects.filter(source_quest=quest).values_list('source_role', 'key')),
+            {ConditionRoles.QUEST_STARTED: 'condition_quest_meet', ConditionRoles.QUEST_FINISHED: 'condition_quest_meet_finished'},
+        )
+
+        # Con la key cambiada (p. ej. por un sufijo) se sigue encontrando el inicio.
+        Condition.objects.filter(source_quest=quest, source_role=ConditionRoles.QUEST_STARTED).update(key='condition_quest_meet_2')
+
+        errors = [issue for issue in validate_fresh() if issue.severity == ERROR]
+        self.assertEqual(errors, [], [str(issue) for issue in errors])
+
+        report = {entry['quest']: entry for entry in simulate().quest_report()}
+        self.assertTrue(report['quest_meet']['completable'])
+
+class SimulatorItemTests(ContentTestMixin, TestCase):
+    def item(self, identifier):
+        return Item.objects.create(
+            identifier=identifier,
+            key=f"item_{identifier}",
+            name=self.localization(f"item_{identifier}_name"),
+            description=self.localization(f"item_{identifier}_description"),
+            rarity=Rarity.objects.first(),
+            type=ItemTypes.QUEST,
+        )
+
+    def test_item_collection_quest(self):
+        npc = self.create_npc('hunter')
+        quest = self.create_quest('ears', npc, objectives=2)
+        end_dialogue = QuestEnd.objects.get(quest=quest).dialogue
+
+        # Las orejas solo salen del gameplay: nada las da.
+        ears = self.item('bandit_ear')
+        DialogItemsRequired.objects.create(dialogue=end_dialogue, item=ears, amount=5)
+        DialogItemsToRemove.objects.create(dialogue=end_dialogue, item=ears, amount=5)
+
+        report = {entry['quest']: entry for entry in simulate().quest_report()}
+        self.assertTrue(report['quest_ears']['completable'])
+        self.assertEqual(report['quest_ears']['soft_locks'], 0)
+
+    def test_item_given_by_unreachable_dialogue(self):
+        npc = self.create_npc('hunter')
+        quest = self.create_quest('ears', npc)
+        end_dialogue = QuestEnd.objects.get(quest=quest).dialogue
+
+        # Si un dialogue da el item, sale de ahí y no del gameplay.
+        key = self.item('key')
+        DialogItemsRequired.objects.create(dialogue=end_dialogue, item=key, amount=1)
+        locked = Dialogue.objects.create(identifier='locked', key='dialogue_locked', type=end_dialogue.type, npc=npc, button_text=self.localization('locked_button'))
+        locked.appear_conditions.add(Condition.objects.create(identifier='never', key='condition_never'))
+        DialogItemsToGive.objects.create(dialogue=locked, item=key, amount=1)
+
+        report = {entry['quest']: entry for entry in simulate().quest_report()}
+        self.assertTrue(report['quest_ears']['startable'])
+        self.assertFalse(report['quest_ears']['completable'])
+
+class SuffixCollisionsTests(SimpleTestCase):
+    def test_existing_and_repeated_keys(self):
+        self.assertEqual(
+            suffix_collisions(['a', 'a', 'b', 'a'], {'a', 'a_2'}),
+            ['a_3', 'a_4', 'b', 'a_5'],
+        )
+
+    def test_suffix_fits_max_length(self):
+        key = 'x' * 10
+        self.assertEqual(suffix_collisions([key, key], set(), max_length=10), [key, 'x' * 8 + '_2'])
+
+class KeyReservationTests(ContentTestMixin, TestCase):
+    def setUp(self):
+        self.create_npc('zed')
+        self.create_npc('zed_2')
+
+    def test_resolve_suffixes_against_table(self):
+        self.assertEqual(
+            resolve_keys(NPC, ['npc_zed', 'npc_zed', 'npc_other']),
+            ['npc_zed_3', 'npc_zed_4', 'npc_other'],
+        )
+
+    def test_resolve_without_suffix_raises(self):
+        with self.assertRaises(KeyCollisionError) as context:
+            resolve_keys(NPC, ['npc_zed', 'npc_new', 'npc_new'], suffix=False)
+
+        self.assertEqual(context.exception.keys, ['npc_new', 'npc_zed'])
+
+    def test_truncated_suffix_is_checked_against_table(self):
+        long_key = 'n' * 150
+        Localization.objects.create(identifier='long', key=long_key[:148] + '_2', english='', spanish='')
+        Localization.objects.create(identifier='long', key=long_key, english='', spanish='')
+
+        self.assertEqual(resolve_keys(Localization, [long_key]), [long_key[:148] + '_3'])
+
+    def test_other_owners_reservations_are_taken(self):
+        self.assertEqual(reserve_keys(NPC, ['npc_ann'], owner='s1'), ['npc_ann'])
+        self.assertEqual(reserve_keys(NPC, ['npc_ann'], owner='s2'), ['npc_ann_2'])
+
+        # El mismo owner renueva la suya, y sin contar reservas la key está libre.
+        self.assertEqual(reserve_keys(NPC, ['npc_ann'], owner='s1'), ['npc_ann'])
+        self.assertEqual(resolve_keys(NPC, ['npc_ann'], reserved=False), ['npc_ann'])
+
+    def test_expired_reservations_are_purged(self):
+        reserve_keys(NPC, ['npc_ann'], owner='s1', ttl=timedelta(seconds=-1))
+
+        self.assertEqual(reserve_keys(NPC, ['npc_ann'], owner='s2'), ['npc_ann'])
+        self.assertEqual(list(KeyReservation.objects.values_list('owner', flat=True)), ['s2'])
+
+    def test_resolve_does_not_write(self):
+        reserve_keys(NPC, ['npc_ann'], owner='s1', ttl=timedelta(seconds=-1))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(resolve_keys(NPC, ['npc_ann']), ['npc_ann'])
+            self.assertEqual(resolve_keys(NPC, ['npc_ann'], reserved=False), ['npc_ann'])
+
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+        self.assertTrue(KeyReservation.objects.exists())
+
+    def test_save_consumes_reservation(self):
+        reserve_keys(QuestObjective, ['questobjective_step1_quest_meet_1'], owner='s1')
+        self.create_quest('meet', NPC.objects.get(key='npc_zed'), objectives=1)
+
+        self.assertFalse(KeyReservation.objects.exists())
+
+    def test_collision_rolls_back_whole_import(self):
+        npcs_before = NPC.objects.count()
+        localizations_before = Localization.objects.count()
+        # La localization del segundo NPC ya existe: choca recién en ScaffoldPlan.write.
+        Localization.objects.create(identifier='taken', key='loc_npc_bob_name', english='', spanish='')
+
+        rows = [
+            {'identifier': 'ann', 'name': {'english': 'Ann', 'spanish': 'Ann'}},
+            {'identifier': 'bob', 'name': {'english': 'Bob', 'spanish': 'Bob'}},
+        ]
+        with self.assertRaises(KeyCollisionError):
+            create_npcs(rows)
+
+        self.assertEqual(NPC.objects.count(), npcs_before)
+        self.assertEqual(Localization.objects.count(), localizations_before + 1)
+
+    def test_reserve_endpoint_requires_staff(self):
+        body = json.dumps({"keys": ["npc_ann"]})
+        response = self.client.post('/content/reserve_keys/Dialogue/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(KeyReservation.objects.exists())
+
+        self.client.force_login(get_user_model().objects.create_user('editor', is_staff=True))
+        response = self.client.post('/content/reserve_keys/Dialogue/', body, content_type='application/json')
+        self.assertEqual(response.json(), {"keys": ["npc_ann"]})
+        self.assertTrue(KeyReservation.objects.filter(key='npc_ann').exists())
+
+def quest_row(identifier, npc='npc_elder'):
+    return {
+        'identifier': identifier,
+        'npc': npc,
+        'title': {'english': f"{identifier} title", 'spanish': f"{identifier} título"},
+        'brief': {'english': f"{identifier} brief", 'spanish': f"{identifier} resumen"},
+    }
+
+class QuestScaffoldingTests(ContentTestMixin, TestCase):
+    def setUp(self):
+        self.npc = self.create_npc('elder')
+
+    def test_admin_save_scaffolds_quest(self):
+        quest = self.create_quest('meet', self.npc, objectives=3)
+
+        prompt_key = 'dialogue_quest_prompt_elder_quest_meet'
+        end_key = 'dialogue_quest_end_elder_quest_meet'
+        self.assertEqual(self.quest_scaffold(quest), {
+            'conditions': ['condition_quest_meet', 'condition_quest_meet_finished'],
+            'prompt': {
+                'dialogue': prompt_key,
+                'button_text': f"loc_{prompt_key}_button_text",
+                'appear_conditions': [],
+                'no_appear_conditions': ['condition_quest_meet'],
+                'trigger_id_conditions': [],
+                'texts': [
+                    (f"dialoguesingleitem_{prompt_key}_{suffix}", f"loc_dialoguesingleitem_{prompt_key}_{suffix}_text")
+                    for suffix in ('single_item', 'deny_single_item', 'accept_single_item')
+                ],
+            },
+            'end': {
+                'dialogue': end_key,
+                'button_text': f"loc_{end_key}_button_text",
+                # El QuestEnd aparece con el anteúltimo objetivo: el último es volver con el NPC.
+                'appear_conditions': ['condition_quest_meet', 'condition_questobjective_step2_quest_meet_2'],
+                'no_appear_conditions': ['condition_quest_meet_finished'],
+                'trigger_id_conditions': ['condition_quest_meet_finished'],
+                'sequence': [(
+                    'dialoguesequenceitem_quest_end_elder_quest_meet_a_1',
+                    'loc_dialoguesequenceitem_quest_end_elder_quest_meet_a_1_text',
+                )],
+            },
+        })
+
+        self.assertEqual(
+            list(Condition.objects.filter(source_quest_objective__quest=quest).order_by('key').values_list('key', flat=True)),
+            [f"condition_questobjective_step{index}_quest_meet_{index}" for index in (1, 2, 3)],
+        )
+
+    def test_create_quests_matches_admin_save(self):
+        admin_quest = self.create_quest('meet', self.npc)
+        with self.captureOnCommitCallbacks(execute=True):
+            [imported_quest] = create_quests([quest_row('hunt')])
+
+        self.assertEqual(
+            json.dumps(self.quest_scaffold(imported_quest)),
+            json.dumps(self.quest_scaffold(admin_quest)).replace('quest_meet', 'quest_hunt'),
+        )
+        self.assertEqual(imported_quest.title.spanish, "hunt título")
+
+    def test_import_quests_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as f:
+            f.write("identifier,npc,title_en,title_es,brief_en,brief_es,money_reward\n")
+            f.write("Hunt,npc_elder,Hunt,Caza,Go,Andá,50\n")
+            f.write("Gather,npc_elder,Gather,Juntar,Go,Andá,\n")
+        self.addCleanup(os.remove, f.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_quests', f.name, stdout=StringIO())
+
+        self.assertEqual(
+            list(Quest.objects.order_by('key').values_list('key', 'money_reward')),
+            [('quest_gather', 0), ('quest_hunt', 50)],
+        )
+        self.assertEqual(QuestEnd.objects.count(), 2)
+
+    def test_failing_row_rolls_back_batch(self):
+        counts_before = [model.objects.count() for model in (Quest, Condition, Dialogue, Localization)]
+
+        # A la segunda fila le falta el brief: falla a mitad del plan.
+        broken_row = quest_row('gather')
+        del broken_row['brief']
+        with self.assertRaises(KeyError):
+            create_quests([quest_row('hunt'), broken_row])
+
+        # El botón del QuestEnd de la segunda ya existe: falla recién al escribir.
+        Localization.objects.create(identifier='taken', key='loc_dialogue_quest_end_elder_quest_gather_button_text', english='', spanish='')
+        with self.assertRaises(KeyCollisionError):
+            create_quests([quest_row('hunt'), quest_row('gather')])
+
+        counts_before[3] += 1
+        self.assertEqual([model.objects.count() for model in (Quest, Condition, Dialogue, Localization)], counts_before)
+
+NPC_CSV = "identifier,name_en,name_es\nBob,Bob,Roberto\nAnn Lee,Ann,Ana\n"
+NPC_JSON = json.dumps({"npcs": [
+    {"identifier": "Bob", "name_en": "Bob", "name_es": "Roberto"},
+    {"identifier": "Ann Lee", "name_en": "Ann", "name_es": "Ana"},
+]})
+
+class NPCImportTests(ContentTestMixin, TestCase):
+    def first_talk(self, npc):
+        basic = Basic.objects.select_related('dialogue', 'sequence').get(dialogue__npc=npc, is_first_talk=True)
+        dialogue = basic.dialogue
+
+        return {
+            'dialogue': dialogue.key,
+            'button_text': dialogue.button_text.key,
+            'no_appear_conditions': list(dialogue.no_appear_conditions.values_list('key', flat=True)),
+            'trigger_id_conditions': list(dialogue.trigger_id_conditions.values_list('key', flat=True)),
+            'source_dialogue': list(Condition.objects.filter(source_dialogue=dialogue).values_list('key', flat=True)),
+            'sequence': [(item.key, item.text.key) for item in basic.sequence.items.all()],
+        }
+
+    def test_csv_and_json_rows(self):
+        expected = [
+            {'identifier': 'Bob', 'name': {'english': 'Bob', 'spanish': 'Roberto'}},
+            {'identifier': 'Ann Lee', 'name': {'english': 'Ann', 'spanish': 'Ana'}},
+        ]
+        self.assertEqual(list(iter_npc_rows(StringIO(NPC_CSV), 'csv')), expected)
+        self.assertEqual(list(iter_npc_rows(StringIO(NPC_JSON), 'json')), expected)
+
+    def test_bad_headers(self):
+        with self.assertRaises(KeyError):
+            list(iter_npc_rows(StringIO("identifier,english,spanish\nBob,Bob,Roberto\n"), 'csv'))
+
+        with self.assertRaises(KeyError):
+            list(iter_npc_rows(StringIO(json.dumps({"characters": []})), 'json'))
+
+    def test_create_npcs_matches_admin_save(self):
+        admin_npc = self.create_npc('elder')
+        [imported_npc] = create_npcs(list(iter_npc_rows(StringIO("identifier,name_en,name_es\nBob,Bob,Roberto\n"), 'csv')))
+
+        self.assertEqual(imported_npc.key, 'npc_bob')
+        self.assertEqual(imported_npc.name.spanish, 'Roberto')
+        self.assertEqual(self.first_talk(admin_npc), {
+            'dialogue': 'dialogue_basic_elder_first_talk',
+            'button_text': 'loc_dialogue_basic_elder_first_talk_button_text',
+            'no_appear_conditions': ['condition_dialogue_basic_elder_first_talk_ok'],
+            'trigger_id_conditions': ['condition_dialogue_basic_elder_first_talk_ok'],
+            'source_dialogue': ['condition_dialogue_basic_elder_first_talk_ok'],
+            'sequence': [(
+                'dialoguesequenceitem_basic_elder_first_talk_a_1',
+                'loc_dialoguesequenceitem_basic_elder_first_talk_a_1_text',
+            )],
+        })
+        self.assertEqual(
+            json.dumps(self.first_talk(imported_npc)),
+            json.dumps(self.first_talk(admin_npc)).replace('elder', 'bob'),
+        )
+
+    def test_duplicate_identifiers(self):
+        rows = list(iter_npc_rows(StringIO("identifier,name_en,name_es\nBob,Bob,Roberto\nbob,Bob,Roberto\n"), 'csv'))
+
+        with self.assertRaises(KeyCollisionError):
+            create_npcs(rows)
+        self.assertFalse(NPC.objects.exists())
+
+        npcs = create_npcs(rows, suffix_conflicts=True)
+        self.assertEqual([npc.key for npc in npcs], ['npc_bob', 'npc_bob_2'])
+        self.assertEqual(Basic.objects.filter(is_first_talk=True).count(), 2)
+
+    def test_admin_import_view(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        url = reverse('custom_admin:content_npc_import')
+
+        response = self.client.post(url, {'file': SimpleUploadedFile('npcs.json', NPC_JSON.encode('utf-8'))})
+        self.assertRedirects(response, reverse('custom_admin:content_npc_changelist'), fetch_redirect_response=False)
+        self.assertEqual(sorted(NPC.objects.values_list('key', flat=True)), ['npc_ann_lee', 'npc_bob'])
+
+        # Repetir el import no crea nada y muestra el error en el form.
+        response = self.client.post(url, {'file': SimpleUploadedFile('npcs.csv', NPC_CSV.encode('utf-8'))})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("npc_bob", str(list(get_messages(response.wsgi_request))[-1]))
+        self.assertEqual(NPC.objects.count(), 2)
+
+        response = self.client.post(url, {'file': SimpleUploadedFile('npcs.csv', b"identifier,english\nBob,Bob\n")})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(NPC.objects.count(), 2)
+
+class ChangelistQueriesTests(ContentTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+
+    def create_rows(self, suffix):
+        # Una tanda de filas de cada changelist (la quest trae sus dialogues e items).
+        self.create_quest(f'meet{suffix}', self.create_npc(f'elder{suffix}'), objectives=2)
+        item = Item.objects.create(
+            identifier=f'amulet{suffix}',
+            key=f'item_amulet{suffix}',
+            name=self.localization(f'item_amulet{suffix}_name'),
+            description=self.localization(f'item_amulet{suffix}_description'),
+            rarity=Rarity.objects.first(),
+            type=ItemTypes.QUEST,
+        )
+        ItemAttributes.objects.create(item=item)
+        WeaponType.objects.create(identifier=f'sword{suffix}', key=f'weapontype_sword{suffix}', name=self.localization(f'weapontype_sword{suffix}_name'))
+        page = DiaryPage.objects.create(identifier=f'day{suffix}', key=f'diarypage_day{suffix}', name=self.localization(f'diarypage_day{suffix}_name'))
+        DiaryEntry.objects.create(
+            identifier=f'night{suffix}',
+            key=f'diaryentry_night{suffix}',
+            title=self.localization(f'diaryentry_night{suffix}_title'),
+            text=self.localization(f'diaryentry_night{suffix}_text'),
+            diary_page=page,
+        )
+
+    def test_list_select_related(self):
+        # Cantidad fija por changelist, no crece con las filas (keyset se ahorra un count).
+        expected = {
+            NPC: 5, Quest: 5, QuestObjective: 5, Item: 5, WeaponType: 5, DiaryPage: 5, DiaryEntry: 5,
+            DialogueSingleItem: 5, DialogueSequenceItem: 4,
+        }
+
+        for suffix in ('', '_2', '_3'):
+            self.create_rows(suffix)
+
+            for model, num_queries in expected.items():
+                url = reverse(f'custom_admin:content_{model._meta.model_name}_changelist')
+                with self.subTest(model=model.__name__, rows=suffix), self.assertNumQueries(num_queries):
+                    response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.context['cl'].result_list)
+
+    def test_weapon_sequences(self):
+        weapon_type = WeaponType.objects.create(identifier='sword', key='weapontype_sword', name=self.localization('weapontype_sword_name'))
+        damage_type = DamageType.objects.create(identifier='cut', key='damagetype_cut', name=self.localization('damagetype_cut_name'), damage_type_id=99)
+        slash, thrust = (AttackSequence.objects.create(identifier=identifier, key=f'attack_sequence_{identifier}') for identifier in ('slash', 'thrust'))
+        url = reverse('custom_admin:content_weapon_changelist')
+
+        for index in range(1, 4):
+            item = Item.objects.create(
+                identifier=f'blade{index}',
+                key=f'item_blade{index}',
+                name=self.localization(f'item_blade{index}_name'),
+                description=self.localization(f'item_blade{index}_description'),
+                rarity=Rarity.objects.first(),
+                type=ItemTypes.WEAPON,
+            )
+            weapon = Weapon.objects.create(item=item, weapon_type=weapon_type, damage_type=damage_type)
+            # Se cargan al revés: la columna las tiene que mostrar por index.
+            WeaponAttackSequence.objects.create(weapon=weapon, attack_sequence=thrust, index=2)
+            WeaponAttackSequence.objects.create(weapon=weapon, attack_sequence=slash, index=1)
+
+            # Sesión, usuario, counts, weapons con su item y el prefetch de las sequences.
+            with self.subTest(weapons=index), self.assertNumQueries(6):
+                response = self.client.get(url)
+
+        self.assertContains(response, 'slash | thrust', count=3)
+
+class AutocompleteTests(ContentTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        self.quest = self.create_quest('meet', self.create_npc('elder'))
+
+    def grow_catalog(self, count):
+        for index in range(count):
+            npc = self.create_npc(f'villager{index}')
+            Condition.objects.create(identifier=f'flag{index}', key=f'condition_flag{index}')
+            Item.objects.create(
+                identifier=f'coin{index}',
+                key=f'item_coin{index}',
+                name=self.localization(f'item_coin{index}_name'),
+                description=self.localization(f'item_coin{index}_description'),
+                rarity=Rarity.objects.first(),
+                type=ItemTypes.QUEST,
+            )
+            self.create_quest(f'errand{index}', npc)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_change_forms_do_not_load_catalog(self):
+        dialogue = QuestPrompt.objects.get(quest=self.quest).dialogue
+        urls = [
+            reverse('custom_admin:content_dialogue_change', args=[dialogue.pk]),
+            reverse('custom_admin:content_quest_change', args=[self.quest.pk]),
+        ]
+        # La primera vuelta llena caches (content types); se mide la segunda.
+        for url in urls:
+            self.count_queries(url)
+        before = [self.count_queries(url) for url in urls]
+
+        # Con autocomplete los selects solo traen lo elegido, no todas las filas.
+        self.grow_catalog(10)
+        self.assertEqual([self.count_queries(url) for url in urls], before)
+
+        dialogue_page, quest_page = (self.client.get(url).content.decode() for url in urls)
+        for key in ('npc_villager0', 'condition_flag0', 'item_coin0'):
+            self.assertFalse(key in dialogue_page, key)
+        for key in ('npc_villager0', 'item_coin0'):
+            self.assertFalse(key in quest_page, key)
+
+    def test_autocomplete_endpoint(self):
+        self.grow_catalog(3)
+        url = reverse('custom_admin:autocomplete')
+        params = {'app_label': 'content', 'model_name': 'dialogue', 'field_name': 'npc', 'term': 'villager1'}
+
+        response = self.client.get(url, params)
+        self.assertEqual([result['text'] for result in response.json()['results']], ['npc_villager1'])
+
+        params = {'app_label': 'content', 'model_name': 'dialogitemsrequired', 'field_name': 'item', 'term': 'coin'}
+        response = self.client.get(url, params)
+        self.assertEqual(len(response.json()['results']), 3)
+
+class TranslationMemoryTests(TestCase):
+    def create(self, key, english, spanish=''):
+        return Localization.objects.create(identifier=key, key=key, english=english, spanish=spanish)
+
+    def test_hashes(self):
+        self.assertEqual(normalize_text("  Hola\n  MUNDO "), "hola mundo")
+        # NFKC: la ligadura y el ancho completo cuentan como el texto plano.
+        self.assertEqual(normalize_text("ﬁn ＡＢ"), "fin ab")
+        self.assertEqual(loose_normalize_text("¡Gracias, viajero!"), "gracias viajero")
+        self.assertEqual(text_hash(normalize_text("Canción")), text_hash(normalize_text("CANCIÓN ")))
+        self.assertNotEqual(text_hash(normalize_text("Canción")), text_hash(normalize_text("Cancion")))
+        self.assertEqual(text_hash(""), "")
+
+    def test_hashes_follow_saves(self):
+        localization = self.create('loc_a', "Thanks!")
+        self.assertEqual(localization.english_hash, text_hash("thanks!"))
+        self.assertEqual(localization.spanish_hash, "")
+
+        localization.english = "Thank you"
+        localization.save()
+        self.assertEqual(Localization.objects.get(pk=localization.pk).english_loose_hash, text_hash("thank you"))
+
+    def test_find_duplicates(self):
+        self.create('loc_a', "Thanks, traveler!", "¡Gracias, viajero!")
+        self.create('loc_b', "thanks,  TRAVELER!", "Gracias viajero")
+        self.create('loc_c', "Thanks traveler", "COMPLETAR_loc_c")
+        self.create('loc_d', "Thanks, friend!")
+
+        duplicates = find_duplicates("Thanks, traveler!", exclude_key='loc_a')
+        self.assertEqual([row['key'] for row in duplicates['exact']], ['loc_b'])
+        self.assertEqual([row['key'] for row in duplicates['near']], ['loc_c'])
+
+        # En español ignora tildes y signos solo en near.
+        duplicates = find_duplicates("gracias viajero", 'spanish')
+        self.assertEqual([row['key'] for row in duplicates['exact']], ['loc_b'])
+        self.assertEqual([row['key'] for row in duplicates['near']], ['loc_a'])
+
+        # Vacío no agrupa todas las traducciones faltantes.
+        self.assertEqual(find_duplicates("", 'spanish'), {'exact': [], 'near': []})
+
+    def test_suggestions(self):
+        self.create('loc_a', "Thanks", "Gracias")
+        self.create('loc_b', "thanks", "Gracias")
+        self.create('loc_c', "Thanks!", "Muchas gracias")
+        self.create('loc_d', "thanks", "COMPLETAR_loc_d")
+
+        self.assertEqual(
+            suggest_translations("Thanks", exclude_key='loc_d'),
+            [
+                {'text': "Gracias", 'match': 'exact', 'count': 2},
+                {'text': "Muchas gracias", 'match': 'near', 'count': 1},
+            ],
+        )
+
+    def test_suggest_view(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        self.create('loc_a', "Thanks", "Gracias")
+        url = reverse('custom_admin:content_localization_suggest')
+
+        response = self.client.get(url, {'text': "thanks", 'source': 'english', 'key': 'loc_new'})
+        self.assertEqual(response.json()['suggestions'], [{'text': "Gracias", 'match': 'exact', 'count': 1}])
+        self.assertEqual(self.client.get(url, {'text': "thanks", 'source': 'french'}).status_code, 400)
+
+class SnapshotTests(ContentTestMixin, TestCase):
+    def setUp(self):
+        self.store = SnapshotStore(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.store.root, True)
+        self.quest = self.create_quest('meet', self.create_npc('elder'), objectives=2)
+
+    def test_round_trip(self):
+        collections = build_export_collections()
+        manifest, written = snapshot_release('v1', self.store)
+
+        self.assertEqual(self.store.list_releases(), ['v1'])
+        self.assertEqual(self.store.load_manifest('v1')['collections'], manifest['collections'])
+        for collection, records in collections.items():
+            entries = manifest['collections'][collection]
+            self.assertEqual(len(entries), len(records))
+            # Cada registro se recupera igual a partir de su hash.
+            self.assertEqual([self.store.get_record(digest) for digest in entries.values()], records)
+
+        self.assertEqual(written, len({canonical_bytes(record) for records in collections.values() for record in records}))
+        self.assertIn('quest_meet', manifest['collections']['Quests'])
+
+    def test_unchanged_records_are_not_rewritten(self):
+        snapshot_release('v1', self.store)
+
+        self.quest.title.english = "Meet the elder again"
+        self.quest.title.save()
+        manifest, written = snapshot_release('v2', self.store)
+
+        self.assertEqual(written, 1)
+        changes = compare_manifests(self.store.load_manifest('v1'), manifest)
+        self.assertEqual(changes['Localizations'], {'added': [], 'removed': [], 'changed': ['loc_quest_meet_title']})
+        self.assertEqual(changes['Quests'], {'added': [], 'removed': [], 'changed': []})
+
+    def test_invalid_release(self):
+        with self.assertRaises(SnapshotError):
+            snapshot_release('../v1', self.store)
+
+        with self.assertRaises(SnapshotError):
+            self.store.load_manifest('v9')
+
+class ContentDiffTests(ContentTestMixin, TestCase):
+    def setUp(self):
+        self.store = SnapshotStore(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.store.root, True)
+        self.npc = self.create_npc('elder')
+        self.quest = self.create_quest('meet', self.npc, objectives=2)
+        snapshot_release('v1', self.store)
+
+    def test_diff_values(self):
+        old = {"ID": "quest_meet", "Money": 10, "Objectives": [{"ID": "a", "Index": 1}, {"ID": "b", "Index": 2}]}
+        new = {"ID": "quest_meet", "Money": 20, "Objectives": [{"ID": "b", "Index": 1}, {"ID": "c", "Index": 2}]}
+
+        self.assertEqual(sorted(diff_values(old, new), key=str), sorted([
+            ("Money", 10, 20),
+            ("Objectives[a]", {"ID": "a", "Index": 1}, None),
+            ("Objectives[b].Index", 2, 1),
+            ("Objectives[c]", None, {"ID": "c", "Index": 2}),
+        ], key=str))
+
+    def test_release_against_database(self):
+        self.quest.title.english = "Meet the elder again"
+        self.quest.title.save()
+        self.create_quest('errand', self.npc)
+
+        with open_source('v1', self.store) as release, open_source(CURRENT_DB) as database:
+            entries = {(entry['collection'], entry['id']): entry for entry in iter_diff(release, database)}
+
+        self.assertEqual(entries[('Localizations', 'loc_quest_meet_title')]['changes'], [
+            {'field': 'English', 'old': 'quest_meet_title', 'new': "Meet the elder again"},
+        ])
+        self.assertEqual(entries[('Quests', 'quest_errand')]['status'], 'added')
+        self.assertFalse(any(entry['status'] == 'removed' for entry in entries.values()))
+        self.assertNotIn(('Quests', 'quest_meet'), entries)
+
+    def test_admin_view(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        url = reverse('custom_admin:content-diff')
+
+        with override_settings(CONTENT_SNAPSHOTS_DIR=self.store.root):
+            response = self.client.get(url, {'a': 'v1', 'b': CURRENT_DB})
+            self.assertEqual(response.context['counts'], {'added': 0, 'removed': 0, 'changed': 0})
+
+            response = self.client.get(url, {'a': 'v1', 'b': '/etc/passwd.json'})
+            self.assertEqual(response.status_code, 400)
+
+            self.quest.brief.spanish = "Otra"
+            self.quest.brief.save()
+            response = self.client.get(url, {'a': 'v1', 'b': CURRENT_DB, 'download': '1'})
+            lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        self.assertEqual([(line['id'], line['status']) for line in lines], [('loc_quest_meet_brief', 'changed')])
+
+class LocalizationChangelistTests(ContentTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        npc = self.create_npc('elder')
+        self.create_quest('meet', npc)
+        self.orphan = self.localization('orphan')
+
+    def test_model_name_filter_and_column(self):
+        url = reverse('custom_admin:content_localization_changelist')
+
+        # Cantidad de queries fija: no crece con las filas.
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        choices = [value for value, _ in response.context['cl'].filter_specs[0].lookup_choices]
+        self.assertIn('npc', choices)
+        self.assertIn('quest', choices)
+        self.assertNotIn('', choices)
+        model_names = {obj.key: obj.owner_model for obj in response.context['cl'].result_list}
+        self.assertEqual(model_names['loc_quest_meet_title'], 'quest')
+        self.assertEqual(model_names['loc_orphan'], '')
+
+        # Quest tiene dos LocalizedFields (title y brief): el filtro incluye ambos.
+        response = self.client.get(url, {'model_name': 'quest'})
+        self.assertEqual(
+            sorted(obj.key for obj in response.context['cl'].result_list),
+            ['loc_quest_meet_brief', 'loc_quest_meet_title'],
+        )
+
+    def test_estimate_count(self):
+        queryset = Localization.objects.all()
+        total = queryset.count()
+
+        # Hasta el límite el count es exacto.
+        self.assertEqual(estimate_count(queryset, total), (total, False, False))
+
+        # Por encima, sin filtros, se estima por el rango y la densidad de pks.
+        expires_at = timezone.now()
+        KeyReservation.objects.bulk_create([KeyReservation(model='content.npc', key=f"npc_{index}", expires_at=expires_at) for index in range(90)])
+        KeyReservation.objects.filter(pk__in=list(KeyReservation.objects.values_list('pk', flat=True))[1::3]).delete()
+        count, is_estimated, is_capped = estimate_count(KeyReservation.objects.all(), 20)
+        self.assertTrue(is_estimated)
+        self.assertFalse(is_capped)
+        self.assertAlmostEqual(count, KeyReservation.objects.count(), delta=3)
+
+        # Con filtros se corta en el límite.
+        self.assertEqual(estimate_count(queryset.filter(english__isnull=False), 1), (1, False, True))
+
+    def test_offset_pagination_counts_exactly(self):
+        url = reverse('custom_admin:content_localization_changelist')
+        for index in range(30):
+            self.localization(f"extra_{index}")
+        Localization.objects.filter(key__in=[f"loc_extra_{index}" for index in range(0, 30, 3)]).delete()
+
+        with mock.patch.object(LocalizationAdmin, 'keyset_count_limit', 5), mock.patch.object(LocalizationAdmin, 'list_per_page', 4):
+            # Por key es por cursor y el count se marca como aproximado.
+            response = self.client.get(url)
+            self.assertTrue(response.context['cl'].is_keyset)
+            self.assertTrue(response.context['cl'].result_count_is_estimated)
+            self.assertContains(response, 'aprox.')
+
+            # Por otra columna (english) es por OFFSET, con el count exacto y todas las páginas.
+            response = self.client.get(url, {'o': '4'})
+            cl = response.context['cl']
+            self.assertFalse(cl.is_keyset)
+            self.assertNotIsInstance(cl.paginator, KeysetPaginator)
+            self.assertEqual(cl.result_count, Localization.objects.count())
+
+            # Con búsqueda tampoco se corta en keyset_count_limit.
+            matching = Localization.objects.filter(english__icontains='extra').count()
+            response = self.client.get(url, {'o': '4', 'q': 'extra'})
+            self.assertEqual(response.context['cl'].result_count, matching)
+
+            last_page = response.context['cl'].paginator.num_pages
+            response = self.client.get(url, {'o': '4', 'q': 'extra', 'p': last_page})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['cl'].result_list), matching - (last_page - 1) * 4)
+
+class LocalizationCSVExportTests(ContentTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        self.quest = self.create_quest('meet', self.create_npc('elder'))
+        self.url = reverse('custom_admin:content_localization_changelist')
+
+    def export(self, action, localizations):
+        data = {'action': action, '_selected_action': [localization.pk for localization in localizations]}
+        response = self.client.post(self.url, data)
+
+        self.assertTrue(response.streaming)
+        return response, list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_export_csv(self):
+        localizations = [self.quest.title, self.quest.brief, Localization.objects.get(key='loc_npc_elder_name')]
+        localizations[0].english = 'Meet, "the" elder'
+        localizations[0].save()
+
+        response, rows = self.export('export_csv', localizations)
+
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Localizations_npc_quests.csv"')
+        self.assertEqual(rows[0], ['Key', 'English(en)', 'Spanish(es)'])
+        self.assertEqual(sorted(rows[1:]), sorted([localization.key, localization.english, localization.spanish] for localization in localizations))
+
+    def test_export_all_csv_skips_entries_without_table(self):
+        orphan = Localization.objects.create(identifier='orphan', key='orphan_text', english='', spanish='')
+
+        _, rows = self.export('export_all_csv', [self.quest.title, orphan])
+
+        self.assertEqual(rows[0], ['Key', 'English(en)', 'Spanish(es)', 'Table'])
+        self.assertEqual([row[0] for row in rows[1:]], ['loc_quest_meet_title'])
+
+    def test_query_count_does_not_grow(self):
+        # Fija: los dueños salen de un aggregate, no de una query por fila.
+        for index in range(3):
+            localizations = list(Localization.objects.filter(key__startswith='loc_quest_'))
+            with self.subTest(quests=index + 1), self.assertNumQueries(8):
+                self.export('export_csv', localizations)
+
+            self.create_quest(f'errand{index}', self.quest.npc_giver)
+
+class TranslationReportTests(ContentTestMixin, TestCase):
+    def test_report_invalidated_on_commit(self):
+        localization = self.localization('greeting')
+        missing = get_translation_report()['totals']['missing']
+
+        # Hasta el commit el reporte cacheado no cambia.
+        with self.captureOnCommitCallbacks(execute=True):
+            localization.spanish = ''
+            localization.save()
+            self.assertEqual(get_translation_report()['totals']['missing'], missing)
+
+        self.assertEqual(get_translation_report()['totals']['missing'], missing + 1)
+
+    def test_samples_capped_and_cells_filter_changelist(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        for index in range(4):
+            Localization.objects.create(identifier=f"pending_{index}", key=f"loc_npc_pending_{index}", english=f"pending {index}", spanish='')
+
+        with mock.patch('content.localizations.REPORT_SAMPLE_SIZE', 2):
+            report = get_translation_report()
+        self.assertEqual(len(report['samples']['missing']), 2)
+        self.assertGreaterEqual(report['totals']['missing'], 4)
+
+        response = self.client.get(reverse('custom_admin:translation-report'))
+        group = next(group for group in response.context['groups'] if group['loc_table'] == 'NPCs' and group['owner'] == '')
+        count, url = group['cells'][0]
+        self.assertEqual(count, 4)
+
+        response = self.client.get(url)
+        self.assertEqual(
+            sorted(obj.key for obj in response.context['cl'].result_list),
+            [f"loc_npc_pending_{index}" for index in range(4)],
+        )
+
+class ConditionGraphCacheTests(ContentTestMixin, TestCase):
+    def test_rebuilt_when_version_changes(self):
+        graph = get_condition_graph()
+        self.assertIs(get_condition_graph(), graph)
+
+        # Otro proceso invalidó: cambió la versión en la cache compartida.
+        cache.set(GRAPH_VERSION_CACHE_KEY, 'other-process', timeout=None)
+        self.assertIsNot(get_condition_graph(), graph)
+
+    def test_invalidated_on_commit(self):
+        graph = get_condition_graph()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Condition.objects.create(identifier='door_open', key='condition_door_open')
+            self.assertIs(get_condition_graph(), graph)
+
+        self.assertIn('condition_door_open', get_condition_graph().conditions.values())
+
+class ExportJobTests(TestCase):
+    def staff(self, *codenames):
+        user = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        user.user_permissions.set(Permission.objects.filter(content_type__app_label='content', codename__in=codenames))
+        self.client.force_login(user)
+
+    def test_enqueue_requires_change_permission(self):
+        url = reverse('custom_admin:content_exportjob_enqueue', args=[ExportJobKinds.LOCALIZATION])
+
+        self.staff('view_exportjob')
+        self.assertEqual(self.client.post(url).status_code, 403)
+        self.assertEqual(self.client.get(reverse('custom_admin:export-localization')).status_code, 403)
+        self.assertFalse(ExportJob.objects.exists())
+
+        get_user_model().objects.filter(username='staff').delete()
+        self.staff('view_exportjob', 'change_exportjob')
+        self.assertRedirects(self.client.post(url), reverse('custom_admin:content_exportjob_changelist'))
+        self.assertEqual(ExportJob.objects.get().status, ExportJobStatuses.PENDING)
+
+    @override_settings(CONTENT_EXPORT_STALE_MINUTES=30)
+    def test_fail_stale_jobs(self):
+        stale = ExportJob.objects.create(kind=ExportJobKinds.LOCALIZATION, status=ExportJobStatuses.RUNNING)
+        fresh = ExportJob.objects.create(kind=ExportJobKinds.LOCALIZATION, status=ExportJobStatuses.RUNNING)
+        done = ExportJob.objects.create(kind=ExportJobKinds.LOCALIZATION, status=ExportJobStatuses.DONE)
+        ExportJob.objects.filter(pk__in=[stale.pk, done.pk]).update(updated_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(fail_stale_jobs(), 1)
+        self.assertEqual(
+            dict(ExportJob.objects.values_list('pk', 'status')),
+            {stale.pk: ExportJobStatuses.FAILED, fresh.pk: ExportJobStatuses.RUNNING, done.pk: ExportJobStatuses.DONE},
+        )
+
+    def test_copy_to_legacy_path(self):
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir)
+        path = os.path.join(base_dir, 'job.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('[]')
+
+        with override_settings(BASE_DIR=base_dir):
+            copy_to_legacy_path(ExportJobKinds.LOCALIZATION, path)
+
+        with open(os.path.join(base_dir, 'exports', 'localization.json'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), '[]')
+
+@override_settings(CONTENT_PROFILING=True)
+class ProfilingTests(ContentTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        profiling.recent_profiles.clear()
+
+    def test_request_and_stream_profiles(self):
+        url = reverse('custom_admin:content_localization_changelist')
+
+        response = self.client.get(url)
+        self.assertIn('queries', response['Server-Timing'])
+
+        localization = self.localization('greeting')
+        response = self.client.post(url, {'action': 'export_csv', '_selected_action': [localization.pk]})
+        b''.join(response.streaming_content)
+
+        self.assertEqual([p.streaming for p in profiling.recent_profiles], [False, True])
+        self.assertGreater(profiling.recent_profiles[0].query_count, 0)
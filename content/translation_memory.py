@@ -0,0 +1,103 @@
+import hashlib
+import re
+import unicodedata
+from collections import Counter
+from .models import Localization, PLACEHOLDER_PREFIX
+
+# Idiomas indexados: campo de texto -> (hash exacto, hash aproximado).
+HASH_FIELDS = {
+    'english': ('english_hash', 'english_loose_hash'),
+    'spanish': ('spanish_hash', 'spanish_loose_hash'),
+}
+
+_whitespace = re.compile(r"\s+")
+_punctuation = re.compile(r"[^\w\s]")
+
+def normalize_text(text):
+    """
+    Normalización para duplicados exactos: unicode NFKC, sin diferencias de
+    mayúsculas ni de espacios.
+    """
+    text = unicodedata.normalize('NFKC', text or '')
+    return _whitespace.sub(' ', text.casefold()).strip()
+
+def loose_normalize_text(text):
+    """
+    Normalización para casi duplicados: además ignora tildes y puntuación
+    ("¡Gracias!" == "gracias").
+    """
+    text = unicodedata.normalize('NFKD', normalize_text(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _whitespace.sub(' ', _punctuation.sub(' ', text)).strip()
+
+def text_hash(normalized):
+    # Vacío queda vacío para no agrupar todas las traducciones faltantes.
+    if not normalized:
+        return ''
+
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+def update_text_hashes(localization):
+    """
+    Recalcula los hashes del índice a partir de english y spanish.
+    Devuelve True si alguno cambió.
+    """
+    changed = False
+
+    for field_name, (hash_field, loose_hash_field) in HASH_FIELDS.items():
+        text = getattr(localization, field_name)
+        for attname, value in (
+            (hash_field, text_hash(normalize_text(text))),
+            (loose_hash_field, text_hash(loose_normalize_text(text))),
+        ):
+            if getattr(localization, attname) != value:
+                setattr(localization, attname, value)
+                changed = True
+
+    return changed
+
+def get_hash_field_names():
+    return [name for fields in HASH_FIELDS.values() for name in fields]
+
+def find_duplicates(text, language='english', exclude_key=None, limit=50):
+    """
+    Localizations con el mismo texto (exact) o casi el mismo (near) en el idioma dado.
+    Ambas búsquedas van por índice.
+    """
+    hash_field, loose_hash_field = HASH_FIELDS[language]
+    exact_hash = text_hash(normalize_text(text))
+    loose_hash = text_hash(loose_normalize_text(text))
+
+    if not loose_hash:
+        return {'exact': [], 'near': []}
+
+    queryset = Localization.objects.filter(**{loose_hash_field: loose_hash}).order_by('key')
+    if exclude_key:
+        queryset = queryset.exclude(key=exclude_key)
+
+    result = {'exact': [], 'near': []}
+    for row in queryset.values('id', 'key', 'english', 'spanish', hash_field)[:limit]:
+        match = 'exact' if row.pop(hash_field) == exact_hash else 'near'
+        result[match].append(row)
+
+    return result
+
+def suggest_translations(text, source='english', exclude_key=None, limit=5):
+    """
+    Traducciones ya cargadas para el mismo texto de origen, ordenadas primero
+    por coincidencia exacta y después por cantidad de usos.
+    """
+    target = 'spanish' if source == 'english' else 'english'
+    duplicates = find_duplicates(text, source, exclude_key=exclude_key)
+
+    suggestions = {}
+    for match in ('exact', 'near'):
+        counter = Counter(
+            row[target] for row in duplicates[match]
+            if row[target] and not row[target].startswith(PLACEHOLDER_PREFIX)
+        )
+        for translation, count in counter.most_common():
+            suggestion = suggestions.setdefault(translation, {'text': translation, 'match': match, 'count': 0})
+            suggestion['count'] += count
+
+    return list(suggestions.values())[:limit]
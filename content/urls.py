@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     path("generate_key/<str:model>/", views.generate_key, name="generate_key"),
-]
\ No newline at end of file
+    path("generate_keys/<str:model>/", views.generate_keys, name="generate_keys"),
+    path("reserve_keys/<str:model>/", views.reserve_keys, name="reserve_keys"),
+]
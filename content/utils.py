@@ -1,13 +1,85 @@
 import re
+import unicodedata
+from string import Formatter
+
+# sanitize: se pasa a minúsculas, se sacan los espacios de los bordes
+# (los mismos caracteres que str.strip), los espacios pasan a "_", los acentos
+# se separan de la letra (NFKD) y se borra lo que no sea alfanumérico o "_".
+# Está como datos porque key_generator.js tiene que hacer exactamente lo mismo.
+STRIP_CHARS = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000"
+INVALID_KEY_CHARS = "[^a-z0-9_]"
+
+_invalid_key_chars = re.compile(INVALID_KEY_CHARS)
+
+def _split_processor(value, separator, index):
+    # El campo se reemplaza por la parte index del split (vacío si no aparece el separador).
+    if separator not in value:
+        return ""
+
+    return value.split(separator)[index]
+
+def _drop_segments_processor(value, separator, count):
+    # Saca los primeros count segmentos del valor.
+    return separator.join(value.split(separator)[count:])
+
+# Operaciones que pueden usar los field_processors (ver key_generator.js).
+PROCESSOR_OPS = {
+    "split": _split_processor,
+    "drop_segments": _drop_segments_processor,
+}
 
 class KeyGenerator:
     fields = []
-    format = "COMPLETE ME" # Por ejemplo: prefix_dialogue_key_slug_dialogue_item_index;
-    processors = None
+    template = "" # Por ejemplo: {prefix}{dialogue_key}_{slug}_{dialogue_item_index}
+    # {campo: {"op": <PROCESSOR_OPS>, ...argumentos}}
+    field_processors = {}
+
+    # Se arman una sola vez por clase en compile().
+    processors = {}
+    _formatter = None
+    _field_order = ()
+    _parts = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.compile()
 
     @classmethod
-    def _get_format(cls):
-        return cls.format
+    def compile(cls):
+        """
+        Convierte el template en un formatter posicional ("{0}{1}_{2}_{3}".format)
+        y arma los processors de field_processors. Los valores no se vuelven a
+        buscar dentro del texto, así que un valor que contenga el nombre de
+        otro campo no rompe la key.
+        """
+        parts = []
+        spec_parts = []
+        field_order = []
+
+        for literal, field_name, _, _ in Formatter().parse(cls.template):
+            if literal:
+                parts.append(literal.replace("{", "{{").replace("}", "}}"))
+                spec_parts.append({"text": literal})
+
+            if field_name is not None:
+                if field_name not in cls.fields:
+                    raise ValueError(f"{cls.__name__}: el template usa {field_name}, que no está en fields.")
+
+                parts.append(f"{{{len(field_order)}}}")
+                spec_parts.append({"field": field_name})
+                field_order.append(field_name)
+
+        cls._formatter = "".join(parts).format
+        cls._field_order = tuple(field_order)
+        cls._parts = spec_parts
+
+        cls.processors = {}
+        for field, processor in cls.field_processors.items():
+            if field not in cls.fields:
+                raise ValueError(f"{cls.__name__}: field_processors usa {field}, que no está en fields.")
+
+            arguments = {name: value for name, value in processor.items() if name != "op"}
+            cls.processors[field] = lambda value, op=PROCESSOR_OPS[processor["op"]], arguments=arguments: op(value, **arguments)
 
     @classmethod
     def get_params_from_request(cls, request):
@@ -20,46 +92,33 @@ class KeyGenerator:
 
     @classmethod
     def sanitize(cls, key):
-        key = key.lower().strip().replace(" ", "_")
-        re.sub(r"[^a-z0-9_]", "", key) # Borro caracteres que no sean alfanumericos.
+        key = key.lower().strip(STRIP_CHARS).replace(" ", "_")
+        key = _invalid_key_chars.sub("", unicodedata.normalize("NFKD", key))
 
         return key
 
-    @classmethod
-    def get_field_processors(cls):
-        """
-        Retorna un diccionario {field_name: method} para
-        todos los métodos que empiecen con 'process_field_'
-        """
-        if cls.processors is None:
-            cls.processors = {}
-
-            for attr_name in dir(cls):
-                if attr_name.startswith("process_field_"):
-                    field_name = attr_name[len("process_field_"):]  # todo lo que viene después
-                    method = getattr(cls, attr_name)
-                    cls.processors[field_name] = method
-        
-        return cls.processors
-
     @classmethod
     def apply_processor(cls, field, value):
-        if field in cls.get_field_processors():
+        if field in cls.processors:
             return cls.processors[field](value)
         
         return value
 
     @classmethod
     def generate_key(cls, **params):
-        final_key = cls._get_format()
-
-        for field in cls.fields:
-            value = cls.apply_processor(field, params[field])
-            final_key = final_key.replace(field, value)
+        values = [
+            cls.apply_processor(field, "" if params.get(field) is None else str(params[field]))
+            for field in cls._field_order
+        ]
 
-        final_key = cls.sanitize(final_key)
+        return cls.sanitize(cls._formatter(*values))
 
-        return final_key
+    @classmethod
+    def generate_keys(cls, params_list):
+        """
+        Una key por cada dict de params (p. ej. todas las filas de un inline).
+        """
+        return [cls.generate_key(**params) for params in params_list]
 
 class DialogueKeyGenerator(KeyGenerator):
     fields = [
@@ -69,21 +128,19 @@ class DialogueKeyGenerator(KeyGenerator):
         "slug"
     ]
 
-    @classmethod
-    def process_field_npc(cls, value):
-        if "npc_" in value:
-            return value.split("npc_")[1] # El texto se hace larguisimo asi que lo corto un poco.
-        
-        return ""
+    # El texto se hace larguisimo asi que lo corto un poco: npc_elder -> elder.
+    field_processors = {
+        "npc": {"op": "split", "separator": "npc_", "index": 1},
+    }
 
-    format = f"{fields[0]}{fields[1]}_{fields[2]}_{fields[3]}"
+    template = "{prefix}{type}_{npc}_{slug}"
 
 class DialogueSequenceKeyGenerator(KeyGenerator):
     fields = [
         "slug"
     ]
 
-    format = f"{fields[0]}"
+    template = "{slug}"
 
 class DialogueSequenceItemKeyGenerator(KeyGenerator):
     fields = [
@@ -93,11 +150,12 @@ class DialogueSequenceItemKeyGenerator(KeyGenerator):
         "dialogue_item_index",
     ]
 
-    @classmethod
-    def process_field_dialogue_key(cls, value):
-        return "_".join(value.split("_")[1:]) # El texto se hace larguisimo asi que lo corto un poco.
+    # El texto se hace larguisimo asi que lo corto un poco: saco el prefijo de la key.
+    field_processors = {
+        "dialogue_key": {"op": "drop_segments", "separator": "_", "count": 1},
+    }
 
-    format = f"{fields[0]}{fields[1]}_{fields[2]}_{fields[3]}"
+    template = "{prefix}{dialogue_key}_{slug}_{dialogue_item_index}"
 
 class DialogueSingleItemKeyGenerator(KeyGenerator):
     fields = [
@@ -106,7 +164,7 @@ class DialogueSingleItemKeyGenerator(KeyGenerator):
         "suffix",
     ]
 
-    format = f"{fields[0]}{fields[1]}_{fields[2]}"
+    template = "{prefix}{slug}_{suffix}"
 
 class QuestObjectiveKeyGenerator(KeyGenerator):
     fields = [
@@ -116,7 +174,7 @@ class QuestObjectiveKeyGenerator(KeyGenerator):
         "quest_objective_index",
     ]
 
-    format = f"{fields[0]}{fields[1]}_{fields[2]}_{fields[3]}"
+    template = "{prefix}{quest_key}_{slug}_{quest_objective_index}"
 
 class DiaryEntryKeyGenerator(KeyGenerator):
     fields = [
@@ -125,4 +183,44 @@ class DiaryEntryKeyGenerator(KeyGenerator):
         "diary_page_key",
     ]
 
-    format = f"{fields[0]}{fields[1]}_{fields[2]}"
\ No newline at end of file
+    template = "{prefix}{slug}_{diary_page_key}"
+
+# Nombre de modelo (el de generate_key/<model>/) -> KeyGenerator.
+KEY_GENERATORS = {
+    "Dialogue": DialogueKeyGenerator,
+    "DialogueSequence": DialogueSequenceKeyGenerator,
+    "DialogueSequenceItem": DialogueSequenceItemKeyGenerator,
+    "DialogueSingleItem": DialogueSingleItemKeyGenerator,
+    "QuestObjective": QuestObjectiveKeyGenerator,
+    "DiaryEntry": DiaryEntryKeyGenerator,
+}
+
+def get_key_spec():
+    """
+    Spec declarativa de los KEY_GENERATORS para key_generator.js
+    (se guarda en static/admin/js/key_spec.json con el comando export_key_spec).
+    """
+    return {
+        "sanitize": {
+            "strip_chars": STRIP_CHARS,
+            "invalid_chars": INVALID_KEY_CHARS,
+        },
+        "generators": {
+            model: {
+                "fields": list(keygen.fields),
+                "template": keygen.template,
+                "parts": keygen._parts,
+                "processors": keygen.field_processors,
+            }
+            for model, keygen in KEY_GENERATORS.items()
+        },
+    }
+
+def auto_key(prefix, identifier):
+    """
+    La key que arma auto_key.js a partir del identifier en los forms del admin.
+    """
+    slug = re.sub(r"[^\w\s]", "", identifier.lower()).strip()
+    slug = re.sub(r"\s+", "_", slug)
+
+    return prefix + slug
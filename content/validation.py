@@ -0,0 +1,121 @@
+"""
+Validación estática del flujo de quests sobre el grafo de Conditions.
+
+Todo se resuelve con operaciones de conjuntos sobre condition_graph, sin
+queries por fila, para poder correrlo antes de cada export en CI.
+"""
+from .condition_graph import ConditionGraph, get_condition_graph
+from .models import Quest, QuestPrompt, QuestEnd, Dialogue
+
+ERROR = 'error'
+WARNING = 'warning'
+
+class ValidationIssue:
+    def __init__(self, code, severity, model, key, message):
+        self.code = code
+        self.severity = severity
+        self.model = model
+        self.key = key
+        self.message = message
+
+    def to_dict(self):
+        return {
+            'code': self.code,
+            'severity': self.severity,
+            'model': self.model,
+            'key': self.key,
+            'message': self.message,
+        }
+
+    def __str__(self):
+        return f"[{self.severity}] {self.code} {self.model} {self.key}: {self.message}"
+
+def _condition_keys(graph, condition_ids):
+    return ", ".join(sorted(graph.conditions[c] for c in condition_ids))
+
+def validate_content(graph=None):
+    """
+    Devuelve la lista de ValidationIssue del contenido actual:
+
+    - appear_never_triggered: el elemento depende de una condition que nada dispara.
+    - requires_and_forbids: la misma condition está en appear y en no_appear.
+    - unreachable: sus appear_conditions tienen triggers, pero ninguno alcanzable
+      desde el inicio del juego.
+    - quest_end_unreachable: el QuestEnd de la quest nunca puede aparecer (o no tiene).
+      Una quest sin QuestPrompt ni QuestEnd es un borrador y queda como warning.
+    - condition_never_read: la condition se dispara pero ningún elemento depende de ella.
+      Las de los objetivos no cuentan: el juego las lee para el seguimiento de la quest.
+
+    Las conditions de los QuestObjectives las dispara el gameplay (ver condition_graph).
+    """
+    graph = graph or get_condition_graph()
+    issues = []
+
+    triggered = graph.triggered_by.keys()
+    possibly_triggered, available = graph.possibly_triggered()
+    blocked = set()
+
+    for element, key in graph.elements.items():
+        model_name, _ = element
+        appear = graph.get_appear_conditions(element)
+        no_appear = graph.get_no_appear_conditions(element)
+
+        never_triggered = appear - triggered
+        if never_triggered:
+            blocked.add(element)
+            issues.append(ValidationIssue(
+                'appear_never_triggered', ERROR, model_name, key,
+                f"Depende de conditions que nada dispara: {_condition_keys(graph, never_triggered)}",
+            ))
+
+        contradictory = appear & no_appear
+        if contradictory:
+            blocked.add(element)
+            issues.append(ValidationIssue(
+                'requires_and_forbids', ERROR, model_name, key,
+                f"Requiere y prohíbe a la vez: {_condition_keys(graph, contradictory)}",
+            ))
+
+        if element not in available and element not in blocked:
+            issues.append(ValidationIssue(
+                'unreachable', WARNING, model_name, key,
+                f"Ninguna forma de disparar: {_condition_keys(graph, appear - possibly_triggered)}",
+            ))
+
+    dialogue_model_name = Dialogue._meta.model_name
+    quest_end_dialogues = dict(QuestEnd.objects.values_list('quest__key', 'dialogue_id'))
+    prompted_quests = set(QuestPrompt.objects.values_list('quest__key', flat=True))
+
+    for quest_key in Quest.objects.values_list('key', flat=True):
+        dialogue_pk = quest_end_dialogues.get(quest_key)
+        if dialogue_pk is None:
+            if quest_key in prompted_quests:
+                issues.append(ValidationIssue('quest_end_unreachable', ERROR, Quest._meta.model_name, quest_key, "No tiene dialogue de QuestEnd."))
+            else:
+                issues.append(ValidationIssue('quest_end_unreachable', WARNING, Quest._meta.model_name, quest_key, "No tiene QuestPrompt ni QuestEnd (¿borrador?)."))
+            continue
+
+        element = (dialogue_model_name, dialogue_pk)
+        if element in blocked or element not in available:
+            issues.append(ValidationIssue(
+                'quest_end_unreachable', ERROR, Quest._meta.model_name, quest_key,
+                f"El QuestEnd {graph.elements.get(element)} nunca puede aparecer.",
+            ))
+
+    objective_condition_keys = {graph.conditions[c] for c in graph.objective_conditions}
+    for condition_key in graph.never_used():
+        if condition_key in objective_condition_keys:
+            continue
+
+        issues.append(ValidationIssue(
+            'condition_never_read', WARNING, 'condition', condition_key,
+            "Se dispara pero ningún elemento depende de ella.",
+        ))
+
+    return issues
+
+def validate_fresh():
+    """
+    Igual que validate_content pero con un grafo recién armado (para CI/comandos).
+    """
+    return validate_content(ConditionGraph())
@@ -1,39 +1,67 @@
+import json
+from django.apps import apps
+from django.contrib.admin.views.decorators import staff_member_required
 from django.http import JsonResponse
-from .utils import DialogueKeyGenerator as dKeyGenerator
-from .utils import DialogueSequenceKeyGenerator as dSequenceKeyGenerator
-from .utils import DialogueSequenceItemKeyGenerator as dSequenceItemKeyGenerator
-from .utils import DialogueSingleItemKeyGenerator as dSingleItemKeyGenerator
-from .utils import QuestObjectiveKeyGenerator as qoKeyGenerator
-from .utils import DiaryEntryKeyGenerator as deKeyGenerator
+from django.views.decorators.http import require_POST
+from .utils import KEY_GENERATORS
+from . import key_reservations
 
-def _generate_key(keygen, request):
-    return keygen.generate_key(**keygen.get_params_from_request(request))
+def _get_key_generator(model):
+    try:
+        return KEY_GENERATORS[model]
+    except KeyError:
+        raise NotImplementedError("Modelo desconocido: ", model)
 
+@staff_member_required
 def generate_key(request, model):
-    key = ""
-
-    match model:
-        case "Dialogue":
-            key = _generate_key(dKeyGenerator, request)
-    
-        case "DialogueSequence":
-            key = _generate_key(dSequenceKeyGenerator, request)
-    
-        case "DialogueSequenceItem":
-            key = _generate_key(dSequenceItemKeyGenerator, request)
-
-        case "DialogueSingleItem":
-            key = _generate_key(dSingleItemKeyGenerator, request)
-        
-        case "QuestObjective":
-            key = _generate_key(qoKeyGenerator, request)
-        
-        case "DiaryEntry":
-            key = _generate_key(deKeyGenerator, request)
-
-        case _:
-            raise NotImplementedError("Modelo desconocido: ", model)
+    keygen = _get_key_generator(model)
+    key = keygen.generate_key(**keygen.get_params_from_request(request))
 
     return JsonResponse({
         "key": key
-    })
\ No newline at end of file
+    })
+
+@staff_member_required
+@require_POST
+def generate_keys(request, model):
+    """
+    Keys de varias filas en un solo request (p. ej. todas las de un inline).
+    Recibe {"rows": [{campo: valor}, ...]} y devuelve {"keys": [...]} en el mismo orden.
+    """
+    if model not in KEY_GENERATORS:
+        return JsonResponse({"error": f"Modelo desconocido: {model}"}, status=400)
+
+    try:
+        rows = json.loads(request.body)["rows"]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Se espera {\"rows\": [...]}."}, status=400)
+
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return JsonResponse({"error": "rows tiene que ser una lista de objetos."}, status=400)
+
+    return JsonResponse({
+        "keys": KEY_GENERATORS[model].generate_keys(rows)
+    })
+
+@staff_member_required
+@require_POST
+def reserve_keys(request, model):
+    """
+    Reserva para la sesión las keys generadas en un form antes de guardarlo
+    (ver key_reservations.py). Recibe {"keys": [...]} y devuelve {"keys": [...]}
+    en el mismo orden, con sufijo (key_2, key_3...) las que ya existen o reservó otro editor.
+    """
+    if model not in KEY_GENERATORS:
+        return JsonResponse({"error": f"Modelo desconocido: {model}"}, status=400)
+
+    try:
+        keys = json.loads(request.body)["keys"]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Se espera {\"keys\": [...]}."}, status=400)
+
+    if not isinstance(keys, list) or not all(isinstance(key, str) for key in keys):
+        return JsonResponse({"error": "keys tiene que ser una lista de strings."}, status=400)
+
+    return JsonResponse({
+        "keys": key_reservations.reserve_keys(apps.get_model("content", model), keys, owner=request.session.session_key)
+    })
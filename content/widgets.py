@@ -1,6 +1,7 @@
 import os
 from django import forms
 from django.conf import settings
+from .profiling import timed
 
 DEFAULT_PREFAB_IMAGE = "/static/admin/images/default_prefab.png" 
 EMPTY_IMAGE = "/static/admin/images/empty.png"
@@ -12,13 +13,14 @@ def _get_file_choices(partial_base_path, *valid_file_formats):
 
     choices = []
 
-    for root, dirs, files in os.walk(base_path):
-        for file in files:
-            if file.lower().endswith(valid_file_formats):
-                full_path = os.path.join(root, file)
-                rel_path = os.path.relpath(full_path, base_path).replace("\\", "/")
-                unity_path = (partial_base_path + rel_path).replace("\\", "/")
-                choices.append((unity_path, rel_path))
+    with timed('filesystem'):
+        for root, dirs, files in os.walk(base_path):
+            for file in files:
+                if file.lower().endswith(valid_file_formats):
+                    full_path = os.path.join(root, file)
+                    rel_path = os.path.relpath(full_path, base_path).replace("\\", "/")
+                    unity_path = (partial_base_path + rel_path).replace("\\", "/")
+                    choices.append((unity_path, rel_path))
 
     # Opción vacia siempre como primer item
     return [("", "Ninguno")] + sorted(choices, key=lambda x: x[1])
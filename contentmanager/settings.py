@@ -50,6 +50,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'content.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'contentmanager.urls'
@@ -84,6 +85,17 @@ DATABASES = {
 }
 
 
+# Cache compartida entre procesos (runserver, workers, comandos): el reporte de
+# traducciones y la versión del grafo de conditions se invalidan desde cualquiera.
+# Vive en la misma base que cachea; la tabla la crea la migración 0008.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'content_cache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -135,4 +147,18 @@ SPRITES_BASE_PATH = f'Assets/{SUBFOLDER_PATH}/Sprites/'
 PREFABS_BASE_PATH = f'Assets/{SUBFOLDER_PATH}/Prefabs/'
 
 SPRITES_FULL_PATH = ABSOLUTE_BASE_PATH + SPRITES_BASE_PATH
-PREFABS_FULL_PATH = ABSOLUTE_BASE_PATH + PREFABS_BASE_PATH
\ No newline at end of file
+PREFABS_FULL_PATH = ABSOLUTE_BASE_PATH + PREFABS_BASE_PATH
+
+# Profiling por request (queries, SQL, templates y escaneo de archivos).
+# Se expone en el header Server-Timing y en /admin/profiling/.
+# CONTENT_PROFILING=1/true/yes/on lo habilita; "0" o "false" lo dejan apagado.
+CONTENT_PROFILING = os.environ.get("CONTENT_PROFILING", "").strip().lower() in ("1", "true", "yes", "on")
+CONTENT_PROFILING_HISTORY = 200
+# Exportaciones en segundo plano (ver content/exports.py).
+CONTENT_EXPORTS_DIR = BASE_DIR / 'exports' / 'jobs'
+CONTENT_EXPORT_WORKERS = 2
+# Minutos sin avance tras los cuales un job pendiente o en curso se da por muerto.
+CONTENT_EXPORT_STALE_MINUTES = 30
+
+# Snapshots de exports por release (ver content/snapshots.py).
+CONTENT_SNAPSHOTS_DIR = BASE_DIR / 'snapshots'
@@ -1,22 +1,32 @@
-function updateQuestObjectiveKey(identifierInput, keyInput, indexInput, addRelatedLink) {
-    getSanitizedKey(keyInput, "QuestObjective", {
+function getQuestObjectiveFields(identifierInput, indexInput) {
+    return {
         "prefix": identifierInput.dataset.keyPrefix,
         "quest_key": document.querySelector('#id_key').value,
         "slug": identifierInput.value,
         "quest_objective_index": indexInput.value,
-    },
+    };
+}
+
+function updateQuestObjectiveBriefLink(addRelatedLink, updatedKey) {
+    // Update popup link
+    if (addRelatedLink) {
+        const baseUrl = addRelatedLink.getAttribute('href').split('?')[0];
+        const newHref = `${baseUrl}?_popup=1&identifier=${encodeURIComponent(updatedKey + "_brief")}`;
+        addRelatedLink.setAttribute('href', newHref);
+    }
+}
+
+function updateQuestObjectiveKey(identifierInput, keyInput, indexInput, addRelatedLink) {
+    getSanitizedKey(keyInput, "QuestObjective", getQuestObjectiveFields(identifierInput, indexInput),
         (updatedKey) => {
-            // Update popup link
-            if (addRelatedLink) {
-                const baseUrl = addRelatedLink.getAttribute('href').split('?')[0];
-                const newHref = `${baseUrl}?_popup=1&identifier=${encodeURIComponent(updatedKey + "_brief")}`;
-                addRelatedLink.setAttribute('href', newHref);
-            }
+            updateQuestObjectiveBriefLink(addRelatedLink, updatedKey);
         }
     )
 }
 
 function updateQuestObjectives(container) {
+    // Todas las filas en un solo request.
+    const objectives = [];
     const rows = container.querySelectorAll('[id^="objectives-"]');
     rows.forEach(row => {
         const identifierInput = row.querySelector('input[id$="-identifier"]');
@@ -25,9 +35,17 @@ function updateQuestObjectives(container) {
         const addRelatedLink = row.querySelector('a.related-widget-wrapper-link.add-related');
 
         if (identifierInput && keyInput && indexInput) {
-            updateQuestObjectiveKey(identifierInput, keyInput, indexInput, addRelatedLink);
+            objectives.push({ identifierInput, keyInput, indexInput, addRelatedLink });
         }
     });
+
+    const rowsFields = objectives.map(objective => getQuestObjectiveFields(objective.identifierInput, objective.indexInput));
+    getSanitizedKeys("QuestObjective", rowsFields, (keys) => {
+        objectives.forEach((objective, i) => {
+            setGeneratedKey(objective.keyInput, "QuestObjective", keys[i]);
+            updateQuestObjectiveBriefLink(objective.addRelatedLink, keys[i]);
+        });
+    });
 }
 
 function setupInlineKeyAutoFill(container) {
@@ -57,6 +57,13 @@ document.addEventListener('DOMContentLoaded', function () {
             updateKey(identifierInput, keyInput, npcSelect, typeSelect);
         });
 
+        // El autocomplete (select2) dispara el change por jQuery, no como evento nativo.
+        if (window.django && django.jQuery) {
+            django.jQuery(npcSelect).on('change', function () {
+                updateKey(identifierInput, keyInput, npcSelect, typeSelect);
+            });
+        }
+
         identifierInput.addEventListener('input', function () {
             updateKey(identifierInput, keyInput, npcSelect, typeSelect);
         });
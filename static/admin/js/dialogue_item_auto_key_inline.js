@@ -1,20 +1,30 @@
-function updateDialogueSequenceItemKey(identifierInput, keyInput, indexInput, addRelatedLink) {
-    getSanitizedKey(keyInput, "DialogueSequenceItem", {
+function getDialogueSequenceItemFields(identifierInput, indexInput) {
+    return {
         "prefix": identifierInput.dataset.keyPrefix,
         "dialogue_key": document.querySelector('#id_key').value,
         "slug": identifierInput.value,
         "dialogue_item_index": indexInput.value,
-    }, (updatedKey) => {
-        // Update popup link
-        if (addRelatedLink) {
-            const baseUrl = addRelatedLink.getAttribute('href').split('?')[0];
-            const newHref = `${baseUrl}?_popup=1&identifier=${encodeURIComponent(updatedKey + "_text")}`;
-            addRelatedLink.setAttribute('href', newHref);
-        }
+    };
+}
+
+function updateDialogueSequenceItemTextLink(addRelatedLink, updatedKey) {
+    // Update popup link
+    if (addRelatedLink) {
+        const baseUrl = addRelatedLink.getAttribute('href').split('?')[0];
+        const newHref = `${baseUrl}?_popup=1&identifier=${encodeURIComponent(updatedKey + "_text")}`;
+        addRelatedLink.setAttribute('href', newHref);
+    }
+}
+
+function updateDialogueSequenceItemKey(identifierInput, keyInput, indexInput, addRelatedLink) {
+    getSanitizedKey(keyInput, "DialogueSequenceItem", getDialogueSequenceItemFields(identifierInput, indexInput), (updatedKey) => {
+        updateDialogueSequenceItemTextLink(addRelatedLink, updatedKey);
     });
 }
 
 function updateDialogueSequenceItems(container) {
+    // Todas las filas en un solo request.
+    const items = [];
     const rows = container.querySelectorAll('[id^="items-"]');
     rows.forEach(row => {
         const identifierInput = row.querySelector('input[id$="-identifier"]');
@@ -23,9 +33,17 @@ function updateDialogueSequenceItems(container) {
         const addRelatedLink = row.querySelector('a.related-widget-wrapper-link.add-related');
 
         if (identifierInput && keyInput && indexInput) {
-            updateDialogueSequenceItemKey(identifierInput, keyInput, indexInput, addRelatedLink);
+            items.push({ identifierInput, keyInput, indexInput, addRelatedLink });
         }
     });
+
+    const rowsFields = items.map(item => getDialogueSequenceItemFields(item.identifierInput, item.indexInput));
+    getSanitizedKeys("DialogueSequenceItem", rowsFields, (keys) => {
+        items.forEach((item, i) => {
+            setGeneratedKey(item.keyInput, "DialogueSequenceItem", keys[i]);
+            updateDialogueSequenceItemTextLink(item.addRelatedLink, keys[i]);
+        });
+    });
 }
 
 function setupInlineKeyAutoFill(container) {
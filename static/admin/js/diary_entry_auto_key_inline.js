@@ -1,27 +1,36 @@
-function updateDiaryEntryKey(identifierInput, keyInput, addTitleLink, addTextLink) {
-    getSanitizedKey(keyInput, "DiaryEntry", {
+function getDiaryEntryFields(identifierInput) {
+    return {
         "prefix": identifierInput.dataset.keyPrefix,
         "slug": identifierInput.value,
         "diary_page_key": document.querySelector('#id_key').value,
-    },
-        () => {
-            // Update popup link
-            if (addTitleLink) {
-                const baseUrl = addTitleLink.getAttribute('href').split('?')[0];
-                const newHref = `${baseUrl}?_popup=1&identifier=${encodeURIComponent(keyInput.value + "_title")}`;
-                addTitleLink.setAttribute('href', newHref);
-            }
+    };
+}
 
-            if (addTextLink) {
-                const baseUrl = addTextLink.getAttribute('href').split('?')[0];
-                const newHref = `${baseUrl}?_popup=1&identifier=${encodeURIComponent(keyInput.value + "_text")}`;
-                addTextLink.setAttribute('href', newHref);
-            }
+function updateDiaryEntryLinks(addTitleLink, addTextLink, updatedKey) {
+    // Update popup link
+    if (addTitleLink) {
+        const baseUrl = addTitleLink.getAttribute('href').split('?')[0];
+        const newHref = `${baseUrl}?_popup=1&identifier=${encodeURIComponent(updatedKey + "_title")}`;
+        addTitleLink.setAttribute('href', newHref);
+    }
+
+    if (addTextLink) {
+        const baseUrl = addTextLink.getAttribute('href').split('?')[0];
+        const newHref = `${baseUrl}?_popup=1&identifier=${encodeURIComponent(updatedKey + "_text")}`;
+        addTextLink.setAttribute('href', newHref);
+    }
+}
+
+function updateDiaryEntryKey(identifierInput, keyInput, addTitleLink, addTextLink) {
+    getSanitizedKey(keyInput, "DiaryEntry", getDiaryEntryFields(identifierInput),
+        () => {
+            updateDiaryEntryLinks(addTitleLink, addTextLink, keyInput.value);
         }
     );
 }
 
-function updateDiaryEntries(container) {
+function getDiaryEntryRows(container) {
+    const entries = [];
     const rows = container.querySelectorAll('tr[id^="entries-"]');
     rows.forEach(row => {
         const identifierInput = row.querySelector('input[id$="-identifier"]');
@@ -30,11 +39,33 @@ function updateDiaryEntries(container) {
         const addTextLink = row.querySelector('a[id^="add_"][id$="-text"]');
 
         if (identifierInput && keyInput) {
-            updateDiaryEntryKey(identifierInput, keyInput, addTitleLink, addTextLink);
+            entries.push({ row, identifierInput, keyInput, addTitleLink, addTextLink });
         }
+    });
+
+    return entries;
+}
+
+function updateDiaryEntries(container) {
+    // Todas las filas en un solo request.
+    const entries = getDiaryEntryRows(container);
+
+    getSanitizedKeys("DiaryEntry", entries.map(entry => getDiaryEntryFields(entry.identifierInput)), (keys) => {
+        entries.forEach((entry, i) => {
+            setGeneratedKey(entry.keyInput, "DiaryEntry", keys[i]);
+            updateDiaryEntryLinks(entry.addTitleLink, entry.addTextLink, keys[i]);
+        });
+    });
+}
+
+function setupInlineKeyAutoFill(container) {
+    getDiaryEntryRows(container).forEach(entry => {
+        // Cada fila se engancha una sola vez aunque se vuelva a llamar al agregar filas.
+        if (entry.row.dataset.keyAutoFill) return;
+        entry.row.dataset.keyAutoFill = "1";
 
-        identifierInput.addEventListener('input', () => {
-            updateDiaryEntryKey(identifierInput, keyInput, addTitleLink, addTextLink);
+        entry.identifierInput.addEventListener('input', () => {
+            updateDiaryEntryKey(entry.identifierInput, entry.keyInput, entry.addTitleLink, entry.addTextLink);
         });
     });
 }
@@ -42,6 +73,7 @@ function updateDiaryEntries(container) {
 document.addEventListener('DOMContentLoaded', () => {
     const container = document.querySelector('#entries-group');
     if (container) {
+        setupInlineKeyAutoFill(container);
         updateDiaryEntries(container);
     }
 
@@ -56,6 +88,7 @@ document.addEventListener('DOMContentLoaded', () => {
             setTimeout(() => {
                 const container = document.querySelector('#entries-group');
                 if (container) {
+                    setupInlineKeyAutoFill(container);
                     updateDiaryEntries(container);
                 }
             }, 100); // delay para asegurar que el DOM se actualice
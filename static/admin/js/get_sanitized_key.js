@@ -1,5 +1,11 @@
 const generatedNewSanitizedKey = new CustomEvent("generatedNewSanitizedKey");
 
+function setGeneratedKey(input, modelName, key) {
+    // Queda marcado para reservar la key al guardar el form (ver reserveGeneratedKeys).
+    input.value = key;
+    input.dataset.keyModel = modelName;
+}
+
 function getSanitizedKey(input, modelName, fields, callback, doDispatchEvent=true) {
     /*
         modelname: referencia en backend para usar el keygenerator adecuado.
@@ -7,7 +13,21 @@ function getSanitizedKey(input, modelName, fields, callback, doDispatchEvent=tru
         input: input donde se actualiza la key obtenida.
     */
     // Convertimos el objeto en query string
-    const params = new URLSearchParams(fields).toString();
+    const searchParams = new URLSearchParams(fields);
+
+    // Con la spec cargada (key_generator.js) la key se arma acá, con los mismos params que recibiría el server.
+    if (typeof canGenerateKeyLocally === "function" && canGenerateKeyLocally(modelName)) {
+        const key = generateKeyLocally(modelName, Object.fromEntries(searchParams));
+        callback?.(key);
+        if(doDispatchEvent)
+        {
+            setGeneratedKey(input, modelName, key);
+            document.dispatchEvent(generatedNewSanitizedKey);
+        }
+        return;
+    }
+
+    const params = searchParams.toString();
 
     url = `/content/generate_key/${modelName}/?${params}`;
 
@@ -17,8 +37,87 @@ function getSanitizedKey(input, modelName, fields, callback, doDispatchEvent=tru
             callback?.(data.key);
             if(doDispatchEvent)
             {
-                input.value = data.key;
+                setGeneratedKey(input, modelName, data.key);
                 document.dispatchEvent(generatedNewSanitizedKey);
             }
         });
-}
\ No newline at end of file
+}
+
+function getSanitizedKeys(modelName, rowsFields, callback) {
+    /*
+        Igual que getSanitizedKey pero para varias filas en un solo request.
+        rowsFields: lista de jsons de campos, uno por fila.
+        callback: recibe la lista de keys en el mismo orden.
+    */
+    if (!rowsFields.length) return;
+
+    if (typeof canGenerateKeyLocally === "function" && canGenerateKeyLocally(modelName)) {
+        callback(rowsFields.map(fields => generateKeyLocally(modelName, fields)));
+        document.dispatchEvent(generatedNewSanitizedKey);
+        return;
+    }
+
+    fetch(`/content/generate_keys/${modelName}/`, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            "X-CSRFToken": getCsrfToken(),
+        },
+        body: JSON.stringify({ rows: rowsFields }),
+    })
+        .then(r => r.json())
+        .then(data => {
+            callback(data.keys);
+            document.dispatchEvent(generatedNewSanitizedKey);
+        });
+}
+
+function getCsrfToken(form) {
+    const csrfInput = (form || document).querySelector('[name=csrfmiddlewaretoken]');
+    return csrfInput ? csrfInput.value : "";
+}
+
+function reserveGeneratedKeys(form, callback) {
+    /*
+        Reserva las keys generadas en el form antes de mandarlo (ver key_reservations.py).
+        Las que ya existen o reservó otro editor vuelven con sufijo y se reemplazan en el input.
+        Las que no cambiaron (p. ej. la key del objeto que se edita) no se reservan.
+    */
+    const inputsByModel = {};
+    form.querySelectorAll('input[data-key-model]').forEach(input => {
+        const row = input.closest('.inline-related, tr');
+        const deleteInput = row ? row.querySelector('input[name$="-DELETE"]') : null;
+
+        if (!input.value || input.value === input.defaultValue || (deleteInput && deleteInput.checked)) return;
+
+        (inputsByModel[input.dataset.keyModel] ??= []).push(input);
+    });
+
+    const requests = Object.entries(inputsByModel).map(([modelName, inputs]) =>
+        fetch(`/content/reserve_keys/${modelName}/`, {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                "X-CSRFToken": getCsrfToken(form),
+            },
+            body: JSON.stringify({ keys: inputs.map(input => input.value) }),
+        })
+            .then(r => r.ok ? r.json() : Promise.reject(r))
+            .then(data => data.keys.forEach((key, i) => { inputs[i].value = key; }))
+    );
+
+    // Si la reserva falla el form se manda igual: la validación de unique del server sigue estando.
+    Promise.allSettled(requests).then(callback);
+}
+
+document.addEventListener('submit', e => {
+    const form = e.target;
+    if (form.dataset.keysReserved || !form.querySelector('input[data-key-model]')) return;
+
+    e.preventDefault();
+    reserveGeneratedKeys(form, () => {
+        form.dataset.keysReserved = "1";
+        // requestSubmit con el mismo botón para no perder _continue / _addanother.
+        form.requestSubmit(e.submitter);
+    });
+});
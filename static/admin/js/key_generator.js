@@ -0,0 +1,65 @@
+/*
+    Generación de keys en el browser con la spec de key_spec.json, que se exporta
+    de content/utils.py con el comando export_key_spec. Hace lo mismo que
+    KeyGenerator.generate_key, así no hace falta ir al server en cada tecla.
+    Mientras la spec no cargó (o si el modelo no está) se usa el endpoint.
+*/
+let KEY_SPEC = null;
+
+const KEY_PROCESSOR_OPS = {
+    // Parte index del split (vacío si no aparece el separador).
+    split: (value, args) => value.includes(args.separator) ? value.split(args.separator)[args.index] : "",
+    // Saca los primeros count segmentos.
+    drop_segments: (value, args) => value.split(args.separator).slice(args.count).join(args.separator),
+};
+
+function escapeCharacterClass(text) {
+    return text.replace(/[\\\]\[^-]/g, "\\$&");
+}
+
+function sanitizeKey(spec, key) {
+    const stripClass = `[${escapeCharacterClass(spec.sanitize.strip_chars)}]`;
+    const stripRegex = new RegExp(`^${stripClass}+|${stripClass}+$`, "gu");
+    const invalidRegex = new RegExp(spec.sanitize.invalid_chars, "gu");
+
+    key = key.toLowerCase().replace(stripRegex, "").split(" ").join("_");
+
+    return key.normalize("NFKD").replace(invalidRegex, "");
+}
+
+function generateKeyFromSpec(spec, modelName, params) {
+    const generator = spec.generators[modelName];
+
+    const key = generator.parts.map(part => {
+        if (part.text !== undefined) return part.text;
+
+        const rawValue = params[part.field];
+        const value = rawValue === undefined || rawValue === null ? "" : String(rawValue);
+        const processor = generator.processors[part.field];
+
+        return processor ? KEY_PROCESSOR_OPS[processor.op](value, processor) : value;
+    }).join("");
+
+    return sanitizeKey(spec, key);
+}
+
+function canGenerateKeyLocally(modelName) {
+    return KEY_SPEC !== null && modelName in KEY_SPEC.generators;
+}
+
+function generateKeyLocally(modelName, params) {
+    return generateKeyFromSpec(KEY_SPEC, modelName, params);
+}
+
+if (typeof document !== "undefined" && document.currentScript) {
+    const specUrl = document.currentScript.src.replace(/key_generator\.js(\?.*)?$/, "key_spec.json");
+
+    fetch(specUrl)
+        .then(r => r.json())
+        .then(spec => { KEY_SPEC = spec; });
+}
+
+// Para correrlo con node en el test de paridad (content/tests.py).
+if (typeof module !== "undefined") {
+    module.exports = { generateKeyFromSpec, sanitizeKey };
+}
@@ -0,0 +1,85 @@
+// Sugerencias de la memoria de traducción en el form de Localization.
+const localizationLanguages = {
+    english: 'spanish',
+    spanish: 'english',
+};
+
+function getSuggestUrl() {
+    const path = window.location.pathname;
+    return path.substring(0, path.indexOf('/localization/')) + '/localization/suggest/';
+}
+
+function getSuggestionsBox(input) {
+    let box = input.parentElement.querySelector('.localization-suggestions');
+
+    if (!box) {
+        box = document.createElement('div');
+        box.className = 'localization-suggestions help';
+        input.parentElement.appendChild(box);
+    }
+
+    return box;
+}
+
+function renderSuggestions(input, targetInput, data) {
+    const box = getSuggestionsBox(input);
+    box.innerHTML = '';
+
+    const duplicates = data.duplicates.exact.length + data.duplicates.near.length;
+    if (duplicates) {
+        const info = document.createElement('div');
+        info.textContent = `Texto repetido en ${data.duplicates.exact.length} localizations (${data.duplicates.near.length} casi iguales): `
+            + data.duplicates.exact.concat(data.duplicates.near).slice(0, 5).map(d => d.key).join(', ');
+        box.appendChild(info);
+    }
+
+    if (!targetInput || targetInput.value) return;
+
+    data.suggestions.forEach(suggestion => {
+        const link = document.createElement('a');
+        link.href = '#';
+        link.textContent = `${suggestion.text} (${suggestion.count}${suggestion.match === 'near' ? ', similar' : ''})`;
+        link.addEventListener('click', function (event) {
+            event.preventDefault();
+            targetInput.value = suggestion.text;
+            box.innerHTML = '';
+        });
+
+        const item = document.createElement('div');
+        item.textContent = 'Sugerencia: ';
+        item.appendChild(link);
+        box.appendChild(item);
+    });
+}
+
+function requestSuggestions(input, source, keyInput) {
+    const targetInput = document.querySelector(`#id_${localizationLanguages[source]}`);
+    const params = new URLSearchParams({
+        text: input.value,
+        source: source,
+        key: keyInput ? keyInput.value : '',
+    }).toString();
+
+    fetch(`${getSuggestUrl()}?${params}`)
+        .then(r => r.json())
+        .then(data => renderSuggestions(input, targetInput, data));
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    const keyInput = document.querySelector('#id_key');
+
+    Object.keys(localizationLanguages).forEach(source => {
+        const input = document.querySelector(`#id_${source}`);
+        if (!input) return;
+
+        let timeout = null;
+        input.addEventListener('input', function () {
+            clearTimeout(timeout);
+            timeout = setTimeout(() => requestSuggestions(input, source, keyInput), 300);
+        });
+
+        if (input.value) {
+            requestSuggestions(input, source, keyInput);
+        }
+    });
+});